@@ -0,0 +1,370 @@
+import argparse
+import os
+import re
+import sys
+import typing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cycles import parse_layout
+from models import ColorSystem, PlayfieldMode, Row, from_registers
+
+source_exts = (".asm", ".s", ".inc", ".a", ".h", ".dasm")
+
+# the layouts the rows exporters emit
+row_layouts = (
+    "PF0_PF1_PF2",
+    "PF0_PF1_PF2_PF0_PF1_PF2",
+    "PF0_PF1_PF2_COLUPF_COLUBK",
+    "PF0_PF1_PF2_COLUPF",
+    "PF0_PF1_PF2_COLUBK",
+    "PF0_PF1_PF2_PF0_PF1_PF2_COLUPF_COLUBK",
+    "PF0_PF1_PF2_PF0_PF1_PF2_COLUPF",
+    "PF0_PF1_PF2_PF0_PF1_PF2_COLUBK",
+    "PF0_COLUPF_PF1_PF2_PF0_COLUPF_PF1_PF2",
+    "PF0_COLUBK_PF1_PF2_PF0_COLUBK_PF1_PF2",
+    "PF0_COLUPF_PF1_PF2_PF0_COLUPF_PF1_PF2_COLUBK",
+    "PF0_COLUBK_PF1_PF2_PF0_COLUBK_PF1_PF2_COLUPF",
+    "COLUPF_COLUBK_PF0_PF1_PF2",
+    "COLUPF_PF0_PF1_PF2",
+    "COLUBK_PF0_PF1_PF2",
+    "COLUPF_COLUBK_PF0_PF1_PF2_PF0_PF1_PF2",
+    "COLUPF_PF0_PF1_PF2_PF0_PF1_PF2",
+    "COLUBK_PF0_PF1_PF2_PF0_PF1_PF2",
+)
+
+# used for colors a source never sets
+default_codes = {"COLUPF": 0x0E, "COLUBK": 0x00}
+
+_table_registers = ("PF0R", "PF1R", "PF2R", "PF0", "PF1", "PF2", "COLUPF", "COLUBK")
+
+_data = re.compile(
+    r"^(?:(?P<label>[A-Za-z_.@][\w.@]*):?)?\s+(?:\.byte|\.db|dc\.b|byte)\s+(?P<values>[^;]*)",
+    re.IGNORECASE,
+)
+_label = re.compile(r"^(?P<label>[A-Za-z_.@][\w.@]*):?\s*(?:;.*)?$")
+_comment = re.compile(r"^\s*;\s*(?P<text>.*?)\s*$")
+_header = re.compile(r"Rows \((?P<fields>[A-Z0-9,/ ]+)\)")
+_immediate = re.compile(r"^\s+lda\s+#(?P<value>\S+)", re.IGNORECASE)
+_store = re.compile(r"^\s+sta\s+(?P<register>\w+)\s*(?:;.*)?$", re.IGNORECASE)
+_table_label = re.compile(
+    r"^(?P<prefix>.*?)(?P<register>%s)$" % "|".join(_table_registers)
+)
+
+
+class Block(typing.NamedTuple):
+    label: str
+    comments: typing.List[str]
+    lines: typing.List[typing.List[int]]
+
+    @property
+    def values(self) -> typing.List[int]:
+        return [v for line in self.lines for v in line]
+
+
+def parse_value(text: str) -> int:
+    text = text.strip()
+
+    if text.startswith("$"):
+        return int(text[1:], 16)
+    if text.startswith("%"):
+        return int(text[1:], 2)
+    if text.lower().startswith("0x"):
+        return int(text[2:], 16)
+
+    return int(text)
+
+
+def tokenize(
+    source: str,
+) -> typing.Tuple[typing.List[Block], typing.Dict[str, int]]:
+    """Labelled .byte blocks and the registers the code sets to immediate values."""
+    blocks = []
+    constants = {}
+    comments = []
+    current = None
+    immediate = None
+
+    for line in source.splitlines():
+        match = _data.match(line)
+        if match:
+            try:
+                values = [parse_value(v) for v in match.group("values").split(",")]
+            except ValueError:
+                # symbols and expressions can't be table data
+                current = None
+                continue
+
+            if match.group("label") or current is None:
+                current = Block(
+                    label=match.group("label") or "", comments=comments, lines=[]
+                )
+                blocks.append(current)
+                comments = []
+            current.lines.append(values)
+            continue
+
+        match = _comment.match(line)
+        if match:
+            comments.append(match.group("text"))
+            continue
+
+        if not line.strip():
+            continue
+
+        match = _label.match(line)
+        if match:
+            current = Block(label=match.group("label"), comments=comments, lines=[])
+            blocks.append(current)
+            comments = []
+            continue
+
+        match = _store.match(line)
+        if match and immediate is not None:
+            constants[match.group("register").upper()] = immediate
+
+        match = _immediate.match(line)
+        try:
+            immediate = parse_value(match.group("value")) if match else None
+        except ValueError:
+            immediate = None
+
+        current = None
+
+    return [b for b in blocks if b.lines], constants
+
+
+def _score(layout: str, lines: typing.List[typing.List[int]]) -> float:
+    """How plausible the columns are for the layout, unused PF0 and color bits are zero."""
+    score = 0.0
+
+    for f in parse_layout(layout):
+        column = [line[f.offset] for line in lines]
+        if f.register in ("PF0", "PF0R") and not f.packed:
+            score += sum(v & 0x0F == 0 for v in column) / len(column)
+        elif f.register == "PF0R":
+            # the right nibble holds the low color bits, a set color is even
+            left = next(g for g in parse_layout(layout) if g.register == "PF0")
+            score += sum(
+                v & 0x01 == 0 and (v | line[left.offset]) & 0x0F != 0
+                for v, line in zip(column, lines)
+            ) / len(column)
+        elif f.register in ("COLUPF", "COLUBK"):
+            score += sum(v & 0x01 == 0 for v in column) / len(column)
+
+    return score
+
+
+def detect_layout(block: Block) -> typing.Optional[str]:
+    widths = {len(line) for line in block.lines}
+    if len(widths) != 1:
+        return None
+
+    for text in reversed(block.comments):
+        match = _header.search(text)
+        if match:
+            fields = match.group("fields").replace("/", ",").split(",")
+            layout = "_".join(f.strip() for f in fields)
+            if len(parse_layout(layout)) in widths:
+                return layout
+
+    width = widths.pop()
+    candidates = [l for l in row_layouts if len(parse_layout(l)) == width]
+    if not candidates:
+        return None
+
+    # ties keep the simpler layout listed first
+    return max(candidates, key=lambda l: _score(l, block.lines))
+
+
+def _rows_from_fields(
+    fields: typing.Mapping[str, typing.List[int]],
+    count: int,
+    constants: typing.Mapping[str, int],
+) -> typing.List[Row]:
+    def column(register: str, fallback: str = "") -> typing.List[int]:
+        if register in fields:
+            return fields[register]
+        if fallback in fields:
+            return fields[fallback]
+        value = constants.get(
+            register, constants.get(fallback, default_codes.get(register, 0))
+        )
+        return [value] * count
+
+    pf = [column(r) for r in ("PF0", "PF1", "PF2")]
+    pf += [column(r, r[:-1]) for r in ("PF0R", "PF1R", "PF2R")]
+    colupf = column("COLUPF")
+    colubk = column("COLUBK")
+
+    return [
+        (from_registers(*(p[j] for p in pf)), colupf[j], colubk[j])
+        for j in range(count)
+    ]
+
+
+def decode_rows(
+    block: Block, layout: str, constants: typing.Mapping[str, int]
+) -> typing.Tuple[typing.List[Row], PlayfieldMode]:
+    fields = {}
+
+    for f in parse_layout(layout):
+        column = [line[f.offset] for line in block.lines]
+        fields[f.register] = [v & 0xF0 for v in column] if f.packed else column
+
+        if f.packed and f.register == "PF0":
+            right = next(g for g in parse_layout(layout) if g.register == "PF0R")
+            fields[f.packed] = [
+                ((line[f.offset] & 0x0F) << 4) | (line[right.offset] & 0x0F)
+                for line in block.lines
+            ]
+
+    mode = PlayfieldMode.Asymmetric if "PF0R" in fields else PlayfieldMode.Symmetric
+    return _rows_from_fields(fields, len(block.lines), constants), mode
+
+
+def _register_tables(
+    blocks: typing.List[Block], constants: typing.Mapping[str, int]
+) -> typing.Iterator[typing.Tuple[str, typing.List[Row], PlayfieldMode]]:
+    groups: typing.Dict[str, typing.Dict[str, typing.List[int]]] = {}
+
+    for block in blocks:
+        match = _table_label.match(block.label)
+        if match:
+            groups.setdefault(match.group("prefix"), {})[
+                match.group("register")
+            ] = block.values
+
+    for prefix, tables in groups.items():
+        if not any(r in tables for r in ("PF0", "PF1", "PF2")):
+            continue
+
+        lengths = {len(v) for r, v in tables.items() if r in ("COLUPF", "COLUBK")}
+        count = min(lengths) if lengths else min(len(v) for v in tables.values())
+        mode = PlayfieldMode.Symmetric
+
+        for r in ("PF0", "PF1", "PF2"):
+            # the registers export interleaves both halves of asymmetric rows
+            if r in tables and len(tables[r]) == 2 * count:
+                tables[f"{r}R"] = tables[r][1::2]
+                tables[r] = tables[r][::2]
+            if f"{r}R" in tables:
+                mode = PlayfieldMode.Asymmetric
+
+        tables = {r: v[:count] for r, v in tables.items()}
+        yield prefix or "Data", _rows_from_fields(tables, count, constants), mode
+
+
+def parse_source(
+    source: str,
+    name: str = "",
+    color_system: ColorSystem = ColorSystem.NTSC,
+    mode: typing.Optional[PlayfieldMode] = None,
+) -> typing.List[typing.Mapping]:
+    """Playfields found in the source, decoded like persistency.decode_playfield."""
+    blocks, constants = tokenize(source)
+    found = []
+
+    def add(label: str, rows: typing.List[Row], detected: PlayfieldMode):
+        found.append(
+            {
+                "name": f"{name}-{label}" if name else label,
+                "mode": (mode or detected).name,
+                "color_system": color_system.name,
+                "rows": rows,
+                "animation": None,
+            }
+        )
+
+    tabled = set()
+    for label, rows, detected in _register_tables(blocks, constants):
+        tabled.add(label)
+        add(label, rows, detected)
+
+    for block in blocks:
+        match = _table_label.match(block.label)
+        if match and (match.group("prefix") or "Data") in tabled:
+            continue
+
+        layout = detect_layout(block)
+        if layout:
+            rows, detected = decode_rows(block, layout, constants)
+            add(block.label or "Data", rows, detected)
+
+    return found
+
+
+def parse_file(filename: str, **kwargs) -> typing.List[typing.Mapping]:
+    with open(filename, errors="replace") as file:
+        return parse_source(
+            file.read(), name=os.path.splitext(os.path.basename(filename))[0], **kwargs
+        )
+
+
+def scan_tree(
+    from_dir: str, workers: typing.Optional[int] = None, **kwargs
+) -> typing.Generator[
+    typing.Tuple[
+        str, typing.Optional[typing.List[typing.Mapping]], typing.Optional[Exception]
+    ],
+    None,
+    None,
+]:
+    sources = [
+        os.path.join(root, f)
+        for root, _, files in os.walk(from_dir)
+        for f in sorted(files)
+        if f.lower().endswith(source_exts)
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(parse_file, source, **kwargs): source for source in sources
+        }
+
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], None if error else future.result(), error
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    from main import version
+    from persistency import save_decoded
+
+    parser = argparse.ArgumentParser(
+        description="Import .byte playfield tables from assembly sources"
+    )
+    parser.add_argument("from_dir")
+    parser.add_argument("to_dir")
+    parser.add_argument(
+        "--color-system",
+        choices=[c.name for c in ColorSystem],
+        default=ColorSystem.NTSC.name,
+    )
+    parser.add_argument("--mode", choices=[m.name for m in PlayfieldMode])
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.to_dir, exist_ok=True)
+    failed = 0
+
+    for source, playfields, error in scan_tree(
+        args.from_dir,
+        workers=args.workers,
+        color_system=ColorSystem[args.color_system],
+        mode=PlayfieldMode[args.mode] if args.mode else None,
+    ):
+        if error:
+            failed += 1
+            sys.stderr.write(f"{source}: {error}\n")
+            continue
+
+        for decoded in playfields:
+            to = os.path.join(args.to_dir, f"{decoded['name']}.pppp")
+            save_decoded(decoded, to=to, version=version)
+            print(f"{source} -> {to} ({len(decoded['rows'])} lines)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
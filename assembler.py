@@ -0,0 +1,343 @@
+import re
+import typing
+
+from cpu6502 import encodings, mode_sizes
+
+# the subset of vcs.h the kernels use
+vcs_symbols = {
+    "VSYNC": 0x00,
+    "VBLANK": 0x01,
+    "WSYNC": 0x02,
+    "RSYNC": 0x03,
+    "NUSIZ0": 0x04,
+    "NUSIZ1": 0x05,
+    "COLUP0": 0x06,
+    "COLUP1": 0x07,
+    "COLUPF": 0x08,
+    "COLUBK": 0x09,
+    "CTRLPF": 0x0A,
+    "REFP0": 0x0B,
+    "REFP1": 0x0C,
+    "PF0": 0x0D,
+    "PF1": 0x0E,
+    "PF2": 0x0F,
+    "GRP0": 0x1B,
+    "GRP1": 0x1C,
+    "ENAM0": 0x1D,
+    "ENAM1": 0x1E,
+    "ENABL": 0x1F,
+    "HMOVE": 0x2A,
+    "HMCLR": 0x2B,
+    "CXCLR": 0x2C,
+    "INPT4": 0x0C,
+    "INPT5": 0x0D,
+    "SWCHA": 0x280,
+    "SWACNT": 0x281,
+    "SWCHB": 0x282,
+    "SWBCNT": 0x283,
+    "INTIM": 0x284,
+    "TIMINT": 0x285,
+    "TIM1T": 0x294,
+    "TIM8T": 0x295,
+    "TIM64T": 0x296,
+    "T1024T": 0x297,
+}
+
+_byte_directives = {".byte", "byte", "dc.b", ".db", "dc"}
+_word_directives = {".word", "word", "dc.w", ".dw"}
+_ignored_directives = {"processor", "echo", "list", "subroutine", "end"}
+
+_token = re.compile(
+    r"\s*(?:(?P<number>\$[0-9A-Fa-f]+|%[01]+|\d+|'.')|(?P<symbol>[A-Za-z_.][\w.]*)"
+    r"|(?P<op><<|>>|[-+*/&|^<>#\[\]()~]))"
+)
+
+
+class AssemblyError(Exception):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+class Program(typing.NamedTuple):
+    chunks: typing.Dict[int, bytes]
+    symbols: typing.Dict[str, int]
+
+    def image(self, origin: int = 0xF000, size: int = 0x1000) -> bytes:
+        data = bytearray(size)
+
+        for address, chunk in self.chunks.items():
+            start = address - origin
+            if start < 0 or start + len(chunk) > size:
+                raise ValueError(f"${address:04X} is outside the ROM image")
+            data[start : start + len(chunk)] = chunk
+
+        return bytes(data)
+
+
+class _Unresolved(Exception):
+    pass
+
+
+class _Expression:
+    """Recursive descent over DASM expressions, [ ] group and < > select bytes."""
+
+    def __init__(self, text: str, symbols: typing.Mapping[str, int], pc: int):
+        self._tokens = []
+        position = 0
+        text = text.strip()
+
+        while position < len(text):
+            match = _token.match(text, position)
+            if not match or match.end() == position:
+                raise ValueError(f"Unexpected {text[position:]!r}")
+            self._tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+
+        self._k = 0
+        self._symbols = symbols
+        self._pc = pc
+
+    def evaluate(self) -> int:
+        value = self._binary(0)
+        if self._k != len(self._tokens):
+            raise ValueError(f"Unexpected {self._tokens[self._k][1]!r}")
+        return value
+
+    _precedence = (("|",), ("^",), ("&",), ("<<", ">>"), ("+", "-"), ("*", "/"))
+
+    def _peek(self) -> typing.Optional[str]:
+        if self._k < len(self._tokens) and self._tokens[self._k][0] == "op":
+            return self._tokens[self._k][1]
+        return None
+
+    def _binary(self, level: int) -> int:
+        if level == len(self._precedence):
+            return self._unary()
+
+        value = self._binary(level + 1)
+        while self._peek() in self._precedence[level]:
+            op = self._tokens[self._k][1]
+            self._k += 1
+            rhs = self._binary(level + 1)
+            value = {
+                "|": lambda a, b: a | b,
+                "^": lambda a, b: a ^ b,
+                "&": lambda a, b: a & b,
+                "<<": lambda a, b: a << b,
+                ">>": lambda a, b: a >> b,
+                "+": lambda a, b: a + b,
+                "-": lambda a, b: a - b,
+                "*": lambda a, b: a * b,
+                "/": lambda a, b: a // b,
+            }[op](value, rhs)
+
+        return value
+
+    def _unary(self) -> int:
+        if self._k >= len(self._tokens):
+            raise ValueError("Missing operand")
+
+        kind, text = self._tokens[self._k]
+        self._k += 1
+
+        if kind == "number":
+            if text[0] == "$":
+                return int(text[1:], 16)
+            if text[0] == "%":
+                return int(text[1:], 2)
+            if text[0] == "'":
+                return ord(text[1])
+            return int(text)
+
+        if kind == "symbol":
+            if text in self._symbols:
+                return self._symbols[text]
+            raise _Unresolved(text)
+
+        if text == "*":
+            return self._pc
+        if text == "<":
+            return self._unary() & 0xFF
+        if text == ">":
+            return (self._unary() >> 8) & 0xFF
+        if text == "-":
+            return -self._unary()
+        if text == "~":
+            return ~self._unary()
+        if text in ("[", "("):
+            value = self._binary(0)
+            self._k += 1
+            return value
+
+        raise ValueError(f"Unexpected {text!r}")
+
+
+def _split_operands(args: str) -> typing.List[str]:
+    return [a.strip() for a in args.split(",")] if args else []
+
+
+def _operand_mode(
+    mnemonic: str, args: str
+) -> typing.Tuple[typing.Tuple[str, ...], typing.Optional[str]]:
+    """Candidate addressing modes, narrowest first, and the operand expression."""
+    text = args.strip()
+    upper = text.upper()
+
+    if not text or upper == "A":
+        return ("imp", "acc"), None
+    if text.startswith("#"):
+        return ("imm",), text[1:]
+    if mnemonic in ("BCC", "BCS", "BEQ", "BMI", "BNE", "BPL", "BVC", "BVS"):
+        return ("rel",), text
+    if upper.startswith("(") and upper.endswith(",X)"):
+        return ("izx",), text[1:-3]
+    if upper.startswith("(") and upper.endswith("),Y"):
+        return ("izy",), text[1:-3]
+    if upper.startswith("(") and upper.endswith(")") and mnemonic == "JMP":
+        return ("ind",), text[1:-1]
+    if upper.endswith(",X"):
+        return ("zpx", "abx"), text[:-2]
+    if upper.endswith(",Y"):
+        return ("zpy", "aby"), text[:-2]
+
+    return ("zp", "abs"), text
+
+
+def _strip_comment(line: str) -> str:
+    quoted = False
+    for k, c in enumerate(line):
+        if c == "'":
+            quoted = not quoted
+        elif c == ";" and not quoted:
+            return line[:k]
+    return line
+
+
+def assemble(source: str, max_passes: int = 8) -> Program:
+    """Assembles the DASM subset the exporters and kernel generator emit."""
+    lines = [_strip_comment(line).rstrip() for line in source.splitlines()]
+    symbols = dict(vcs_symbols)
+    previous = None
+
+    for _ in range(max_passes):
+        chunks, pass_symbols, unresolved = _pass(lines, symbols)
+        if not unresolved and pass_symbols == previous:
+            return Program(
+                chunks={a: bytes(c) for a, c in chunks.items() if c},
+                symbols=pass_symbols,
+            )
+        previous = symbols = pass_symbols
+
+    k, name = unresolved[0] if unresolved else (0, "")
+    raise AssemblyError(k, f"unresolved symbol {name}" if name else "does not settle")
+
+
+def _pass(
+    lines: typing.List[str], known: typing.Mapping[str, int]
+) -> typing.Tuple[
+    typing.Dict[int, bytearray], typing.Dict[str, int], typing.List[typing.Tuple]
+]:
+    symbols = dict(known)
+    chunks: typing.Dict[int, bytearray] = {}
+    unresolved = []
+    pc = 0
+    chunk = None
+    uninitialized = False
+
+    def evaluate(k: int, text: str, default: int = 0) -> int:
+        try:
+            return _Expression(text, symbols, pc).evaluate()
+        except _Unresolved as e:
+            unresolved.append((k, str(e)))
+            return default
+        except (ValueError, IndexError) as e:
+            raise AssemblyError(k, str(e))
+
+    def emit(data: typing.Iterable[int]):
+        nonlocal pc, chunk
+        data = bytes(v & 0xFF for v in data)
+        if not uninitialized:
+            if chunk is None:
+                chunk = chunks.setdefault(pc, bytearray())
+            chunk.extend(data)
+        pc += len(data)
+
+    for k, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        label = None
+        rest = line.strip()
+        if not line[0].isspace():
+            label, *rest = rest.split(None, 1)
+            rest = rest[0] if rest else ""
+            if "=" in label:
+                label, _, value = label.partition("=")
+                rest = f"= {value} {rest}"
+
+        op, *args = rest.split(None, 1) if rest else (None,)
+        args = args[0].strip() if args else ""
+
+        name = label.rstrip(":") if label else None
+        directive = op.lower() if op else None
+
+        if directive in ("=", "equ", "set"):
+            symbols[name] = evaluate(k, args)
+            continue
+
+        if name:
+            symbols[name] = pc
+
+        if directive is None or directive in _ignored_directives:
+            continue
+
+        if directive == "include":
+            if args.strip("\"' ").lower() not in ("vcs.h", "macro.h"):
+                raise AssemblyError(k, f"cannot include {args}")
+        elif directive in ("org", "rorg"):
+            pc = evaluate(k, args.split(",")[0])
+            chunk = None
+        elif directive in ("seg", "seg.u"):
+            uninitialized = directive == "seg.u"
+            chunk = None
+        elif directive == "align":
+            size = evaluate(k, args.split(",")[0], 1)
+            emit([0] * (-pc % size))
+        elif directive in ("ds", "ds.b"):
+            count, *fill = _split_operands(args)
+            emit([evaluate(k, fill[0]) if fill else 0] * evaluate(k, count))
+        elif directive in _byte_directives:
+            emit(evaluate(k, a) for a in _split_operands(args))
+        elif directive in _word_directives:
+            for a in _split_operands(args):
+                value = evaluate(k, a)
+                emit((value, value >> 8))
+        else:
+            mnemonic, _, size_hint = op.upper().partition(".")
+            modes, expression = _operand_mode(mnemonic, args)
+            value = evaluate(k, expression, 0xFFFF) if expression else None
+
+            if size_hint == "W":
+                modes = tuple(m for m in modes if mode_sizes[m] == 2) or modes
+            elif value is not None and value > 0xFF:
+                modes = tuple(m for m in modes if mode_sizes[m] != 1) or modes
+
+            mode = next((m for m in modes if (mnemonic, m) in encodings), None)
+            if mode is None:
+                raise AssemblyError(k, f"{op} {args}".strip() + " is not a 6502 op")
+
+            data = [encodings[(mnemonic, mode)]]
+            if mode == "rel":
+                offset = value - (pc + 2)
+                if not unresolved and not -128 <= offset <= 127:
+                    raise AssemblyError(k, "branch out of range")
+                data.append(offset & 0xFF)
+            elif mode_sizes[mode] == 1:
+                data.append(value)
+            elif mode_sizes[mode] == 2:
+                data.extend((value, value >> 8))
+
+            emit(data)
+
+    return chunks, symbols, unresolved
@@ -0,0 +1,229 @@
+import json
+import os
+import traceback
+import typing
+import uuid
+from dataclasses import dataclass
+
+from PyQt5.QtCore import QRunnable, QThreadPool, QTimer, QObject, pyqtSignal
+
+from models import AnimationModel, Snapshot, from_mask
+from persistency import (
+    pack_scanline,
+    serialize_animation,
+    serialize_scanlines,
+)
+from widgets import WPlayfield
+
+journal_ext = ".journal"
+
+
+def _pack_row(snapshot: Snapshot, j: int) -> typing.List[int]:
+    mask, code, bg_code = snapshot[j]
+    return pack_scanline(
+        pixels=from_mask(mask), palette_code=code, bg_palette_code=bg_code
+    )
+
+
+class _Job(QRunnable):
+    def __init__(
+        self,
+        f: typing.Callable,
+        filename: str,
+        failed: typing.Callable[[str, str], None],
+        **kwargs,
+    ):
+        super().__init__()
+        self._f = f
+        self._filename = filename
+        self._failed = failed
+        self._kwargs = kwargs
+
+    def run(self):
+        try:
+            self._f(self._filename, **self._kwargs)
+        except Exception as e:
+            # a failed autosave must never take the editor down, but it is reported
+            traceback.print_exc()
+            self._failed(self._filename, str(e))
+
+
+@dataclass
+class _Journal:
+    filename: str
+    snapshot: typing.Optional[Snapshot] = None
+    deltas: int = 0
+
+
+def _write_full(
+    filename: str,
+    header: typing.Mapping,
+    snapshot: Snapshot,
+    animation: typing.Optional[AnimationModel],
+    version: str,
+):
+    data = serialize_scanlines(
+        name=header["name"],
+        mode=header["mode"],
+        color_system=header["color_system"],
+        scanlines=[_pack_row(snapshot, j) for j in range(len(snapshot))],
+        version=version,
+        line_height=header["line_height"],
+    )
+    data["filename"] = header["filename"]
+
+    if animation:
+        data.update(serialize_animation(animation))
+
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+    # a crash mid write must not leave a truncated journal behind
+    temp = filename + ".tmp"
+    with open(temp, "w") as file:
+        file.write(json.dumps(data) + "\n")
+    os.replace(temp, filename)
+
+
+def _write_delta(filename: str, snapshot: Snapshot, lines: typing.List[int]):
+    record = {"lines": {str(j): _pack_row(snapshot, j) for j in lines}}
+
+    with open(filename, "a") as file:
+        file.write(json.dumps(record) + "\n")
+
+
+def _remove(filename: str):
+    if os.path.exists(filename):
+        os.remove(filename)
+
+
+def read_journal(filename: str) -> typing.Mapping:
+    with open(filename) as file:
+        records = [json.loads(line) for line in file if line.strip()]
+
+    if not records:
+        raise ValueError(f"{filename} is empty")
+
+    data = records[0]
+
+    for record in records[1:]:
+        for j, line_data in record["lines"].items():
+            data["scanlines"][int(j)] = line_data
+
+    return data
+
+
+class AutosaveService(QObject):
+    full_every = 50
+
+    # journal filename, error, emitted from the worker thread
+    failed = pyqtSignal(str, str)
+
+    def __init__(
+        self,
+        *,
+        directory: str,
+        interval: int,
+        version: str,
+        playfields: typing.Callable[[], typing.Iterable[WPlayfield]],
+        parent: QObject = None,
+    ):
+        super().__init__(parent)
+        self._directory = directory
+        self._version = version
+        self._playfields = playfields
+        self._journals: typing.Dict[int, _Journal] = {}
+
+        # a single worker keeps writes to the same journal in order
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.tick)
+        self._timer.start(interval * 1000)
+
+    def journals(self) -> typing.List[str]:
+        if not os.path.isdir(self._directory):
+            return []
+
+        return sorted(
+            os.path.join(self._directory, f)
+            for f in os.listdir(self._directory)
+            if f.endswith(journal_ext)
+        )
+
+    def tick(self):
+        for pf in self._playfields():
+            if pf.model.need_save:
+                self.save(pf)
+
+    def save(self, pf: WPlayfield):
+        snapshot = pf.take_snapshot()
+        journal = self._journals.get(pf.__hash__())
+
+        if journal is None:
+            journal = _Journal(
+                filename=os.path.join(self._directory, uuid.uuid4().hex + journal_ext)
+            )
+            self._journals[pf.__hash__()] = journal
+
+        # deltas only cover the canvas, animations always get a full record
+        if (
+            journal.snapshot is None
+            or journal.deltas >= self.full_every
+            or pf.model.animation
+        ):
+            animation = None
+            if pf.model.animation:
+                live = pf.model.animation
+                live.set_frame_rows(live.frame.value, pf.capture_rows())
+                animation = AnimationModel(
+                    rows=list(live.rows), frames=[list(f) for f in live.frames]
+                )
+                animation.frame.value = live.frame.value
+
+            header = {
+                "name": pf.model.name,
+                "mode": pf.model.mode,
+                "color_system": pf.model.color_system,
+                "line_height": pf.model.line_height,
+                "filename": pf.model.filename,
+            }
+            self._submit(
+                _write_full,
+                journal.filename,
+                header=header,
+                snapshot=snapshot,
+                animation=animation,
+                version=self._version,
+            )
+            journal.deltas = 0
+        else:
+            lines = journal.snapshot.diff(snapshot)
+            if not lines:
+                return
+
+            self._submit(_write_delta, journal.filename, snapshot=snapshot, lines=lines)
+            journal.deltas += 1
+
+        journal.snapshot = snapshot
+
+    def discard(self, pf: WPlayfield):
+        journal = self._journals.pop(pf.__hash__(), None)
+        if journal:
+            self._submit(_remove, journal.filename)
+
+    def remove(self, filename: str):
+        self._submit(_remove, filename)
+
+    def shutdown(self, discard: bool):
+        self._timer.stop()
+
+        if discard:
+            for journal in self._journals.values():
+                self._submit(_remove, journal.filename)
+            self._journals.clear()
+
+        self._pool.waitForDone()
+
+    def _submit(self, f: typing.Callable, filename: str, **kwargs):
+        self._pool.start(_Job(f, filename, self.failed.emit, **kwargs))
@@ -0,0 +1,144 @@
+import struct
+import typing
+
+from PyQt5 import QtGui
+from PyQt5.QtCore import QByteArray, QMimeData
+
+from models import PixelModel, Row, mask_runs
+from widgets import WPlayfield
+
+mime_type = "application/x-pppp-region"
+
+region_magic = b"PPRG"
+region_version = 1
+
+# magic, version, top, height, left, width
+_header = struct.Struct("<4sBHHBB")
+# pixels mask relative to left, COLUPF, COLUBK
+_row = struct.Struct("<5sBB")
+
+
+class Region(typing.NamedTuple):
+    top: int
+    left: int
+    width: int
+    rows: typing.Tuple[Row, ...]
+
+
+def region_from_selection(pf: WPlayfield) -> typing.Optional[Region]:
+    bounds = pf.model.selection.bounds
+    if bounds is None:
+        return None
+
+    top, _, bottom, _ = bounds
+    neighbor_mask = pf.model.neighbor_mask
+    rows = []
+    combined = 0
+
+    for y in range(top, bottom + 1):
+        selected, floating = pf.model.selection.get(y)
+        # the pixels derived from the selected ones are shown selected too
+        selected |= neighbor_mask(selected)
+        floating |= neighbor_mask(floating)
+        combined |= selected | floating
+
+        mask, code, bg_code = pf.capture_row(y)
+        rows.append(((mask | floating) & selected, code, bg_code))
+
+    left = (combined & -combined).bit_length() - 1
+    right = combined.bit_length() - 1
+    return Region(
+        top=top,
+        left=left,
+        width=right - left + 1,
+        rows=tuple((mask >> left, code, bg_code) for mask, code, bg_code in rows),
+    )
+
+
+def encode_region(region: Region) -> bytes:
+    data = bytearray(
+        _header.pack(
+            region_magic,
+            region_version,
+            region.top,
+            len(region.rows),
+            region.left,
+            region.width,
+        )
+    )
+
+    for mask, code, bg_code in region.rows:
+        data += _row.pack(mask.to_bytes(5, "little"), code, bg_code)
+
+    return bytes(data)
+
+
+def decode_region(data: bytes) -> Region:
+    if len(data) < _header.size:
+        raise ValueError("Clipboard region is truncated")
+
+    magic, version, top, height, left, width = _header.unpack_from(data)
+
+    if magic != region_magic or version != region_version:
+        raise ValueError("Unsupported clipboard region")
+
+    if len(data) < _header.size + height * _row.size:
+        raise ValueError("Clipboard region is truncated")
+
+    rows = []
+    for k in range(height):
+        mask, code, bg_code = _row.unpack_from(data, _header.size + k * _row.size)
+        rows.append((int.from_bytes(mask, "little"), code, bg_code))
+
+    return Region(top=top, left=left, width=width, rows=tuple(rows))
+
+
+def region_image(
+    region: Region, color_mapping: typing.Mapping[int, str]
+) -> QtGui.QImage:
+    width = PixelModel.default_width
+    height = PixelModel.default_height
+
+    image = QtGui.QImage(
+        max(1, region.width * width),
+        max(1, len(region.rows) * height),
+        QtGui.QImage.Format_RGB32,
+    )
+
+    painter = QtGui.QPainter(image)
+
+    for j, (mask, code, bg_code) in enumerate(region.rows):
+        top = j * height
+        painter.fillRect(
+            0,
+            top,
+            image.width(),
+            height,
+            QtGui.QColor(f"#{color_mapping[bg_code]}"),
+        )
+
+        color = QtGui.QColor(f"#{color_mapping[code]}")
+        for start, end in mask_runs(mask):
+            painter.fillRect(start * width, top, (end - start) * width, height, color)
+
+    painter.end()
+    return image
+
+
+def region_mime_data(
+    region: Region, color_mapping: typing.Mapping[int, str]
+) -> QMimeData:
+    mime = QMimeData()
+    mime.setData(mime_type, QByteArray(encode_region(region)))
+
+    # other applications get a picture of the region
+    mime.setImageData(region_image(region, color_mapping))
+
+    return mime
+
+
+def region_from_mime_data(mime: QMimeData) -> typing.Optional[Region]:
+    if mime is None or not mime.hasFormat(mime_type):
+        return None
+
+    return decode_region(bytes(mime.data(mime_type)))
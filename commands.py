@@ -4,7 +4,7 @@ import typing
 from collections import defaultdict
 from dataclasses import dataclass, field
 
-from models import ScanlineModel, Command
+from models import Command, Snapshot, Row, ColorSystem
 from widgets import WPlayfield
 
 
@@ -35,34 +35,32 @@ class CommandsGroup(Command):
 
 @dataclass
 class UpdateLinePaletteCode(Command):
-    model: ScanlineModel
+    pf: WPlayfield
+    y: int
     code: int
 
     def execute(self) -> typing.Optional[Command]:
-        if self.model.palette_code.value == self.code:
+        mask, code, bg_code = self.pf.capture_row(self.y)
+        if code == self.code:
             return None
 
-        invert = UpdateLinePaletteCode(
-            model=self.model, code=self.model.palette_code.value
-        )
-        self.model.palette_code.value = self.code
-        return invert
+        self.pf.set_rows({self.y: (mask, self.code, bg_code)})
+        return UpdateLinePaletteCode(pf=self.pf, y=self.y, code=code)
 
 
 @dataclass
 class UpdateLineBackgroundPaletteCode(Command):
-    model: ScanlineModel
+    pf: WPlayfield
+    y: int
     code: int
 
     def execute(self) -> typing.Optional[Command]:
-        if self.model.bg_palette_code.value == self.code:
+        mask, code, bg_code = self.pf.capture_row(self.y)
+        if bg_code == self.code:
             return None
 
-        invert = UpdateLineBackgroundPaletteCode(
-            model=self.model, code=self.model.bg_palette_code.value
-        )
-        self.model.bg_palette_code.value = self.code
-        return invert
+        self.pf.set_rows({self.y: (mask, code, self.code)})
+        return UpdateLineBackgroundPaletteCode(pf=self.pf, y=self.y, code=bg_code)
 
 
 @dataclass
@@ -156,22 +154,143 @@ class UpdatePixel(Command):
         ).execute()
 
 
+@dataclass
+class SetRows(Command):
+    pf: WPlayfield
+    rows: typing.Mapping[int, Row]
+
+    def execute(self) -> typing.Optional[Command]:
+        # the inverse only keeps the rows that actually changed
+        invert_rows = {}
+
+        for j, row in self.rows.items():
+            current = self.pf.capture_row(j)
+            if current != row:
+                invert_rows[j] = current
+
+        if len(invert_rows) == 0:
+            return None
+
+        self.pf.set_rows({j: self.rows[j] for j in invert_rows})
+        return SetRows(pf=self.pf, rows=invert_rows)
+
+
 @dataclass
 class ClearPixels(Command):
     pf: WPlayfield
     code: int
 
     def execute(self) -> typing.Optional[Command]:
+        return SetRows(
+            pf=self.pf,
+            rows={
+                j: (0, code, self.code)
+                for j, (_, code, __) in enumerate(self.pf.capture_rows())
+            },
+        ).execute()
 
-        updates = []
 
-        for j, line in enumerate(self.pf.scanlines):
-            for i, _ in enumerate(line.pixels):
-                updates.append(
-                    UpdatePixels.Update(x=i, y=j, status=False, code=self.code)
-                )
+@dataclass
+class FillRegion(Command):
+    pf: WPlayfield
+    start: int
+    end: int
+    mask: int
+    code: int
+
+    def execute(self) -> typing.Optional[Command]:
+        rows = {}
+
+        for j in range(self.start, self.end):
+            mask, _, bg_code = self.pf.capture_row(j)
+            rows[j] = (mask | self.mask, self.code, bg_code)
+
+        return SetRows(pf=self.pf, rows=rows).execute()
+
+
+@dataclass
+class UpdateRowMasks(Command):
+    pf: WPlayfield
+    masks: typing.Mapping[int, int]
+    status: bool
+    code: int
+
+    def execute(self) -> typing.Optional[Command]:
+        rows = {}
+
+        for j, mask in self.masks.items():
+            current, code, bg_code = self.pf.capture_row(j)
+            # the derived half follows the pixels it mirrors
+            mask |= self.pf.model.neighbor_mask(mask)
+
+            if self.status:
+                rows[j] = (current | mask, self.code, bg_code)
+            else:
+                rows[j] = (current & ~mask, code, self.code)
+
+        return SetRows(pf=self.pf, rows=rows).execute()
+
+
+@dataclass
+class SetBackgroundRange(Command):
+    pf: WPlayfield
+    start: int
+    end: int
+    code: int
+
+    def execute(self) -> typing.Optional[Command]:
+        rows = {}
+
+        for j in range(self.start, self.end):
+            mask, code, _ = self.pf.capture_row(j)
+            rows[j] = (mask, code, self.code)
+
+        return SetRows(pf=self.pf, rows=rows).execute()
+
 
-        if len(updates) == 0:
+@dataclass
+class SetColorSystem(Command):
+    pf: WPlayfield
+    color_system: ColorSystem
+    rows: typing.List[Row]
+    animation_rows: typing.Optional[typing.List[Row]] = None
+    # the drawing colors, converted along with the lines
+    palette_code: typing.Optional[int] = None
+    bg_palette_code: typing.Optional[int] = None
+
+    def execute(self) -> typing.Optional[Command]:
+        animation = self.pf.model.animation
+        invert = SetColorSystem(
+            pf=self.pf,
+            color_system=self.pf.model.color_system,
+            rows=self.pf.capture_rows(),
+            animation_rows=list(animation.rows) if animation else None,
+            palette_code=self.pf.model.palette_code.value,
+            bg_palette_code=self.pf.model.bg_palette_code.value,
+        )
+
+        self.pf.set_color_system(self.color_system)
+        self.pf.show_rows(self.rows)
+        if animation and self.animation_rows is not None:
+            animation.replace_rows(self.animation_rows)
+
+        if self.palette_code is not None:
+            self.pf.model.palette_code.value = self.palette_code
+        if self.bg_palette_code is not None:
+            self.pf.model.bg_palette_code.value = self.bg_palette_code
+
+        return invert
+
+
+@dataclass
+class RestoreSnapshot(Command):
+    pf: WPlayfield
+    snapshot: Snapshot
+
+    def execute(self) -> typing.Optional[Command]:
+        current = self.pf.take_snapshot()
+        if not current.diff(self.snapshot):
             return None
 
-        return UpdatePixels(pf=self.pf, updates=updates).execute()
+        self.pf.restore_snapshot(self.snapshot)
+        return RestoreSnapshot(pf=self.pf, snapshot=current)
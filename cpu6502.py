@@ -0,0 +1,572 @@
+import typing
+
+C = 0x01
+Z = 0x02
+I = 0x04
+D = 0x08
+B = 0x10
+U = 0x20
+V = 0x40
+N = 0x80
+
+# mnemonic: {mode: (opcode, cycles)}, reads marked * pay a cycle on page crossing
+_spec = """
+ADC imm 69 2, zp 65 3, zpx 75 4, abs 6D 4, abx 7D 4*, aby 79 4*, izx 61 6, izy 71 5*
+AND imm 29 2, zp 25 3, zpx 35 4, abs 2D 4, abx 3D 4*, aby 39 4*, izx 21 6, izy 31 5*
+ASL acc 0A 2, zp 06 5, zpx 16 6, abs 0E 6, abx 1E 7
+BCC rel 90 2
+BCS rel B0 2
+BEQ rel F0 2
+BIT zp 24 3, abs 2C 4
+BMI rel 30 2
+BNE rel D0 2
+BPL rel 10 2
+BRK imp 00 7
+BVC rel 50 2
+BVS rel 70 2
+CLC imp 18 2
+CLD imp D8 2
+CLI imp 58 2
+CLV imp B8 2
+CMP imm C9 2, zp C5 3, zpx D5 4, abs CD 4, abx DD 4*, aby D9 4*, izx C1 6, izy D1 5*
+CPX imm E0 2, zp E4 3, abs EC 4
+CPY imm C0 2, zp C4 3, abs CC 4
+DEC zp C6 5, zpx D6 6, abs CE 6, abx DE 7
+DEX imp CA 2
+DEY imp 88 2
+EOR imm 49 2, zp 45 3, zpx 55 4, abs 4D 4, abx 5D 4*, aby 59 4*, izx 41 6, izy 51 5*
+INC zp E6 5, zpx F6 6, abs EE 6, abx FE 7
+INX imp E8 2
+INY imp C8 2
+JMP abs 4C 3, ind 6C 5
+JSR abs 20 6
+LDA imm A9 2, zp A5 3, zpx B5 4, abs AD 4, abx BD 4*, aby B9 4*, izx A1 6, izy B1 5*
+LDX imm A2 2, zp A6 3, zpy B6 4, abs AE 4, aby BE 4*
+LDY imm A0 2, zp A4 3, zpx B4 4, abs AC 4, abx BC 4*
+LSR acc 4A 2, zp 46 5, zpx 56 6, abs 4E 6, abx 5E 7
+NOP imp EA 2
+ORA imm 09 2, zp 05 3, zpx 15 4, abs 0D 4, abx 1D 4*, aby 19 4*, izx 01 6, izy 11 5*
+PHA imp 48 3
+PHP imp 08 3
+PLA imp 68 4
+PLP imp 28 4
+ROL acc 2A 2, zp 26 5, zpx 36 6, abs 2E 6, abx 3E 7
+ROR acc 6A 2, zp 66 5, zpx 76 6, abs 6E 6, abx 7E 7
+RTI imp 40 6
+RTS imp 60 6
+SBC imm E9 2, zp E5 3, zpx F5 4, abs ED 4, abx FD 4*, aby F9 4*, izx E1 6, izy F1 5*
+SEC imp 38 2
+SED imp F8 2
+SEI imp 78 2
+STA zp 85 3, zpx 95 4, abs 8D 4, abx 9D 5, aby 99 5, izx 81 6, izy 91 6
+STX zp 86 3, zpy 96 4, abs 8E 4
+STY zp 84 3, zpx 94 4, abs 8C 4
+TAX imp AA 2
+TAY imp A8 2
+TSX imp BA 2
+TXA imp 8A 2
+TXS imp 9A 2
+TYA imp 98 2
+"""
+
+# operand bytes per addressing mode
+mode_sizes = {
+    "imp": 0,
+    "acc": 0,
+    "imm": 1,
+    "zp": 1,
+    "zpx": 1,
+    "zpy": 1,
+    "rel": 1,
+    "izx": 1,
+    "izy": 1,
+    "abs": 2,
+    "abx": 2,
+    "aby": 2,
+    "ind": 2,
+}
+
+
+class Opcode(typing.NamedTuple):
+    mnemonic: str
+    mode: str
+    cycles: int
+    page_penalty: bool
+
+
+def _parse_spec() -> typing.Dict[int, Opcode]:
+    table = {}
+
+    for line in _spec.strip().splitlines():
+        mnemonic, rest = line.split(" ", 1)
+        for entry in rest.split(","):
+            mode, code, cycles = entry.split()
+            table[int(code, 16)] = Opcode(
+                mnemonic=mnemonic,
+                mode=mode,
+                cycles=int(cycles.rstrip("*")),
+                page_penalty=cycles.endswith("*"),
+            )
+
+    return table
+
+
+opcodes = _parse_spec()
+
+# (mnemonic, mode) -> opcode, for assemblers
+encodings = {(op.mnemonic, op.mode): code for code, op in opcodes.items()}
+
+
+class Bus(typing.Protocol):
+    def read(self, address: int) -> int: ...
+
+    def write(self, address: int, value: int, cycle: int): ...
+
+
+class CPU:
+    """NMOS 6502 core with a dispatch table built once per instance.
+
+    ``cycles`` counts elapsed CPU cycles; writes tell the bus the cycle they land on
+    so that chips clocked by the CPU can catch up precisely.
+    """
+
+    def __init__(self, bus: Bus):
+        self.bus = bus
+        self.a = 0
+        self.x = 0
+        self.y = 0
+        self.sp = 0xFD
+        self.p = I | U
+        self.pc = 0
+        self.cycles = 0
+        self._extra = 0
+        self._write_cycle = 0
+        self._dispatch = self._build_dispatch()
+
+    def reset(self):
+        self.sp = 0xFD
+        self.p = I | U
+        self.pc = self.read_word(0xFFFC)
+
+    def read_word(self, address: int) -> int:
+        return self.bus.read(address) | (self.bus.read((address + 1) & 0xFFFF) << 8)
+
+    def step(self) -> int:
+        """Executes one instruction and returns the cycles it took."""
+        opcode = self.bus.read(self.pc)
+        self.pc = (self.pc + 1) & 0xFFFF
+        entry = self._dispatch[opcode]
+
+        if entry is None:
+            raise ValueError(f"Illegal opcode ${opcode:02X} at ${self.pc - 1:04X}")
+
+        f, cycles = entry
+        self._extra = 0
+        # stores land on the last cycle of the instruction
+        self._write_cycle = self.cycles + cycles - 1
+        f()
+
+        cycles += self._extra
+        self.cycles += cycles
+        return cycles
+
+    # flags
+
+    def _nz(self, value: int) -> int:
+        self.p = (self.p & ~(N | Z)) | (value & N) | (0 if value else Z)
+        return value
+
+    def _flag(self, flag: int, on: bool):
+        self.p = (self.p | flag) if on else (self.p & ~flag)
+
+    # stack
+
+    def _push(self, value: int):
+        self.bus.write(0x100 | self.sp, value, self._write_cycle)
+        self.sp = (self.sp - 1) & 0xFF
+
+    def _pull(self) -> int:
+        self.sp = (self.sp + 1) & 0xFF
+        return self.bus.read(0x100 | self.sp)
+
+    # addressing modes, each returns the effective address
+
+    def _fetch(self) -> int:
+        value = self.bus.read(self.pc)
+        self.pc = (self.pc + 1) & 0xFFFF
+        return value
+
+    def _fetch_word(self) -> int:
+        lo = self._fetch()
+        return lo | (self._fetch() << 8)
+
+    def _indexed(self, base: int, index: int, penalty: bool) -> int:
+        address = (base + index) & 0xFFFF
+        if penalty and (base & 0xFF00) != (address & 0xFF00):
+            self._extra += 1
+        return address
+
+    def _address_mode(self, mode: str, penalty: bool) -> typing.Callable[[], int]:
+        read = self.bus.read
+
+        if mode == "imm":
+
+            def address() -> int:
+                pc = self.pc
+                self.pc = (pc + 1) & 0xFFFF
+                return pc
+
+        elif mode == "zp":
+            address = self._fetch
+        elif mode == "zpx":
+
+            def address() -> int:
+                return (self._fetch() + self.x) & 0xFF
+
+        elif mode == "zpy":
+
+            def address() -> int:
+                return (self._fetch() + self.y) & 0xFF
+
+        elif mode == "abs":
+            address = self._fetch_word
+        elif mode == "abx":
+
+            def address() -> int:
+                return self._indexed(self._fetch_word(), self.x, penalty)
+
+        elif mode == "aby":
+
+            def address() -> int:
+                return self._indexed(self._fetch_word(), self.y, penalty)
+
+        elif mode == "ind":
+
+            def address() -> int:
+                pointer = self._fetch_word()
+                # the NMOS part never carries into the high byte of the pointer
+                hi = (pointer & 0xFF00) | ((pointer + 1) & 0xFF)
+                return read(pointer) | (read(hi) << 8)
+
+        elif mode == "izx":
+
+            def address() -> int:
+                zp = (self._fetch() + self.x) & 0xFF
+                return read(zp) | (read((zp + 1) & 0xFF) << 8)
+
+        elif mode == "izy":
+
+            def address() -> int:
+                zp = self._fetch()
+                base = read(zp) | (read((zp + 1) & 0xFF) << 8)
+                return self._indexed(base, self.y, penalty)
+
+        else:
+            raise ValueError(f"Unknown addressing mode {mode}")
+
+        return address
+
+    def _build_dispatch(
+        self,
+    ) -> typing.List[typing.Optional[typing.Tuple[typing.Callable[[], None], int]]]:
+        dispatch = [None] * 0x100
+
+        for code, op in opcodes.items():
+            dispatch[code] = (self._compile(op), op.cycles)
+
+        return dispatch
+
+    def _compile(self, op: Opcode) -> typing.Callable[[], None]:
+        read = self.bus.read
+        write = self.bus.write
+        name = op.mnemonic
+
+        if op.mode == "rel":
+            flag, expected = {
+                "BCC": (C, False),
+                "BCS": (C, True),
+                "BNE": (Z, False),
+                "BEQ": (Z, True),
+                "BPL": (N, False),
+                "BMI": (N, True),
+                "BVC": (V, False),
+                "BVS": (V, True),
+            }[name]
+
+            def branch():
+                offset = self._fetch()
+                if bool(self.p & flag) == expected:
+                    target = (
+                        self.pc + offset - (0x100 if offset & 0x80 else 0)
+                    ) & 0xFFFF
+                    self._extra += 2 if (target & 0xFF00) != (self.pc & 0xFF00) else 1
+                    self.pc = target
+
+            return branch
+
+        if op.mode in ("imp", "acc"):
+            return self._implied(name)
+
+        address = self._address_mode(op.mode, op.page_penalty)
+
+        def store(value: int):
+            return lambda: write(address(), value(), self._write_cycle)
+
+        if name == "STA":
+            return store(lambda: self.a)
+        if name == "STX":
+            return store(lambda: self.x)
+        if name == "STY":
+            return store(lambda: self.y)
+
+        if name == "JMP":
+
+            def jmp():
+                self.pc = address()
+
+            return jmp
+
+        if name == "JSR":
+
+            def jsr():
+                target = address()
+                ret = (self.pc - 1) & 0xFFFF
+                self._push(ret >> 8)
+                self._push(ret & 0xFF)
+                self.pc = target
+
+            return jsr
+
+        if name in ("ASL", "LSR", "ROL", "ROR", "INC", "DEC"):
+            shift = self._shift(name)
+
+            def modify():
+                a = address()
+                write(a, shift(read(a)), self._write_cycle)
+
+            return modify
+
+        operation = self._read_operation(name)
+
+        def run():
+            operation(read(address()))
+
+        return run
+
+    def _shift(self, name: str) -> typing.Callable[[int], int]:
+        def asl(v: int) -> int:
+            self._flag(C, v & 0x80)
+            return self._nz((v << 1) & 0xFF)
+
+        def lsr(v: int) -> int:
+            self._flag(C, v & 0x01)
+            return self._nz(v >> 1)
+
+        def rol(v: int) -> int:
+            carry = self.p & C
+            self._flag(C, v & 0x80)
+            return self._nz(((v << 1) | carry) & 0xFF)
+
+        def ror(v: int) -> int:
+            carry = self.p & C
+            self._flag(C, v & 0x01)
+            return self._nz((v >> 1) | (carry << 7))
+
+        def inc(v: int) -> int:
+            return self._nz((v + 1) & 0xFF)
+
+        def dec(v: int) -> int:
+            return self._nz((v - 1) & 0xFF)
+
+        return {
+            "ASL": asl,
+            "LSR": lsr,
+            "ROL": rol,
+            "ROR": ror,
+            "INC": inc,
+            "DEC": dec,
+        }[name]
+
+    def _adc(self, v: int):
+        carry = self.p & C
+
+        if self.p & D:
+            lo = (self.a & 0x0F) + (v & 0x0F) + carry
+            hi = (self.a >> 4) + (v >> 4)
+            if lo > 9:
+                lo += 6
+                hi += 1
+            binary = (self.a + v + carry) & 0xFF
+            self._flag(Z, binary == 0)
+            self._flag(N, hi & 0x08)
+            self._flag(V, ~(self.a ^ v) & (self.a ^ (hi << 4)) & 0x80)
+            if hi > 9:
+                hi += 6
+            self._flag(C, hi > 15)
+            self.a = ((hi << 4) | (lo & 0x0F)) & 0xFF
+            return
+
+        total = self.a + v + carry
+        self._flag(C, total > 0xFF)
+        self._flag(V, ~(self.a ^ v) & (self.a ^ total) & 0x80)
+        self.a = self._nz(total & 0xFF)
+
+    def _sbc(self, v: int):
+        if self.p & D:
+            borrow = 1 - (self.p & C)
+            total = self.a - v - borrow
+            lo = (self.a & 0x0F) - (v & 0x0F) - borrow
+            hi = (self.a >> 4) - (v >> 4)
+            if lo < 0:
+                lo -= 6
+                hi -= 1
+            if hi < 0:
+                hi -= 6
+            self._flag(C, total >= 0)
+            self._flag(V, (self.a ^ v) & (self.a ^ total) & 0x80)
+            self._nz(total & 0xFF)
+            self.a = ((hi << 4) | (lo & 0x0F)) & 0xFF
+            return
+
+        self._adc(v ^ 0xFF)
+
+    def _compare(self, register: int, v: int):
+        self._flag(C, register >= v)
+        self._nz((register - v) & 0xFF)
+
+    def _read_operation(self, name: str) -> typing.Callable[[int], None]:
+        def lda(v: int):
+            self.a = self._nz(v)
+
+        def ldx(v: int):
+            self.x = self._nz(v)
+
+        def ldy(v: int):
+            self.y = self._nz(v)
+
+        def and_(v: int):
+            self.a = self._nz(self.a & v)
+
+        def ora(v: int):
+            self.a = self._nz(self.a | v)
+
+        def eor(v: int):
+            self.a = self._nz(self.a ^ v)
+
+        def bit(v: int):
+            self.p = (self.p & ~(N | V | Z)) | (v & (N | V)) | (0 if self.a & v else Z)
+
+        return {
+            "LDA": lda,
+            "LDX": ldx,
+            "LDY": ldy,
+            "AND": and_,
+            "ORA": ora,
+            "EOR": eor,
+            "BIT": bit,
+            "ADC": self._adc,
+            "SBC": self._sbc,
+            "CMP": lambda v: self._compare(self.a, v),
+            "CPX": lambda v: self._compare(self.x, v),
+            "CPY": lambda v: self._compare(self.y, v),
+        }[name]
+
+    def _implied(self, name: str) -> typing.Callable[[], None]:
+        def accumulator(shift: typing.Callable[[int], int]) -> typing.Callable:
+            def run():
+                self.a = shift(self.a)
+
+            return run
+
+        if name in ("ASL", "LSR", "ROL", "ROR"):
+            return accumulator(self._shift(name))
+
+        def tax():
+            self.x = self._nz(self.a)
+
+        def tay():
+            self.y = self._nz(self.a)
+
+        def txa():
+            self.a = self._nz(self.x)
+
+        def tya():
+            self.a = self._nz(self.y)
+
+        def tsx():
+            self.x = self._nz(self.sp)
+
+        def txs():
+            self.sp = self.x
+
+        def inx():
+            self.x = self._nz((self.x + 1) & 0xFF)
+
+        def iny():
+            self.y = self._nz((self.y + 1) & 0xFF)
+
+        def dex():
+            self.x = self._nz((self.x - 1) & 0xFF)
+
+        def dey():
+            self.y = self._nz((self.y - 1) & 0xFF)
+
+        def pha():
+            self._push(self.a)
+
+        def php():
+            self._push(self.p | B | U)
+
+        def pla():
+            self.a = self._nz(self._pull())
+
+        def plp():
+            self.p = (self._pull() & ~B) | U
+
+        def rts():
+            lo = self._pull()
+            self.pc = ((lo | (self._pull() << 8)) + 1) & 0xFFFF
+
+        def rti():
+            plp()
+            lo = self._pull()
+            self.pc = lo | (self._pull() << 8)
+
+        def brk():
+            ret = (self.pc + 1) & 0xFFFF
+            self._push(ret >> 8)
+            self._push(ret & 0xFF)
+            self._push(self.p | B | U)
+            self.p |= I
+            self.pc = self.read_word(0xFFFE)
+
+        def flag(f: int, on: bool) -> typing.Callable:
+            return lambda: self._flag(f, on)
+
+        return {
+            "TAX": tax,
+            "TAY": tay,
+            "TXA": txa,
+            "TYA": tya,
+            "TSX": tsx,
+            "TXS": txs,
+            "INX": inx,
+            "INY": iny,
+            "DEX": dex,
+            "DEY": dey,
+            "PHA": pha,
+            "PHP": php,
+            "PLA": pla,
+            "PLP": plp,
+            "RTS": rts,
+            "RTI": rti,
+            "BRK": brk,
+            "NOP": lambda: None,
+            "CLC": flag(C, False),
+            "SEC": flag(C, True),
+            "CLD": flag(D, False),
+            "SED": flag(D, True),
+            "CLI": flag(I, False),
+            "SEI": flag(I, True),
+            "CLV": flag(V, False),
+        }[name]
@@ -0,0 +1,306 @@
+import argparse
+import sys
+import typing
+from dataclasses import dataclass, field
+
+from models import PlayfieldMode, Row, registers
+
+line_budget = 76
+page_size = 0x100
+
+# the separate per-register tables of the registers export
+registers_layout = "REGISTERS"
+
+_left = ("PF0", "PF1", "PF2")
+_right = ("PF0R", "PF1R", "PF2R")
+_colors = ("COLUPF", "COLUBK")
+
+# (cycles, bytes) of the 6502 instructions a kernel is built from
+_wsync = (3, 2)  # STA WSYNC
+_loop = (5, 3)  # DEX, BNE
+_load_indexed = (4, 3)  # LDA abs,Y
+_load_indirect = (5, 2)  # LDA (zp),Y
+_load_immediate = (2, 2)  # LDA #
+_store = (3, 2)  # STA zp
+_step = (2, 1)  # INY
+_advance = (8, 5)  # TYA, CLC, ADC #, TAY
+_pointer_advance = (13, 10)  # LDA zp, CLC, ADC #, STA zp, BCC, INC zp
+_unpack_nibbles = (23, 15)  # ASL x4, STA tmp, LDA abs,Y, AND #, ORA tmp, STA COLUxx
+
+
+@dataclass
+class Field:
+    register: str
+    offset: int
+    step: int = 1
+    packed: typing.Optional[str] = None
+
+
+@dataclass
+class Analysis:
+    layout: str
+    supported: bool
+    cycles: int = 0
+    worst_line: int = 0
+    average_cycles: float = 0.0
+    page_crossings: int = 0
+    rom_bytes: int = 0
+    constant: typing.List[str] = field(default_factory=lambda: [])
+    reason: str = ""
+
+    @property
+    def fits(self) -> bool:
+        return self.supported and self.cycles <= line_budget
+
+
+def parse_layout(layout: str) -> typing.List[Field]:
+    """Row fields of an interleaved layout name such as PF0_COLUPF_PF1_PF2_PF0_COLUPF_PF1_PF2."""
+    tokens = layout.split("_")
+    fields = []
+    seen = set()
+
+    k = 0
+    while k < len(tokens):
+        register = tokens[k]
+        if register in _left and register in seen:
+            register = _right[_left.index(register)]
+        seen.add(tokens[k])
+
+        packed = None
+        # a color right after PF0 lives in the unused low nibbles of both PF0 bytes
+        if tokens[k] == "PF0" and k + 1 < len(tokens) and tokens[k + 1] in _colors:
+            packed = tokens[k + 1]
+            k += 1
+
+        fields.append(Field(register=register, offset=len(fields), packed=packed))
+        k += 1
+
+    return fields
+
+
+def line_values(rows: typing.Sequence[Row]) -> typing.Dict[str, typing.List[int]]:
+    values = {register: [] for register in _left + _right + _colors}
+
+    for mask, code, bg_code in rows:
+        for register, value in zip(_left + _right, registers(mask)):
+            values[register].append(value)
+        values["COLUPF"].append(code)
+        values["COLUBK"].append(bg_code)
+
+    return values
+
+
+def _required(
+    values: typing.Mapping[str, typing.List[int]], mode: PlayfieldMode
+) -> typing.Tuple[typing.List[str], typing.List[str]]:
+    """Registers written every line and registers that can be set once before the kernel."""
+    dynamic = []
+    constant = []
+
+    for register in _left + _colors:
+        (dynamic if len(set(values[register])) > 1 else constant).append(register)
+
+    if mode == PlayfieldMode.Asymmetric:
+        for left, right in zip(_left, _right):
+            # identical halves need no mid line rewrite
+            if values[left] != values[right]:
+                dynamic.append(right)
+
+    return dynamic, constant
+
+
+def register_tables(mode: PlayfieldMode, count: int) -> typing.List[Field]:
+    """Fields of the registers export, PF tables interleave both halves when asymmetric."""
+    halves = 2 if mode == PlayfieldMode.Asymmetric else 1
+    fields = []
+
+    for k, register in enumerate(_left):
+        fields.append(Field(register=register, offset=k * halves * count, step=halves))
+        if halves == 2:
+            fields.append(
+                Field(register=_right[k], offset=k * halves * count + 1, step=halves)
+            )
+
+    for k, register in enumerate(_colors):
+        fields.append(Field(register=register, offset=(3 * halves + k) * count))
+
+    return fields
+
+
+def _crosses(address: int, index: int) -> bool:
+    return (address % page_size) + index >= page_size
+
+
+def analyze(
+    rows: typing.Sequence[Row],
+    mode: PlayfieldMode,
+    layout: str,
+    base: int = 0,
+) -> Analysis:
+    """Cycle and ROM cost of the minimal kernel for rows stored in the given layout.
+
+    Registers that never change are set once before the kernel, halves that match
+    are written once per line and a packed color costs the nibble unpacking.
+    """
+    values = line_values(rows)
+    dynamic, constant = _required(values, mode)
+    count = len(rows)
+
+    if layout == registers_layout:
+        fields = register_tables(mode, count)
+    else:
+        fields = parse_layout(layout)
+        for f in fields:
+            f.step = len(fields)
+
+    available = {f.register for f in fields} | {f.packed for f in fields if f.packed}
+    missing = [r for r in dynamic if r not in available]
+    if missing:
+        return Analysis(
+            layout=layout, supported=False, reason=f"no data for {', '.join(missing)}"
+        )
+
+    data_bytes = max((f.offset + count * f.step for f in fields), default=0) - min(
+        (f.offset for f in fields), default=0
+    )
+
+    # Y only reaches a page, larger interleaved tables walk a zero page pointer
+    indirect = any(
+        (count - 1) * f.step + f.offset % f.step >= page_size for f in fields
+    )
+    if indirect and layout == registers_layout:
+        return Analysis(
+            layout=layout, supported=False, reason="tables longer than a page"
+        )
+
+    load = _load_indirect if indirect else _load_indexed
+    loads: typing.List[Field] = []
+    cycles = _wsync[0] + _loop[0]
+    code_bytes = _wsync[1] + _loop[1]
+
+    def add(cost: typing.Tuple[int, int]):
+        nonlocal cycles, code_bytes
+        cycles += cost[0]
+        code_bytes += cost[1]
+
+    for f in fields:
+        if f.register in dynamic:
+            loads.append(f)
+            add(load)
+            add(_store)
+
+        # both PF0 bytes carry a nibble, the color is unpacked once
+        if f.packed in dynamic and f.register == "PF0":
+            if f.register not in dynamic:
+                loads.append(f)
+                add(load)
+            # the low nibble comes from the right half PF0 byte
+            loads.append(next(g for g in fields if g.register == "PF0R"))
+            add(_unpack_nibbles)
+
+    if indirect:
+        add(_pointer_advance)
+    else:
+        # one index register per distinct table step
+        for step in sorted({f.step for f in loads}):
+            add(min((_step[0] * step, _step[1] * step), _advance))
+
+    for _ in constant:
+        add(_load_immediate)
+        add(_store)
+
+    crossings = []
+    for j in range(count):
+        if indirect:
+            # the pointer moves, Y only selects the field
+            crossings.append(
+                sum(_crosses(base + j * f.step, f.offset % f.step) for f in loads)
+            )
+        else:
+            crossings.append(sum(_crosses(base + f.offset, j * f.step) for f in loads))
+
+    if not count:
+        return Analysis(
+            layout=layout,
+            supported=True,
+            cycles=cycles,
+            average_cycles=cycles,
+            rom_bytes=code_bytes,
+            constant=constant,
+        )
+
+    worst_line = max(range(count), key=lambda j: crossings[j])
+
+    return Analysis(
+        layout=layout,
+        supported=True,
+        cycles=cycles + crossings[worst_line],
+        worst_line=worst_line,
+        average_cycles=cycles + sum(crossings) / count,
+        page_crossings=sum(crossings),
+        rom_bytes=data_bytes + code_bytes,
+        constant=constant,
+    )
+
+
+def rank_layouts(
+    rows: typing.Sequence[Row],
+    mode: PlayfieldMode,
+    layouts: typing.Iterable[str],
+    base: int = 0,
+) -> typing.List[Analysis]:
+    analyses = [analyze(rows, mode, layout, base=base) for layout in layouts]
+
+    return sorted(
+        analyses,
+        key=lambda a: (not a.supported, not a.fits, a.rom_bytes, a.cycles),
+    )
+
+
+def report(analyses: typing.Iterable[Analysis]) -> typing.List[str]:
+    lines = []
+
+    for k, a in enumerate(analyses):
+        if not a.supported:
+            lines.append(f"{k + 1:2}. {a.layout}: unsupported ({a.reason})")
+            continue
+
+        lines.append(
+            f"{k + 1:2}. {a.layout}: {a.cycles} cycles/line"
+            f"{'' if a.fits else ' (over budget)'}, avg {a.average_cycles:.1f}, "
+            f"{a.page_crossings} page crossings, {a.rom_bytes} bytes"
+        )
+
+    return lines
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    from main import Main
+    from persistency import read_playfield
+
+    parser = argparse.ArgumentParser(
+        description=f"Rank export layouts against the {line_budget} cycle line budget"
+    )
+    parser.add_argument("project")
+    parser.add_argument("--base", type=lambda v: int(v, 0), default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        decoded = read_playfield(args.project)
+    except (OSError, ValueError, KeyError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    analyses = rank_layouts(
+        decoded["rows"],
+        mode=PlayfieldMode[decoded["mode"]],
+        layouts=list(Main._asm_rows) + [registers_layout],
+        base=args.base,
+    )
+    print("\n".join(report(analyses)))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,16 @@ import typing
 from functools import partial
 
 from PyQt5 import uic
-from PyQt5.QtWidgets import QDialog, QLineEdit, QSpinBox, QRadioButton, QDialogButtonBox
+from PyQt5.QtWidgets import (
+    QDialog,
+    QLineEdit,
+    QSpinBox,
+    QRadioButton,
+    QDialogButtonBox,
+    QComboBox,
+)
 from PyQt5.QtCore import Qt
-from models import ColorSystem, PlayfieldMode
+from models import ColorSystem, PlayfieldMode, PlayfieldModel
 from tools import resource_path
 
 
@@ -36,6 +43,12 @@ class NewDialog(QDialog):
         self._spin_box_scanlines = typing.cast(
             QSpinBox, self.findChild(QSpinBox, "spinBoxScanlines")
         )
+        self._combo_box_line_height = typing.cast(
+            QComboBox, self.findChild(QComboBox, "comboBoxLineHeight")
+        )
+
+        for height in PlayfieldModel.line_heights:
+            self._combo_box_line_height.addItem(str(height), height)
 
         self.radio_button_mode_asymmetric = typing.cast(
             QRadioButton, self.findChild(QRadioButton, "radioButtonModeAsymmetric")
@@ -81,10 +94,23 @@ class NewDialog(QDialog):
     def name(self) -> str:
         return self._line_edit_name.text()
 
+    @name.setter
+    def name(self, value: str):
+        self._line_edit_name.setText(value)
+
     @property
     def scanlines(self) -> int:
         return self._spin_box_scanlines.value()
 
+    @property
+    def line_height(self) -> int:
+        return self._combo_box_line_height.currentData()
+
+    @property
+    def groups(self) -> int:
+        """Stored rows, the scanlines rounded up to whole line height groups."""
+        return -(-self.scanlines // self.line_height)
+
     @property
     def color_system(self) -> ColorSystem:
         if self.radio_button_color_system_ntsc.isChecked():
@@ -0,0 +1,194 @@
+import argparse
+import sys
+import typing
+
+import numpy as np
+
+from assembler import AssemblyError, assemble
+from cpu6502 import CPU
+from models import Row, expand_rows
+from tia import TIA, color_clocks, clocks_per_cycle, clocks_per_pixel
+
+cycles_per_line = color_clocks // clocks_per_cycle
+# two full PAL frames, a kernel that never syncs is given up on after this
+frame_cycle_limit = 2 * 312 * cycles_per_line
+
+
+class Atari2600:
+    """4K cartridge, RAM, a RIOT timer and the TIA playfield, bus for the CPU."""
+
+    def __init__(self, rom: bytes):
+        if len(rom) not in (0x800, 0x1000):
+            raise ValueError(f"{len(rom)} bytes is not a 2K or 4K ROM")
+
+        self.rom = bytes(rom) * (0x1000 // len(rom))
+        self.ram = bytearray(0x80)
+        self.tia = TIA()
+        self._timer_start = 0
+        self._timer_value = 0
+        self._timer_interval = 1024
+        self.cpu = CPU(self)
+        self.cpu.reset()
+
+    def read(self, address: int) -> int:
+        address &= 0x1FFF
+
+        if address & 0x1000:
+            return self.rom[address & 0x0FFF]
+        if not address & 0x80:
+            # collisions and inputs, nothing pressed, nothing collided
+            return 0x80 if address & 0x0F in (0x0C, 0x0D) else 0x00
+        if not address & 0x200:
+            return self.ram[address & 0x7F]
+        if address & 0x05 == 0x04:
+            return self._intim()
+
+        return 0xFF
+
+    def write(self, address: int, value: int, cycle: int):
+        address &= 0x1FFF
+
+        if address & 0x1000:
+            return
+        if not address & 0x80:
+            self.tia.write(address & 0x3F, value, (cycle + 1) * clocks_per_cycle)
+        elif not address & 0x200:
+            self.ram[address & 0x7F] = value
+        elif address & 0x14 == 0x14:
+            self._timer_interval = (1, 8, 64, 1024)[address & 0x03]
+            self._timer_value = value
+            self._timer_start = cycle + 1
+
+    def _intim(self) -> int:
+        elapsed = self.cpu.cycles - self._timer_start
+        ticks = elapsed // self._timer_interval
+        if ticks <= self._timer_value:
+            return self._timer_value - ticks
+
+        # past zero the timer counts every cycle
+        under = elapsed - (self._timer_value + 1) * self._timer_interval
+        return (0xFF - under) & 0xFF
+
+    def run_until(self, done: typing.Callable[[], bool], max_cycles: int):
+        cpu = self.cpu
+        tia = self.tia
+        step = cpu.step
+        limit = cpu.cycles + max_cycles
+
+        while not done():
+            step()
+
+            if tia.wsync:
+                tia.wsync = False
+                cpu.cycles = -(-cpu.cycles // cycles_per_line) * cycles_per_line
+
+            if cpu.cycles > limit:
+                raise RuntimeError(f"No frame within {max_cycles} cycles")
+
+    def run_frame(self, max_cycles: int = frame_cycle_limit) -> np.ndarray:
+        """Runs to the end of the next complete frame, returns its visible lines."""
+        tia = self.tia
+        started = tia.frames_started
+        self.run_until(lambda: tia.frames_started > started, max_cycles)
+
+        ended = tia.frames_ended
+        self.run_until(lambda: tia.frames_ended > ended, max_cycles)
+        tia.catch_up((self.cpu.cycles + 1) * clocks_per_cycle)
+
+        return tia.captured()
+
+
+def expected_frame(rows: typing.Sequence[Row]) -> np.ndarray:
+    """(scanlines, 160) color codes the playfield model describes."""
+    masks = np.array([mask for mask, _, _ in rows], dtype=np.uint64)
+    on = (masks[:, None] >> np.arange(40, dtype=np.uint64)) & 1 != 0
+    codes = np.where(
+        on,
+        np.array([code for _, code, _ in rows], dtype=np.uint8)[:, None],
+        np.array([bg_code for _, _, bg_code in rows], dtype=np.uint8)[:, None],
+    )
+    return np.repeat(codes, clocks_per_pixel, axis=1)
+
+
+class Verification(typing.NamedTuple):
+    lines: int
+    expected_lines: int
+    # (line, x) of every pixel that differs
+    mismatches: np.ndarray
+
+    @property
+    def ok(self) -> bool:
+        return self.lines >= self.expected_lines and len(self.mismatches) == 0
+
+
+def diff_frame(frame: np.ndarray, rows: typing.Sequence[Row]) -> Verification:
+    expected = expected_frame(rows)
+    count = min(len(frame), len(expected))
+
+    # the lowest color bit doesn't reach the screen
+    mismatches = np.argwhere(
+        (frame[:count] & 0xFE) != (expected[:count] & 0xFE)
+    ).astype(np.intp)
+
+    return Verification(
+        lines=len(frame), expected_lines=len(expected), mismatches=mismatches
+    )
+
+
+def verify(
+    rom: bytes, rows: typing.Sequence[Row], warmup_frames: int = 1
+) -> Verification:
+    """Runs the ROM and compares its first frame after warm up against the rows."""
+    console = Atari2600(rom)
+
+    for _ in range(warmup_frames):
+        console.run_frame()
+
+    return diff_frame(console.run_frame(), rows)
+
+
+def verify_source(
+    source: str, rows: typing.Sequence[Row], warmup_frames: int = 1
+) -> Verification:
+    return verify(assemble(source).image(), rows, warmup_frames=warmup_frames)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    from persistency import read_playfield
+
+    parser = argparse.ArgumentParser(
+        description="Run a kernel and compare its frame against a PPPP project"
+    )
+    parser.add_argument("kernel", help="Assembly source or .bin/.a26 ROM")
+    parser.add_argument("project")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.kernel.lower().endswith((".bin", ".a26")):
+            with open(args.kernel, "rb") as file:
+                rom = file.read()
+        else:
+            with open(args.kernel) as file:
+                rom = assemble(file.read()).image()
+
+        decoded = read_playfield(args.project)
+        result = verify(rom, expand_rows(decoded["rows"], decoded["line_height"]))
+    except (OSError, ValueError, KeyError, RuntimeError, AssemblyError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    if result.ok:
+        print(f"{args.project}: ok")
+        return 0
+
+    if len(result.mismatches):
+        line, x = result.mismatches[0]
+        print(f"{len(result.mismatches)} pixels differ, first at line {line} x {x}")
+    if result.lines < result.expected_lines:
+        print(f"{result.lines} of {result.expected_lines} lines drawn")
+
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import argparse
+import os
+import sys
+import typing
+
+import symbol
+from symbol import Font, Symbol
+
+
+def _output_filename(source: str, output: typing.Optional[str]) -> str:
+    if output:
+        return output
+
+    return os.path.splitext(source)[0] + symbol.compiled_font_ext
+
+
+def load_glyph_sheet(
+    filename: str,
+    chars: str,
+    cell_width: int,
+    cell_height: int,
+    fixed_width: bool = False,
+    threshold: int = 128,
+) -> Font:
+    from PyQt5.QtGui import QImage, qAlpha, qGray
+
+    image = QImage(filename)
+    if image.isNull():
+        raise ValueError(f"Failed to load {filename}")
+
+    columns = image.width() // cell_width
+    if columns == 0:
+        raise ValueError(f"{filename} is narrower than a single cell")
+
+    font = Font(name=os.path.basename(filename))
+
+    for k, char in enumerate(chars):
+        left = (k % columns) * cell_width
+        top = (k // columns) * cell_height
+
+        if top + cell_height > image.height():
+            raise ValueError(f"{filename} has no cell for {char!r}")
+
+        rows = []
+        for y in range(cell_height):
+            mask = 0
+            for x in range(cell_width):
+                pixel = image.pixel(left + x, top + y)
+                if qAlpha(pixel) >= threshold and qGray(pixel) < threshold:
+                    mask |= 1 << x
+            rows.append(mask)
+
+        width = cell_width
+        if not fixed_width:
+            used = max(rows).bit_length() if rows else 0
+            width = used if used > 0 else cell_width
+
+        font[char] = Symbol.from_rows(width=width, height=cell_height, rows=rows)
+
+    return font
+
+
+def build(args: argparse.Namespace):
+    for source in args.sources:
+        font = symbol.load_font(source)
+        to = _output_filename(source, args.output if len(args.sources) == 1 else None)
+        symbol.save_compiled_font(font, to=to)
+        print(f"{source} -> {to} ({len(font)} glyphs)")
+
+
+def sheet(args: argparse.Namespace):
+    cell_width, cell_height = (int(v) for v in args.cell.lower().split("x"))
+    font = load_glyph_sheet(
+        args.source,
+        chars=args.chars,
+        cell_width=cell_width,
+        cell_height=cell_height,
+        fixed_width=args.fixed,
+        threshold=args.threshold,
+    )
+    to = _output_filename(args.source, args.output)
+    symbol.save_compiled_font(font, to=to)
+    print(f"{args.source} -> {to} ({len(font)} glyphs)")
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=f"Build compiled {symbol.compiled_font_ext} fonts"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_build = commands.add_parser("build", help=f"Compile {symbol.font_ext} files")
+    parser_build.add_argument("sources", nargs="+")
+    parser_build.add_argument("-o", "--output")
+    parser_build.set_defaults(func=build)
+
+    parser_sheet = commands.add_parser("sheet", help="Compile a PNG glyph sheet")
+    parser_sheet.add_argument("source")
+    parser_sheet.add_argument(
+        "--chars", required=True, help="Characters in sheet order, row by row"
+    )
+    parser_sheet.add_argument("--cell", required=True, help="Glyph cell size, e.g. 4x6")
+    parser_sheet.add_argument(
+        "--fixed", action="store_true", help="Keep the full cell width per glyph"
+    )
+    parser_sheet.add_argument("--threshold", type=int, default=128)
+    parser_sheet.add_argument("-o", "--output")
+    parser_sheet.set_defaults(func=sheet)
+
+    args = parser.parse_args(argv)
+
+    try:
+        args.func(args)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+import argparse
+import os
+import sys
+import typing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import palettes
+from models import ColorSystem, PlayfieldMode, ScanlineModel
+from persistency import pack_scanline, serialize_scanlines, save_data
+
+image_exts = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+
+default_scanline_counts = {
+    ColorSystem.NTSC: 192,
+    ColorSystem.PAL: 242,
+    ColorSystem.SECAM: 242,
+}
+
+
+class Conversion(typing.NamedTuple):
+    pixels: np.ndarray
+    palette_codes: np.ndarray
+    bg_palette_codes: np.ndarray
+
+
+def palette_array(
+    color_system: ColorSystem,
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    mapping = palettes.table[color_system]
+    codes = np.array(sorted(mapping.keys()), dtype=np.uint8)
+    colors = np.array(
+        [[int(mapping[c][k : k + 2], 16) for k in (0, 2, 4)] for c in codes],
+        dtype=np.float64,
+    )
+    return codes, colors
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    c = rgb / 255.0
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+
+    xyz = c @ np.array(
+        [
+            [0.4124564, 0.2126729, 0.0193339],
+            [0.3575761, 0.7151522, 0.1191920],
+            [0.1804375, 0.0721750, 0.9503041],
+        ]
+    )
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+
+    return np.stack(
+        [
+            116 * f[..., 1] - 16,
+            500 * (f[..., 0] - f[..., 1]),
+            200 * (f[..., 1] - f[..., 2]),
+        ],
+        axis=-1,
+    )
+
+
+def load_image(filename: str) -> np.ndarray:
+    from PyQt5.QtGui import QImage
+
+    image = QImage(filename)
+    if image.isNull():
+        raise ValueError(f"Failed to load {filename}")
+
+    image = image.convertToFormat(QImage.Format_RGB888)
+    ptr = image.constBits()
+    ptr.setsize(image.byteCount())
+
+    data = np.frombuffer(ptr, dtype=np.uint8).reshape(
+        image.height(), image.bytesPerLine()
+    )
+    # the bits belong to the image, which is freed once this returns
+    return data[:, : image.width() * 3].reshape(image.height(), image.width(), 3).copy()
+
+
+def resample(image: np.ndarray, width: int, height: int) -> np.ndarray:
+    def bounds(size: int, count: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+        starts = np.arange(count) * size // count
+        ends = np.maximum(starts + 1, (np.arange(count) + 1) * size // count)
+        return starts, ends
+
+    # area averaging through summed-area tables, falls back to nearest on upscale
+    table = np.zeros((image.shape[0] + 1, image.shape[1] + 1, 3), dtype=np.float64)
+    table[1:, 1:] = image.astype(np.float64).cumsum(axis=0).cumsum(axis=1)
+
+    y0, y1 = bounds(image.shape[0], height)
+    x0, x1 = bounds(image.shape[1], width)
+
+    sums = table[y1][:, x1] - table[y0][:, x1] - table[y1][:, x0] + table[y0][:, x0]
+    areas = ((y1 - y0)[:, None] * (x1 - x0)[None, :])[..., None]
+
+    return sums / areas
+
+
+def _best_pair(distances: np.ndarray) -> typing.Tuple[int, int]:
+    candidates = np.unique(distances.argmin(axis=1))
+    if len(candidates) == 1:
+        return int(candidates[0]), int(candidates[0])
+
+    d = distances[:, candidates]
+    cost = np.minimum(d[:, :, None], d[:, None, :]).sum(axis=0)
+    a, b = np.unravel_index(cost.argmin(), cost.shape)
+    return int(candidates[a]), int(candidates[b])
+
+
+def convert(
+    image: np.ndarray,
+    color_system: ColorSystem,
+    scanline_count: int,
+    perceptual: bool = False,
+    dither: bool = False,
+) -> Conversion:
+    codes, colors = palette_array(color_system)
+    rows = resample(image, width=ScanlineModel.pixel_count, height=scanline_count)
+
+    if perceptual:
+        rows = rgb_to_lab(rows)
+        colors = rgb_to_lab(colors)
+
+    pixels = np.zeros((scanline_count, ScanlineModel.pixel_count), dtype=bool)
+    palette_codes = np.zeros(scanline_count, dtype=np.uint8)
+    bg_palette_codes = np.zeros(scanline_count, dtype=np.uint8)
+
+    carry = np.zeros_like(rows[0])
+
+    for j in range(scanline_count):
+        row = rows[j] + carry
+        carry = np.zeros_like(row)
+
+        distances = ((row[:, None, :] - colors[None, :, :]) ** 2).sum(axis=2)
+        a, b = _best_pair(distances)
+
+        if dither and a != b:
+            pair = colors[[a, b]]
+            foreground = np.zeros(ScanlineModel.pixel_count, dtype=bool)
+            for i in range(ScanlineModel.pixel_count):
+                k = int(((row[i] - pair) ** 2).sum(axis=1).argmin())
+                foreground[i] = k == 0
+                error = row[i] - pair[k]
+                if i + 1 < ScanlineModel.pixel_count:
+                    row[i + 1] += error * 7 / 16
+                    carry[i + 1] += error * 1 / 16
+                if i > 0:
+                    carry[i - 1] += error * 3 / 16
+                carry[i] += error * 5 / 16
+        else:
+            foreground = distances[:, a] < distances[:, b]
+
+        # the more common color of the pair goes to COLUBK
+        if foreground.sum() > ScanlineModel.pixel_count // 2:
+            a, b = b, a
+            foreground = ~foreground
+
+        pixels[j] = foreground
+        palette_codes[j] = codes[a]
+        bg_palette_codes[j] = codes[b]
+
+    return Conversion(
+        pixels=pixels, palette_codes=palette_codes, bg_palette_codes=bg_palette_codes
+    )
+
+
+def serialize_conversion(
+    conversion: Conversion,
+    name: str,
+    color_system: ColorSystem,
+    version: str,
+    mode: PlayfieldMode = PlayfieldMode.Asymmetric,
+    line_height: int = 1,
+) -> typing.Mapping:
+    pixels = conversion.pixels.copy()
+    half = ScanlineModel.pixel_count // 2
+
+    if mode == PlayfieldMode.Symmetric:
+        pixels[:, half:] = pixels[:, :half]
+    elif mode == PlayfieldMode.Mirror:
+        pixels[:, half:] = pixels[:, :half][:, ::-1]
+
+    return serialize_scanlines(
+        name=name,
+        mode=mode,
+        color_system=color_system,
+        scanlines=[
+            pack_scanline(
+                pixels=pixels[j].tolist(),
+                palette_code=int(conversion.palette_codes[j]),
+                bg_palette_code=int(conversion.bg_palette_codes[j]),
+            )
+            for j in range(len(conversion.pixels))
+        ],
+        version=version,
+        line_height=line_height,
+    )
+
+
+def import_image(
+    filename: str,
+    color_system: ColorSystem,
+    version: str,
+    scanline_count: typing.Optional[int] = None,
+    perceptual: bool = False,
+    dither: bool = False,
+    name: typing.Optional[str] = None,
+    mode: PlayfieldMode = PlayfieldMode.Asymmetric,
+    line_height: int = 1,
+) -> typing.Mapping:
+    scanline_count = scanline_count or default_scanline_counts[color_system]
+    conversion = convert(
+        load_image(filename),
+        color_system=color_system,
+        # one converted row per group, sampled over the group's scanlines
+        scanline_count=-(-scanline_count // line_height),
+        perceptual=perceptual,
+        dither=dither,
+    )
+
+    return serialize_conversion(
+        conversion,
+        name=name or os.path.splitext(os.path.basename(filename))[0],
+        color_system=color_system,
+        version=version,
+        mode=mode,
+        line_height=line_height,
+    )
+
+
+def _convert_file(from_: str, to: str, **kwargs) -> str:
+    save_data(data=import_image(from_, **kwargs), to=to)
+    return to
+
+
+def convert_folder(
+    from_dir: str,
+    to_dir: str,
+    workers: typing.Optional[int] = None,
+    **kwargs,
+) -> typing.Generator[typing.Tuple[str, typing.Optional[Exception]], None, None]:
+    os.makedirs(to_dir, exist_ok=True)
+
+    sources = [
+        os.path.join(from_dir, f)
+        for f in sorted(os.listdir(from_dir))
+        if f.lower().endswith(image_exts)
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                _convert_file,
+                source,
+                os.path.join(
+                    to_dir, os.path.splitext(os.path.basename(source))[0] + ".pppp"
+                ),
+                **kwargs,
+            ): source
+            for source in sources
+        }
+
+        for future in as_completed(futures):
+            yield futures[future], future.exception()
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    from main import version
+
+    parser = argparse.ArgumentParser(
+        description="Convert a folder of images into PPPP projects"
+    )
+    parser.add_argument("from_dir")
+    parser.add_argument("to_dir")
+    parser.add_argument(
+        "--color-system",
+        choices=[c.name for c in ColorSystem],
+        default=ColorSystem.NTSC.name,
+    )
+    parser.add_argument("--scanlines", type=int)
+    parser.add_argument("--perceptual", action="store_true")
+    parser.add_argument("--dither", action="store_true")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    failed = 0
+
+    for source, error in convert_folder(
+        args.from_dir,
+        args.to_dir,
+        workers=args.workers,
+        color_system=ColorSystem[args.color_system],
+        version=version,
+        scanline_count=args.scanlines,
+        perceptual=args.perceptual,
+        dither=args.dither,
+    ):
+        if error:
+            failed += 1
+            sys.stderr.write(f"{source}: {error}\n")
+        else:
+            print(source)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
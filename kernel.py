@@ -0,0 +1,409 @@
+import argparse
+import sys
+import typing
+
+import packer
+from assembler import AssemblyError, assemble
+from models import ColorSystem, PlayfieldMode, Row, expand_rows, registers
+from tia import color_clocks, hblank, clocks_per_cycle, clocks_per_pixel
+
+cycles_per_line = color_clocks // clocks_per_cycle
+line_heights = (8, 4, 2, 1)
+
+# scanlines per frame, and the VBLANK lines before the kernel
+frame_lines = {
+    ColorSystem.NTSC: (262, 37),
+    ColorSystem.PAL: (312, 45),
+    ColorSystem.SECAM: (312, 45),
+}
+
+_left = ("COLUBK", "COLUPF", "PF0", "PF1", "PF2")
+_right = ("PF0R", "PF1R", "PF2R")
+_targets = {"PF0R": "PF0", "PF1R": "PF1", "PF2R": "PF2"}
+
+# first visible pixel a register feeds, and for the right half the pixel the left
+# half is done with
+_first_pixel = {
+    "COLUBK": 0,
+    "COLUPF": 0,
+    "PF0": 0,
+    "PF1": 16,
+    "PF2": 48,
+    "PF0R": 80,
+    "PF1R": 96,
+    "PF2R": 128,
+}
+_left_done = {"PF0R": 16, "PF1R": 48, "PF2R": 80}
+
+
+class Kernel(typing.NamedTuple):
+    source: typing.List[str]
+    cycles: int
+    rom_bytes: int
+    line_height: int
+    description: str
+
+
+def _effect_x(cycle: int) -> int:
+    """First pixel a store completing at the cycle changes, counted from the line start."""
+    x = cycle * clocks_per_cycle - hblank
+    return max(0, -(-x // clocks_per_pixel) * clocks_per_pixel)
+
+
+def _window(register: str) -> typing.Tuple[int, int]:
+    cycles = range(cycles_per_line)
+    latest = max(c for c in cycles if _effect_x(c) <= _first_pixel[register])
+    earliest = (
+        min(c for c in cycles if _effect_x(c) >= _left_done[register])
+        if register in _left_done
+        else 0
+    )
+    return earliest, latest
+
+
+def line_height(rows: typing.Sequence[Row]) -> int:
+    for height in line_heights:
+        if len(rows) % height == 0 and all(
+            rows[j] == rows[j - j % height] for j in range(len(rows))
+        ):
+            return height
+
+    return 1
+
+
+def _values(
+    rows: typing.Sequence[Row], mode: PlayfieldMode
+) -> typing.Dict[str, typing.List[int]]:
+    values = {r: [] for r in _left + _right}
+
+    for mask, code, bg_code in rows:
+        pf = registers(mask)
+        values["COLUBK"].append(bg_code)
+        values["COLUPF"].append(code)
+        for k in range(3):
+            values[f"PF{k}"].append(pf[k])
+            values[f"PF{k}R"].append(pf[k + 3])
+
+    if mode != PlayfieldMode.Asymmetric:
+        for r in _right:
+            del values[r]
+    else:
+        # a right half that always matches the left needs no mid line store
+        for r in _right:
+            if values[r] == values[_targets[r]]:
+                del values[r]
+
+    return values
+
+
+class _Schedule:
+    def __init__(self, start: int = 0):
+        self.lines: typing.List[str] = []
+        self.cycle = start
+
+    def op(self, text: str, cycles: int):
+        self.lines.append(f"\t{text}")
+        self.cycle += cycles
+
+    def pad(self, cycles: int):
+        if cycles <= 0:
+            return
+
+        # a single cycle can't be burnt, overshoot to two
+        cycles = max(cycles, 2)
+        if cycles % 2:
+            self.op("bit $80", 3)
+            cycles -= 3
+        for _ in range(cycles // 2):
+            self.op("nop", 2)
+
+
+def _stores(
+    dynamic: typing.List[str],
+    preloaded: typing.Mapping[str, str],
+    labels: typing.Mapping[str, str],
+    start: int,
+) -> _Schedule:
+    schedule = _Schedule(start)
+
+    for register in dynamic:
+        earliest, latest = _window(register)
+        target = _targets.get(register, register)
+
+        if register in preloaded:
+            schedule.op(f"st{preloaded[register]} {target}", 3)
+        else:
+            schedule.pad(earliest - (schedule.cycle + 7))
+            schedule.op(f"lda {labels[register]},y", 4)
+            schedule.op(f"sta {target}", 3)
+
+        if not earliest <= schedule.cycle <= latest:
+            raise ValueError(
+                f"{target} lands on cycle {schedule.cycle}, "
+                f"outside {earliest}-{latest}"
+            )
+
+    return schedule
+
+
+def generate(
+    rows: typing.Sequence[Row],
+    mode: PlayfieldMode,
+    color_system: ColorSystem = ColorSystem.NTSC,
+    name: str = "Playfield",
+) -> Kernel:
+    """Complete DASM source of the cheapest kernel this tree knows for the rows.
+
+    Registers that never change are set once, repeated rows are stored once per
+    group and tables are placed so that no indexed load crosses a page.
+    """
+    if not rows:
+        raise ValueError("Nothing to display")
+
+    total_lines, vblank_lines = frame_lines[color_system]
+    overscan_lines = total_lines - 3 - vblank_lines - len(rows)
+    if overscan_lines < 1:
+        raise ValueError(
+            f"{len(rows)} scanlines don't fit in a {color_system.name} frame"
+        )
+
+    height = line_height(rows)
+    groups = rows[::height]
+    values = _values(groups, mode)
+
+    # a mid line store overwrites the left value, so both halves are written per line
+    paired = {_targets[r] for r in values if r in _targets} | set(_right)
+    constant = {
+        r: v[0] for r, v in values.items() if len(set(v)) == 1 and r not in paired
+    }
+    dynamic = sorted(
+        (r for r in values if r not in constant),
+        key=lambda r: (_window(r)[1], (_left + _right).index(r)),
+    )
+    # symmetric rows repeat by holding the registers, asymmetric ones redraw with X
+    # counting the lines of a group
+    repeat = height > 1
+    redraw = repeat and mode == PlayfieldMode.Asymmetric
+
+    left = [r for r in dynamic if r in _left]
+    preloaded = dict(zip(left[: 1 if redraw else 2], ("a", "x")))
+
+    prefix = packer.label_prefix(name, set())
+    labels = {r: f"{prefix}{r}" for r in dynamic}
+    tables = [packer.Table(labels[r], values[r]) for r in dynamic]
+
+    preload = [
+        f"\t{'lda' if reg == 'a' else 'ldx'} {labels[r]},y"
+        for r, reg in preloaded.items()
+    ]
+    preload_cycles = 4 * len(preload)
+
+    first = _stores(dynamic, preloaded, labels, start=3)
+    body = _stores(dynamic, preloaded, labels, start=0)
+
+    def tail(label: str) -> typing.List[str]:
+        if redraw:
+            lines = ["\tdex", "\tbne Line"]
+        elif repeat:
+            lines = [
+                f"\tldx #{height - 1}",
+                f"{label}:",
+                "\tsta WSYNC",
+                "\tdex",
+                f"\tbne {label}",
+            ]
+        else:
+            lines = []
+        return lines + ["\tiny", f"\tcpy #{len(groups) & 0xFF}", "\tbne Group"]
+
+    group_setup = [f"\tldx #{height}"] if redraw else []
+    next_group = 7 + (2 if redraw else 0) + preload_cycles + 3
+
+    paths = []
+    for stores_end in (first.cycle, body.cycle):
+        if redraw:
+            paths.append(stores_end + 2 + 3 + preload_cycles + 3)
+            paths.append(stores_end + 2 + 2 + next_group)
+        elif repeat:
+            paths.append(stores_end + 2 + 3)
+            paths.append(2 + 2 + next_group)
+        else:
+            paths.append(stores_end + next_group)
+    cycles = max(paths)
+
+    if cycles > cycles_per_line:
+        raise ValueError(f"{cycles} cycles don't fit in a {cycles_per_line} cycle line")
+
+    description = (
+        f"{mode.name}, {len(dynamic)} registers per "
+        f"{'line' if height == 1 else f'{height} lines'}"
+        + (f", {', '.join(sorted(constant))} constant" if constant else "")
+    )
+
+    setup = [f"\tlda #${1 if mode == PlayfieldMode.Mirror else 0:02X}", "\tsta CTRLPF"]
+    for r, v in constant.items():
+        setup += [f"\tlda #${v:02X}", f"\tsta {r}"]
+
+    code = (
+        [
+            f"\t; {description}, {cycles} cycles per line",
+            "\tprocessor 6502",
+            '\tinclude "vcs.h"',
+            "",
+            "\tORG $F000",
+            "Start:",
+            "\tsei",
+            "\tcld",
+            "\tldx #$FF",
+            "\ttxs",
+            "\tlda #0",
+            "Clear:",
+            "\tsta 0,x",
+            "\tdex",
+            "\tbne Clear",
+        ]
+        + setup
+        + [
+            "",
+            "Frame:",
+            "\tlda #2",
+            "\tsta WSYNC",
+            "\tsta VBLANK",
+            "\tsta VSYNC",
+            "\tsta WSYNC",
+            "\tsta WSYNC",
+            "\tsta WSYNC",
+            "\tlda #0",
+            "\tsta VSYNC",
+            f"\tldx #{vblank_lines - 1}",
+            "VerticalBlank:",
+            "\tsta WSYNC",
+            "\tdex",
+            "\tbne VerticalBlank",
+            "",
+            "\tldy #0",
+        ]
+        + group_setup
+        + preload
+        + ["\tsta WSYNC", "\tsty VBLANK"]
+        + first.lines
+        # the first line keeps its own copy of the loop tail, a jmp costs 3 cycles
+        + tail("FirstRepeat")
+        + ["\tjmp KernelEnd", "", "Group:"]
+        + group_setup
+        + ["Line:"]
+        + preload
+        + ["\tsta WSYNC"]
+        + body.lines
+        + tail("Repeat")
+        + [
+            "",
+            "KernelEnd:",
+            "\tsta WSYNC",
+            "\tlda #2",
+            "\tsta VBLANK",
+            f"\tldx #{overscan_lines - 1}",
+            "Overscan:",
+            "\tsta WSYNC",
+            "\tdex",
+            "\tbne Overscan",
+            "\tjmp Frame",
+            "CodeEnd:",
+        ]
+    )
+
+    vectors = ["", "\tORG $FFFC", "\t.word Start", "\t.word Start"]
+
+    # data starts on the page after the code, branches then never cross a page
+    origin = 0xF100
+    while True:
+        bins = packer.pack_tables(tables, origin=origin)
+        if bins and bins[-1].address + bins[-1].used > 0xFFFC:
+            raise ValueError("Data doesn't fit in a 4K cartridge")
+
+        data = packer.packed_asm(bins, _bytes) if bins else []
+        source = code + [""] + data + vectors
+
+        try:
+            program = assemble("\n".join(source))
+        except AssemblyError as e:
+            raise ValueError(str(e))
+
+        code_end = program.symbols["CodeEnd"]
+        if code_end <= origin:
+            break
+        origin = -(-code_end // packer.page_size) * packer.page_size
+
+    rom_bytes = sum(len(chunk) for chunk in program.chunks.values()) - 4
+
+    return Kernel(
+        source=source,
+        cycles=cycles,
+        rom_bytes=rom_bytes,
+        line_height=height,
+        description=description,
+    )
+
+
+def _bytes(values: typing.List[int], bytes_in_row: int = 8) -> typing.List[str]:
+    return [
+        f"\t.byte {', '.join(f'${v:02X}' for v in values[i : i + bytes_in_row])}"
+        for i in range(0, len(values), bytes_in_row)
+    ]
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    from emulator import verify_source
+    from persistency import read_playfield
+
+    parser = argparse.ArgumentParser(
+        description="Generate a DASM display kernel for a PPPP project"
+    )
+    parser.add_argument("project")
+    parser.add_argument("-o", "--output")
+    parser.add_argument(
+        "--verify", action="store_true", help="Run the kernel and diff its frame"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        decoded = read_playfield(args.project)
+        rows = expand_rows(decoded["rows"], decoded["line_height"])
+        kernel = generate(
+            rows,
+            mode=PlayfieldMode[decoded["mode"]],
+            color_system=ColorSystem[decoded["color_system"]],
+            name=decoded["name"],
+        )
+    except (OSError, ValueError, KeyError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    source = "\n".join(kernel.source) + "\n"
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(source)
+    else:
+        sys.stdout.write(source)
+
+    sys.stderr.write(
+        f"{kernel.description}: {kernel.cycles} cycles per line, "
+        f"{kernel.rom_bytes} bytes\n"
+    )
+
+    if args.verify:
+        result = verify_source(source, rows)
+        if not result.ok:
+            sys.stderr.write(
+                f"verification failed: {len(result.mismatches)} pixels differ, "
+                f"{result.lines}/{result.expected_lines} lines\n"
+            )
+            return 1
+        sys.stderr.write("verified\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import typing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from persistency import read_playfield
+
+
+class ProjectLoader(QObject):
+    """Decodes project files in worker processes and streams them back in order of completion."""
+
+    loaded = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+    finished = pyqtSignal()
+
+    def __init__(
+        self,
+        filenames: typing.List[str],
+        workers: typing.Optional[int] = None,
+        parent: QObject = None,
+    ):
+        super().__init__(parent)
+        self._filenames = filenames
+        self._workers = workers
+        self._executor = None
+        self._pending = 0
+        self._canceled = False
+
+        # results arrive on executor threads, queued signals hop to the GUI thread
+        self._done.connect(self._on_done)
+
+    _done = pyqtSignal(str, object)
+
+    def __len__(self) -> int:
+        return len(self._filenames)
+
+    def start(self):
+        if not self._filenames:
+            self.finished.emit()
+            return
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=min(self._workers or len(self._filenames), len(self._filenames))
+        )
+        self._pending = len(self._filenames)
+
+        for filename in self._filenames:
+            future = self._executor.submit(read_playfield, filename)
+            future.add_done_callback(
+                lambda f, filename_=filename: self._done.emit(filename_, f)
+            )
+
+        self._executor.shutdown(wait=False)
+
+    def cancel(self):
+        self._canceled = True
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, filename: str, future: Future):
+        self._pending -= 1
+
+        if not self._canceled and not future.cancelled():
+            error = future.exception()
+            if error:
+                self.failed.emit(filename, str(error))
+            else:
+                self.loaded.emit(filename, future.result())
+
+        if self._pending == 0:
+            self.finished.emit()
@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 import time
@@ -6,7 +7,7 @@ from collections import defaultdict, deque
 from functools import partial, wraps
 
 from PyQt5 import uic, QtGui, QtPrintSupport
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QTimer
 from PyQt5.QtGui import QPixmap, QCloseEvent
 from PyQt5.QtWidgets import (
     QApplication,
@@ -21,29 +22,56 @@ from PyQt5.QtWidgets import (
     QWidget,
     QSplashScreen,
     QMenu,
+    QProgressDialog,
 )
 
+import asmimport
+import autosave
+import clipboard
+import cycles
+import importer
+import kernel
+import loader
+import packer
 import palettes
+import recolor
+import romscan
 import symbol
+import tia
 from commands import (
     UpdateLinePaletteCode,
     CommandsGroup,
-    UpdateLineBackgroundPaletteCode,
     ClearPixels,
+    FillRegion,
     UpdatePixels,
+    RestoreSnapshot,
+    SetBackgroundRange,
+    SetColorSystem,
+    SetRows,
+    UpdateRowMasks,
 )
 from dialogs.about import AboutDialog
 from dialogs.new import NewDialog
 from dialogs.text import InsertText
 from models import (
+    ColorSystem,
+    ShapeModel,
     ScanlineModel,
     ToolboxTool,
     Command,
     PixelModel,
     PlayfieldMode,
+    AnimationModel,
+    wrap_mask,
+    registers,
+    to_mask,
+    from_mask,
+    mask_bits,
+    expand_rows,
+    Row,
 )
-from persistency import save_playfield, load_playfield
-from symbol import Symbol
+from persistency import save_playfield, build_playfield, deserialize_playfield
+from symbol import Symbol, Font
 from tools import (
     ObservableProperty,
     combine,
@@ -51,12 +79,12 @@ from tools import (
     resource_path,
     run_x,
     error_box,
+    FrameThrottle,
 )
-from widgets import WPlayfield, WPixel, WPalette, WScanline
+from widgets import WPlayfield, WPalette, WScanline, WTimeline, WPreview
 
 version = "202104.A"
 
-font_ext = ".font"
 fonts = {}
 
 
@@ -71,6 +99,7 @@ class MouseEventHandler:
 
     def __init__(self):
         self._mapping = defaultdict(list)
+        self._resolved = {}
 
     def register(
         self,
@@ -102,27 +131,22 @@ class MouseEventHandler:
                         raise ValueError(str(modifier))
 
                     self._mapping[(tool, buttons, modifier)].append(f)
+
+            self._resolved.clear()
             return f
 
         return decorator
 
-    def __call__(
-        self,
-        *,
-        tool: ToolboxTool,
-        event: typing.Union[QtGui.QMouseEvent, QtGui.QWheelEvent],
-        **kwargs,
-    ):
-        buttons = (
-            event.buttons()
-            if isinstance(event, QtGui.QMouseEvent)
-            else Qt.MouseButton.NoButton
-        )
+    def resolve(
+        self, tool: ToolboxTool, buttons: int, modifiers: int
+    ) -> typing.Tuple[typing.Callable, ...]:
+        key = (tool, buttons, modifiers)
+        funcs = self._resolved.get(key)
 
-        funcs = self._mapping.get((tool, buttons, event.modifiers().__int__()))
-        if funcs:
-            for f in funcs:
-                f(tool=tool, event=event, **kwargs)
+        if funcs is None:
+            funcs = self._resolved[key] = tuple(self._mapping.get(key, ()))
+
+        return funcs
 
 
 class Main(QMainWindow):
@@ -130,6 +154,10 @@ class Main(QMainWindow):
     _pf_cursor_size = QSize(4, 4)
     _load_save_filter = "PPPP project (*.pppp);; All Files (*.*)"
     _export_png_filter = "PNG (*.png);; All Files (*.*)"
+    _import_image_filter = "Images (*.png *.jpg *.jpeg *.bmp *.gif);; All Files (*.*)"
+    _import_asm_filter = "Assembly (*.asm *.s *.inc *.a *.h *.dasm);; All Files (*.*)"
+    _import_rom_filter = "Atari 2600 ROM (*.bin *.a26);; All Files (*.*)"
+    _import_rom_hits = 10
     _default_zoom = 2
     _asm_rows = {
         "PF0_PF1_PF2": lambda y, line: f"\t.byte ${line.model.pf0:02X}, ${line.model.pf1:02X}, ${line.model.pf2:02X}\t; {y}",
@@ -191,6 +219,8 @@ class Main(QMainWindow):
             ToolboxTool.Eraser: QtGui.QCursor(
                 QPixmap(resource_path("assets/cursors/18/eraser.png")), 3, 14
             ),
+            ToolboxTool.Rectangle: QtGui.QCursor(Qt.CrossCursor),
+            ToolboxTool.Ellipse: QtGui.QCursor(Qt.CrossCursor),
         }
 
         self._pf_icon = QtGui.QIcon(
@@ -199,6 +229,7 @@ class Main(QMainWindow):
 
         self._mouse_press_handler = MouseEventHandler()
         self._mouse_move_handler = MouseEventHandler()
+        self._mouse_release_handler = MouseEventHandler()
         self._wheel_handler = MouseEventHandler()
 
         self.register_mouse_actions()
@@ -207,6 +238,9 @@ class Main(QMainWindow):
 
         self._playfields = {}
         self._active_pf = None
+        self._batch_loading = False
+        self._live_views: typing.List[WPlayfield] = []
+        self._max_live_views = max(1, int(os.getenv("MAX_LIVE_VIEWS", 8)))
         self._mdi_area = typing.cast(QMdiArea, self.findChild(QMdiArea, "mdiArea"))
 
         self._action_file_new = typing.cast(
@@ -229,6 +263,18 @@ class Main(QMainWindow):
             QAction, self.findChild(QAction, "actionFileLoad")
         )
 
+        self._action_file_import_image = typing.cast(
+            QAction, self.findChild(QAction, "actionFileImportImage")
+        )
+
+        self._action_file_import_asm = typing.cast(
+            QAction, self.findChild(QAction, "actionFileImportAsm")
+        )
+
+        self._action_file_import_rom = typing.cast(
+            QAction, self.findChild(QAction, "actionFileImportRom")
+        )
+
         self._action_file_print = typing.cast(
             QAction, self.findChild(QAction, "actionFilePrint")
         )
@@ -241,6 +287,30 @@ class Main(QMainWindow):
             QAction, self.findChild(QAction, "actionFileAsmRegisters")
         )
 
+        self._action_file_asm_color_runs = typing.cast(
+            QAction, self.findChild(QAction, "actionFileAsmColorRuns")
+        )
+
+        self._action_file_asm_animation = typing.cast(
+            QAction, self.findChild(QAction, "actionFileAsmAnimation")
+        )
+
+        self._action_file_asm_packed_registers = typing.cast(
+            QAction, self.findChild(QAction, "actionFileAsmPackedRegisters")
+        )
+
+        self._action_file_asm_kernel = typing.cast(
+            QAction, self.findChild(QAction, "actionFileAsmKernel")
+        )
+
+        self._action_file_asm_cycle_budget = typing.cast(
+            QAction, self.findChild(QAction, "actionFileAsmCycleBudget")
+        )
+
+        self._action_file_asm_expand_lines = typing.cast(
+            QAction, self.findChild(QAction, "actionFileAsmExpandLines")
+        )
+
         self._menu_file_asm = typing.cast(QMenu, self.findChild(QMenu, "menuFileAsm"))
 
         self._action_edit_clear = typing.cast(
@@ -255,6 +325,17 @@ class Main(QMainWindow):
             QAction, self.findChild(QAction, "actionEditRedo")
         )
 
+        self._action_edit_revert = typing.cast(
+            QAction, self.findChild(QAction, "actionEditRevert")
+        )
+
+        self._action_edit_color_systems = {
+            c: typing.cast(
+                QAction, self.findChild(QAction, f"actionEditColorSystem_{c.name}")
+            )
+            for c in ColorSystem
+        }
+
         self._action_edit_toolbox_pen = typing.cast(
             QAction, self.findChild(QAction, "actionEditToolboxPen")
         )
@@ -287,6 +368,14 @@ class Main(QMainWindow):
             QAction, self.findChild(QAction, "actionEditToolboxLine")
         )
 
+        self._action_edit_toolbox_rectangle = typing.cast(
+            QAction, self.findChild(QAction, "actionEditToolboxRectangle")
+        )
+
+        self._action_edit_toolbox_ellipse = typing.cast(
+            QAction, self.findChild(QAction, "actionEditToolboxEllipse")
+        )
+
         self._toolbox_actions = [
             (self._action_edit_toolbox_pen, ToolboxTool.Pen),
             (self._action_edit_toolbox_brush, ToolboxTool.Brush),
@@ -295,6 +384,8 @@ class Main(QMainWindow):
             (self._action_edit_toolbox_eraser, ToolboxTool.Eraser),
             (self._action_edit_toolbox_color_picker, ToolboxTool.ColorPicker),
             (self._action_edit_toolbox_line, ToolboxTool.Line),
+            (self._action_edit_toolbox_rectangle, ToolboxTool.Rectangle),
+            (self._action_edit_toolbox_ellipse, ToolboxTool.Ellipse),
         ]
 
         self._action_edit_selection_move_up = typing.cast(
@@ -325,6 +416,10 @@ class Main(QMainWindow):
             QAction, self.findChild(QAction, "actionEditSelectionCut")
         )
 
+        self._action_edit_selection_paste = typing.cast(
+            QAction, self.findChild(QAction, "actionEditSelectionPaste")
+        )
+
         self._action_edit_selection_delete = typing.cast(
             QAction, self.findChild(QAction, "actionEditSelectionDelete")
         )
@@ -337,6 +432,7 @@ class Main(QMainWindow):
             self._action_edit_selection_text,
             self._action_edit_selection_copy,
             self._action_edit_selection_cut,
+            self._action_edit_selection_paste,
             self._action_edit_selection_delete,
         ]
 
@@ -356,6 +452,43 @@ class Main(QMainWindow):
             QAction, self.findChild(QAction, "actionViewBackgroundPalette")
         )
 
+        self._action_view_preview = typing.cast(
+            QAction, self.findChild(QAction, "actionViewPreview")
+        )
+
+        self._action_animation_convert = typing.cast(
+            QAction, self.findChild(QAction, "actionAnimationConvert")
+        )
+
+        self._action_animation_add_frame = typing.cast(
+            QAction, self.findChild(QAction, "actionAnimationAddFrame")
+        )
+
+        self._action_animation_duplicate_frame = typing.cast(
+            QAction, self.findChild(QAction, "actionAnimationDuplicateFrame")
+        )
+
+        self._action_animation_delete_frame = typing.cast(
+            QAction, self.findChild(QAction, "actionAnimationDeleteFrame")
+        )
+
+        self._action_animation_previous_frame = typing.cast(
+            QAction, self.findChild(QAction, "actionAnimationPreviousFrame")
+        )
+
+        self._action_animation_next_frame = typing.cast(
+            QAction, self.findChild(QAction, "actionAnimationNextFrame")
+        )
+
+        self._animation_actions = [
+            self._action_file_asm_animation,
+            self._action_animation_add_frame,
+            self._action_animation_duplicate_frame,
+            self._action_animation_delete_frame,
+            self._action_animation_previous_frame,
+            self._action_animation_next_frame,
+        ]
+
         self._action_help_about = typing.cast(
             QAction, self.findChild(QAction, "actionHelpAbout")
         )
@@ -364,6 +497,8 @@ class Main(QMainWindow):
             QStatusBar, self.findChild(QStatusBar, "statusbar")
         )
 
+        self._ui_throttle = FrameThrottle(self)
+
         self.setCentralWidget(self._mdi_area)
 
         self.showMaximized()
@@ -374,6 +509,24 @@ class Main(QMainWindow):
         self._bg_palette = self.add_palette(
             title="background", color_mapping=palettes.ntsc
         )
+        self._timeline = self.add_timeline(title="timeline")
+        self._preview = self.add_preview(title="TIA Preview")
+
+        self._autosave = autosave.AutosaveService(
+            directory=os.getenv(
+                "AUTOSAVE_DIR",
+                os.path.join(os.path.expanduser("~"), ".pppp", "autosave"),
+            ),
+            interval=int(os.getenv("AUTOSAVE_INTERVAL", 30)),
+            version=version,
+            playfields=lambda: list(self._playfields.values()),
+            parent=self,
+        )
+        self._autosave.failed.connect(
+            lambda _, error: self._status_bar.showMessage(
+                f"Autosave failed: {error}", 5000
+            )
+        )
 
         def close_event(event: QCloseEvent):
             for pf in self._playfields.values():
@@ -381,6 +534,7 @@ class Main(QMainWindow):
                     event.ignore()
                     return
 
+            self._autosave.shutdown(discard=True)
             event.accept()
 
         self.closeEvent = close_event
@@ -419,7 +573,8 @@ class Main(QMainWindow):
                         name=dlg.name,
                         mode=dlg.mode,
                         color_system=dlg.color_system,
-                        scanline_count=dlg.scanlines,
+                        scanline_count=dlg.groups,
+                        line_height=dlg.line_height,
                         zoom=ObservableProperty(self._default_zoom),
                         parent=parent,
                         *args,
@@ -444,9 +599,11 @@ class Main(QMainWindow):
         ):
             if self.active_pf:
                 data = [f"\t; {action.text()}", "Data:"]
+                repeat = self._export_repeat(self.active_pf)
 
                 for y, line in enumerate(self.active_pf.scanlines):
-                    data.append(f(y, line))
+                    for k in range(repeat):
+                        data.append(f(y * repeat + k, line))
 
                 self.copy_asm_to_clipboard(data=data)
 
@@ -469,7 +626,13 @@ class Main(QMainWindow):
                 colupf_raw = []
                 colubk_raw = []
 
-                for line in self.active_pf.scanlines:
+                lines = [
+                    line
+                    for line in self.active_pf.scanlines
+                    for _ in range(self._export_repeat(self.active_pf))
+                ]
+
+                for line in lines:
                     pf0_raw.append(f"${line.model.pf0:02X}")
                     pf1_raw.append(f"${line.model.pf1:02X}")
                     pf2_raw.append(f"${line.model.pf2:02X}")
@@ -518,6 +681,52 @@ class Main(QMainWindow):
 
         self._action_file_asm_registers.triggered.connect(on_file_asm_registers_click)
 
+        def on_file_asm_color_runs_click():
+            if self.active_pf:
+                self.copy_asm_to_clipboard(data=self.color_runs_asm(pf=self.active_pf))
+
+        self._action_file_asm_color_runs.triggered.connect(on_file_asm_color_runs_click)
+
+        @error_box(Exception, text=lambda err: str(err), parent=self)
+        def on_file_asm_animation_click(_):
+            if self.active_pf and self.active_pf.model.animation:
+                self.copy_asm_to_clipboard(data=self.animation_asm(pf=self.active_pf))
+
+        self._action_file_asm_animation.triggered.connect(on_file_asm_animation_click)
+
+        def on_file_asm_packed_registers_click():
+            if self._playfields:
+                self.copy_asm_to_clipboard(
+                    data=self.packed_registers_asm(pfs=self._playfields.values())
+                )
+
+        self._action_file_asm_packed_registers.triggered.connect(
+            on_file_asm_packed_registers_click
+        )
+
+        @error_box(Exception, text=lambda err: str(err), parent=self)
+        def on_file_asm_kernel_click(_):
+            if self.active_pf:
+                pf = self.active_pf
+                self.copy_asm_to_clipboard(
+                    data=kernel.generate(
+                        pf.capture_lines(),
+                        mode=pf.model.mode,
+                        color_system=pf.model.color_system,
+                        name=pf.model.name,
+                    ).source
+                )
+
+        self._action_file_asm_kernel.triggered.connect(on_file_asm_kernel_click)
+
+        def on_file_asm_cycle_budget_click():
+            if self.active_pf:
+                self.cycle_budget_dialog(pf=self.active_pf)
+
+        self._action_file_asm_cycle_budget.triggered.connect(
+            on_file_asm_cycle_budget_click
+        )
+
         def on_file_export_to_png_click():
             if self.active_pf:
                 self.png_export_dialog(self.active_pf)
@@ -525,11 +734,6 @@ class Main(QMainWindow):
         self._action_file_export_to_png.triggered.connect(on_file_export_to_png_click)
 
         def on_file_load_click():
-            def init(from_: str, *args, **kwargs):
-                return load_playfield(
-                    from_, *args, zoom=ObservableProperty(self._default_zoom), **kwargs
-                )
-
             files_to_load, _ = QFileDialog.getOpenFileNames(
                 self,
                 caption="Load project",
@@ -538,13 +742,104 @@ class Main(QMainWindow):
             )
 
             if files_to_load:
-                for filename in files_to_load:
-                    pf = self.add_playfield(partial(init, filename))
-                    pf.model.filename = filename
-                    self.update_playfield_window_title(pf=pf)
+                self.load_projects(filenames=files_to_load)
 
         self._action_file_load.triggered.connect(on_file_load_click)
 
+        @error_box(Exception, text=lambda err: str(err), parent=self)
+        def on_file_import_image_click(_):
+            filename, _ = QFileDialog.getOpenFileName(
+                self,
+                caption="Import image",
+                directory="",
+                filter=self._import_image_filter,
+            )
+
+            if not filename:
+                return
+
+            dlg = NewDialog(self)
+            dlg.name = os.path.splitext(os.path.basename(filename))[0]
+
+            if dlg.exec():
+                data = importer.import_image(
+                    filename,
+                    color_system=dlg.color_system,
+                    version=version,
+                    scanline_count=dlg.scanlines,
+                    perceptual=True,
+                    name=dlg.name,
+                    mode=dlg.mode,
+                    line_height=dlg.line_height,
+                )
+
+                def init(*args, **kwargs) -> WPlayfield:
+                    return deserialize_playfield(
+                        data,
+                        *args,
+                        zoom=ObservableProperty(self._default_zoom),
+                        **kwargs,
+                    )
+
+                pf = self.add_playfield(init=init)
+                pf.model.need_save = True
+
+        self._action_file_import_image.triggered.connect(on_file_import_image_click)
+
+        @error_box(Exception, text=lambda err: str(err), parent=self)
+        def on_file_import_asm_click(_):
+            filenames, _ = QFileDialog.getOpenFileNames(
+                self,
+                caption="Import assembly",
+                directory="",
+                filter=self._import_asm_filter,
+            )
+
+            found = [d for f in filenames for d in asmimport.parse_file(f)]
+            if filenames and not found:
+                raise ValueError("No playfield tables found")
+
+            for decoded in found:
+                pf = self.add_playfield(
+                    init=partial(
+                        build_playfield,
+                        decoded,
+                        zoom=ObservableProperty(self._default_zoom),
+                    )
+                )
+                pf.model.need_save = True
+
+        self._action_file_import_asm.triggered.connect(on_file_import_asm_click)
+
+        @error_box(Exception, text=lambda err: str(err), parent=self)
+        def on_file_import_rom_click(_):
+            filename, _ = QFileDialog.getOpenFileName(
+                self,
+                caption="Import ROM graphics",
+                directory="",
+                filter=self._import_rom_filter,
+            )
+
+            if not filename:
+                return
+
+            hits = romscan.scan_file(filename)[: self._import_rom_hits]
+            if not hits:
+                raise ValueError("No playfield tables found")
+
+            name = os.path.splitext(os.path.basename(filename))[0]
+            for hit in hits:
+                pf = self.add_playfield(
+                    init=partial(
+                        build_playfield,
+                        romscan.decode_candidate(hit, name),
+                        zoom=ObservableProperty(self._default_zoom),
+                    )
+                )
+                pf.model.need_save = True
+
+        self._action_file_import_rom.triggered.connect(on_file_import_rom_click)
+
         def on_file_print_click():
             if self.active_pf:
                 self.clear_selection(pf=self.active_pf)
@@ -591,6 +886,28 @@ class Main(QMainWindow):
 
         self._action_edit_redo.triggered.connect(on_edit_redo_click)
 
+        def on_edit_revert_click():
+            pf = self.active_pf
+            if pf and pf.model.saved_snapshot:
+                self.clear_selection(pf=pf)
+                self.execute(
+                    pf=pf,
+                    command=RestoreSnapshot(pf=pf, snapshot=pf.model.saved_snapshot),
+                )
+                pf.model.need_save = True
+
+        self._action_edit_revert.triggered.connect(on_edit_revert_click)
+
+        def on_edit_color_system_click(color_system: ColorSystem):
+            pf = self.active_pf
+            if pf and pf.model.color_system != color_system:
+                self.clear_selection(pf=pf)
+                self.convert_color_system(pf=pf, color_system=color_system)
+                pf.model.need_save = True
+
+        for c, action_ in self._action_edit_color_systems.items():
+            action_.triggered.connect(partial(on_edit_color_system_click, c))
+
         def on_view_foreground_palette_click():
             if self._action_view_foreground_palette.isChecked():
                 self._palette.parent().show()
@@ -611,6 +928,15 @@ class Main(QMainWindow):
             on_view_background_palette_click
         )
 
+        def on_view_preview_click():
+            if self._action_view_preview.isChecked():
+                self._preview.parent().show()
+                self.update_preview()
+            else:
+                self._preview.parent().hide()
+
+        self._action_view_preview.triggered.connect(on_view_preview_click)
+
         def on_toolbox_item_selection(action: QAction, tool: ToolboxTool):
             for toolbox_action, _ in self._toolbox_actions:
                 toolbox_action.setChecked(toolbox_action is action)
@@ -625,6 +951,8 @@ class Main(QMainWindow):
 
             for pf in self._playfields.values():
                 pf.setCursor(self._cursors[tool])
+                pf.model.shape = None
+                pf.clear_overlay()
 
         for toolbox_action_, toolbox_item in self._toolbox_actions:
             toolbox_action_.triggered.connect(
@@ -649,11 +977,29 @@ class Main(QMainWindow):
         self._action_edit_selection_move_right.triggered.connect(
             lambda: self.rotate_right(self.active_pf)
         )
+
+        def on_edit_selection_copy_click(cut: bool):
+            if self.active_pf:
+                self.copy_to_clipboard(pf=self.active_pf)
+                if cut:
+                    self.cut_selection(self.active_pf)
+                else:
+                    self.copy_selection(self.active_pf)
+
         self._action_edit_selection_copy.triggered.connect(
-            lambda: self.copy_selection(self.active_pf)
+            partial(on_edit_selection_copy_click, False)
         )
         self._action_edit_selection_cut.triggered.connect(
-            lambda: self.cut_selection(self.active_pf)
+            partial(on_edit_selection_copy_click, True)
+        )
+
+        @error_box(ValueError, text=lambda err: str(err), parent=self)
+        def on_edit_selection_paste_click(_):
+            if self.active_pf:
+                self.paste_from_clipboard(pf=self.active_pf)
+
+        self._action_edit_selection_paste.triggered.connect(
+            on_edit_selection_paste_click
         )
         self._action_edit_selection_delete.triggered.connect(
             lambda: self.delete_selection(self.active_pf)
@@ -681,6 +1027,86 @@ class Main(QMainWindow):
 
         self._action_edit_selection_text.triggered.connect(on_edit_selection_text_click)
 
+        def on_animation_convert_click():
+            if self.active_pf and not self.active_pf.model.animation:
+                self.clear_selection(pf=self.active_pf)
+                animation = AnimationModel()
+                animation.insert_frame(0, self.active_pf.capture_rows())
+                self.active_pf.model.animation = animation
+                self.active_pf.model.need_save = True
+                self.update_animation(pf=self.active_pf)
+
+        self._action_animation_convert.triggered.connect(on_animation_convert_click)
+
+        def on_animation_add_frame_click(duplicate: bool):
+            pf = self.active_pf
+            if pf and pf.model.animation:
+                animation = pf.model.animation
+                self.clear_selection(pf=pf)
+                k = animation.frame.value
+                animation.set_frame_rows(k, pf.capture_rows())
+
+                if duplicate:
+                    animation.duplicate_frame(k)
+                else:
+                    animation.insert_frame(
+                        k + 1,
+                        [
+                            (
+                                0x00,
+                                pf.model.palette_code.value,
+                                pf.model.bg_palette_code.value,
+                            )
+                        ]
+                        * pf.model.scanline_count,
+                    )
+
+                pf.model.need_save = True
+                self.select_frame(pf=pf, frame=k + 1)
+
+        self._action_animation_add_frame.triggered.connect(
+            partial(on_animation_add_frame_click, False)
+        )
+        self._action_animation_duplicate_frame.triggered.connect(
+            partial(on_animation_add_frame_click, True)
+        )
+
+        def on_animation_delete_frame_click():
+            pf = self.active_pf
+            if pf and pf.model.animation and len(pf.model.animation) > 1:
+                animation = pf.model.animation
+                self.clear_selection(pf=pf)
+                animation.delete_frame(animation.frame.value)
+                animation.frame.value = min(animation.frame.value, len(animation) - 1)
+                self.show_frame(pf=pf)
+                pf.model.need_save = True
+
+        self._action_animation_delete_frame.triggered.connect(
+            on_animation_delete_frame_click
+        )
+
+        def on_animation_step_frame_click(step: int):
+            pf = self.active_pf
+            if pf and pf.model.animation:
+                self.select_frame(
+                    pf=pf,
+                    frame=(pf.model.animation.frame.value + step)
+                    % len(pf.model.animation),
+                )
+
+        self._action_animation_previous_frame.triggered.connect(
+            partial(on_animation_step_frame_click, -1)
+        )
+        self._action_animation_next_frame.triggered.connect(
+            partial(on_animation_step_frame_click, 1)
+        )
+
+        def on_timeline_frame_selected(frame: int):
+            if self.active_pf:
+                self.select_frame(pf=self.active_pf, frame=frame)
+
+        self._timeline.on_frame_selected = on_timeline_frame_selected
+
         def on_help_about_click():
             AboutDialog(version=version).exec()
 
@@ -688,16 +1114,162 @@ class Main(QMainWindow):
 
         self.active_pf = typing.cast(WPlayfield, None)
 
+        QTimer.singleShot(0, self.recover_autosaves)
+
+    def recover_autosaves(self):
+        journals = self._autosave.journals()
+        if not journals:
+            return
+
+        answer = QMessageBox.question(
+            self,
+            "Recover",
+            f"Recover {len(journals)} unsaved project(s) from the last session?",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+
+        for journal in journals:
+            if answer == QMessageBox.Yes:
+                try:
+                    data = autosave.read_journal(journal)
+                except (OSError, ValueError, KeyError):
+                    continue
+
+                def init(*args, **kwargs) -> WPlayfield:
+                    return deserialize_playfield(
+                        data,
+                        *args,
+                        zoom=ObservableProperty(self._default_zoom),
+                        **kwargs,
+                    )
+
+                pf = self.add_playfield(init=init)
+                pf.model.filename = data.get("filename")
+                pf.model.need_save = True
+                self.update_playfield_window_title(pf=pf)
+
+            self._autosave.remove(journal)
+
+    def load_projects(self, filenames: typing.List[str]):
+        project_loader = loader.ProjectLoader(filenames, parent=self)
+        failures = []
+        loaded = []
+
+        progress = QProgressDialog(
+            "Loading projects...", "Cancel", 0, len(filenames), self
+        )
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.canceled.connect(project_loader.cancel)
+
+        def on_loaded(filename: str, decoded: typing.Mapping):
+            pf = self.add_playfield(
+                partial(
+                    build_playfield,
+                    decoded,
+                    zoom=ObservableProperty(self._default_zoom),
+                )
+            )
+            pf.mark_saved()
+            pf.model.filename = filename
+            self.update_playfield_window_title(pf=pf)
+            loaded.append(pf)
+            progress.setValue(progress.value() + 1)
+
+        def on_failed(filename: str, error: str):
+            failures.append(f"{os.path.basename(filename)}: {error}")
+            progress.setValue(progress.value() + 1)
+
+        def on_finished():
+            self._batch_loading = False
+            progress.reset()
+            project_loader.deleteLater()
+
+            # only the window that ends up active needs its line widgets
+            if loaded:
+                self.active_pf = loaded[-1]
+
+            if failures:
+                QMessageBox.critical(
+                    self, "Error", "Failed to load:\n" + "\n".join(failures)
+                )
+
+        project_loader.loaded.connect(on_loaded)
+        project_loader.failed.connect(on_failed)
+        project_loader.finished.connect(on_finished)
+
+        self._batch_loading = True
+        project_loader.start()
+
+    def evict_views(self, keep: WPlayfield):
+        if keep in self._live_views:
+            self._live_views.remove(keep)
+        self._live_views.append(keep)
+
+        # least recently activated views go back to their compact rows
+        while len(self._live_views) > self._max_live_views:
+            pf = self._live_views.pop(0)
+            self.clear_selection(pf=pf)
+            pf.evict()
+
     def undo(self, pf: WPlayfield):
+        color_system = pf.model.color_system
         pf.model.undo()
         self._action_edit_undo.setEnabled(len(pf.model.undo_commands) > 0)
         self._action_edit_redo.setEnabled(len(pf.model.redo_commands) > 0)
 
+        if pf.model.color_system != color_system:
+            self.update_color_system(pf=pf)
+
     def redo(self, pf: WPlayfield):
+        color_system = pf.model.color_system
         pf.model.redo()
         self._action_edit_undo.setEnabled(len(pf.model.undo_commands) > 0)
         self._action_edit_redo.setEnabled(len(pf.model.redo_commands) > 0)
 
+        if pf.model.color_system != color_system:
+            self.update_color_system(pf=pf)
+
+    def convert_color_system(self, pf: WPlayfield, color_system: ColorSystem):
+        from_ = pf.model.color_system
+        animation = pf.model.animation
+
+        if animation:
+            animation.set_frame_rows(animation.frame.value, pf.capture_rows())
+
+        # the drawing colors follow the lines
+        code, bg_code = recolor.convert_codes(
+            [pf.model.palette_code.value, pf.model.bg_palette_code.value],
+            from_,
+            color_system,
+        ).tolist()
+
+        self.execute(
+            pf=pf,
+            command=SetColorSystem(
+                pf=pf,
+                color_system=color_system,
+                rows=recolor.convert_rows(pf.capture_rows(), from_, color_system),
+                animation_rows=(
+                    recolor.convert_rows(animation.rows, from_, color_system)
+                    if animation
+                    else None
+                ),
+                palette_code=code,
+                bg_palette_code=bg_code,
+            ),
+        )
+
+        self.update_color_system(pf=pf)
+
+    def update_color_system(self, pf: WPlayfield):
+        self.update_playfield_window_title(pf=pf)
+
+        if pf is self.active_pf:
+            self._palette.model.color_mapping.value = pf.model.color_mapping
+            self._bg_palette.model.color_mapping.value = pf.model.color_mapping
+            self._ui_throttle.schedule(self._preview, self.update_preview)
+
     def set_window_title(self, text: str):
         self.setWindowTitle(
             f"{self._window_title_prefix} - {text}"
@@ -711,9 +1283,15 @@ class Main(QMainWindow):
 
     @active_pf.setter
     def active_pf(self, value: WPlayfield):
+        if value and self._batch_loading:
+            return
+
         if not value:
             self.set_window_title(text=typing.cast(str, None))
         elif self._active_pf is not value:
+            value.materialize()
+            self.evict_views(keep=value)
+            self._ui_throttle.schedule(self._preview, self.update_preview)
             self.set_window_title(text=value.model.name)
             self._active_pf = value
             self._palette.model.color_mapping.value = value.model.color_mapping
@@ -726,6 +1304,9 @@ class Main(QMainWindow):
         self._action_view_zoom_in.setEnabled(value is not None)
         self._action_view_zoom_out.setEnabled(value is not None)
         self._action_edit_clear.setEnabled(value is not None)
+        self._action_edit_revert.setEnabled(
+            value is not None and value.model.saved_snapshot is not None
+        )
         self._action_edit_undo.setEnabled(
             value is not None and not value.model.undo_commands.empty()
         )
@@ -746,8 +1327,170 @@ class Main(QMainWindow):
                 value is not None and self._toolbox_tool == ToolboxTool.Selection
             )
 
+        self.update_animation(pf=value)
+
+    def update_animation(self, pf: typing.Optional[WPlayfield]):
+        animation = pf.model.animation if pf else None
+
+        self._action_animation_convert.setEnabled(pf is not None and not animation)
+
+        for action in self._animation_actions:
+            action.setEnabled(animation is not None)
+
+        self._action_animation_delete_frame.setEnabled(
+            animation is not None and len(animation) > 1
+        )
+
+        timeline_window = self._timeline.parent()
+        if animation:
+            self._timeline.set_frames(frame=animation.frame.value, count=len(animation))
+            timeline_window.show()
+        else:
+            timeline_window.hide()
+
+        if pf:
+            self.update_playfield_window_title(pf=pf)
+
+    def select_frame(self, pf: WPlayfield, frame: int):
+        animation = pf.model.animation
+        if not animation or not 0 <= frame < len(animation):
+            return
+
+        if frame != animation.frame.value:
+            self.clear_selection(pf=pf)
+            animation.set_frame_rows(animation.frame.value, pf.capture_rows())
+            animation.frame.value = frame
+
+        self.show_frame(pf=pf)
+
+    def show_frame(self, pf: WPlayfield):
+        animation = pf.model.animation
+        pf.show_rows(animation.frame_rows(animation.frame.value))
+
+        # commands hold the canvas lines, so they cannot be replayed on another frame
+        pf.model.undo_commands.clear()
+        pf.model.redo_commands.clear()
+        self._action_edit_undo.setEnabled(False)
+        self._action_edit_redo.setEnabled(False)
+
+        if pf is self.active_pf:
+            self.update_animation(pf=pf)
+
+    def animation_asm(self, pf: WPlayfield) -> typing.List[str]:
+        animation = pf.model.animation
+        animation.set_frame_rows(animation.frame.value, pf.capture_rows())
+        animation.compact()
+
+        if len(animation.rows) > 0x100:
+            raise Exception(
+                f"{len(animation.rows)} shared rows do not fit in byte indices"
+            )
+
+        asymmetric = pf.model.mode == PlayfieldMode.Asymmetric
+        tables = [[] for _ in range(8 if asymmetric else 5)]
+
+        for mask, code, bg_code in animation.rows:
+            values = registers(mask)
+            for table, value in zip(
+                tables, (values if asymmetric else values[:3]) + (code, bg_code)
+            ):
+                table.append(value)
+
+        labels = (
+            ["PF0", "PF1", "PF2", "PF0R", "PF1R", "PF2R"]
+            if asymmetric
+            else ["PF0", "PF1", "PF2"]
+        ) + ["COLUPF", "COLUBK"]
+
+        data = [
+            f"\t; {len(animation)} frames, {len(animation.rows)} shared rows",
+        ]
+
+        for label, table in zip(labels, tables):
+            data.append(f"\nRows{label}:")
+            data.extend(self._asm_bytes(table))
+
+        repeat = self._export_repeat(pf)
+
+        for k, frame in enumerate(animation.frames):
+            data.append(f"\nFrame{k}:")
+            data.extend(self._asm_bytes([i for i in frame for _ in range(repeat)]))
+
+        data.append("\nFrames:")
+        data.extend(f"\t.word Frame{k}" for k in range(len(animation.frames)))
+
+        return data
+
+    def _export_repeat(self, pf: WPlayfield) -> int:
+        """Lines each stored row is exported as."""
+        if self._action_file_asm_expand_lines.isChecked():
+            return pf.model.line_height
+        return 1
+
+    def _export_rows(self, pf: WPlayfield) -> typing.List[Row]:
+        return expand_rows(pf.capture_rows(), self._export_repeat(pf))
+
+    def color_runs_asm(self, pf: WPlayfield) -> typing.List[str]:
+        data = ["\t; (line count, color) pairs, terminated by a zero count"]
+        repeat = self._export_repeat(pf)
+
+        for label, runs in (("COLUPF", pf.model.fg_runs), ("COLUBK", pf.model.bg_runs)):
+            values = []
+            for start, end, code in runs:
+                start, end = start * repeat, end * repeat
+                # counts are bytes, longer runs are split
+                for s in range(start, end, 0xFF):
+                    values.extend((min(end - s, 0xFF), code))
+            values.append(0)
+
+            data.append(f"\nRuns{label}:")
+            data.extend(self._asm_bytes(values))
+
+        return data
+
+    def packed_registers_asm(
+        self, pfs: typing.Iterable[WPlayfield]
+    ) -> typing.List[str]:
+        taken = set()
+        tables = []
+
+        for pf in pfs:
+            tables.extend(
+                packer.register_tables(
+                    self._export_rows(pf),
+                    mode=pf.model.mode,
+                    prefix=packer.label_prefix(pf.model.name, taken),
+                )
+            )
+
+        return packer.packed_asm(packer.pack_tables(tables), self._asm_bytes)
+
+    def cycle_budget_dialog(self, pf: WPlayfield):
+        analyses = cycles.rank_layouts(
+            self._export_rows(pf),
+            mode=pf.model.mode,
+            layouts=list(self._asm_rows) + [cycles.registers_layout],
+        )
+
+        box = QMessageBox(
+            QMessageBox.Information,
+            "Cycle Budget",
+            f"{pf.model.name}: {cycles.line_budget} cycles per line",
+            QMessageBox.Ok,
+            self,
+        )
+        box.setDetailedText("\n".join(cycles.report(analyses)))
+        box.exec_()
+
+    @staticmethod
+    def _asm_bytes(values: typing.List[int], bytes_in_row: int = 8) -> typing.List[str]:
+        return [
+            f"\t.byte {', '.join(f'${v:02X}' for v in values[i : i + bytes_in_row])}"
+            for i in range(0, len(values), bytes_in_row)
+        ]
+
     def ask_save_dialog(self, pf: WPlayfield) -> bool:
-        if pf.model.need_save:
+        if pf.model.need_save and (pf.model.animation or pf.modified()):
             answer = QMessageBox.question(
                 self,
                 "Save",
@@ -760,7 +1503,7 @@ class Main(QMainWindow):
             if answer == QMessageBox.Yes:
                 self.file_save_dialog(pf=pf, as_=False)
 
-            return True
+        return True
 
     def file_save_dialog(self, pf: WPlayfield, as_: bool):
         if pf:
@@ -776,7 +1519,10 @@ class Main(QMainWindow):
 
             if file_to_save:
                 save_playfield(pf=pf, to=file_to_save, version=version)
+                pf.mark_saved()
                 pf.model.need_save = False
+                self._autosave.discard(pf=pf)
+                self._action_edit_revert.setEnabled(pf is self.active_pf)
                 pf.model.filename = file_to_save
                 self.update_playfield_window_title(pf=pf)
                 self._status_bar.showMessage(
@@ -796,11 +1542,19 @@ class Main(QMainWindow):
 
     def zoom_in_out(self, pf: WPlayfield, in_: bool):
         self._status_bar.showMessage(
-            f"{(pf.model.zoom_in() if in_ else pf.model.zoom_out()) * 100}%",
-            1000,
+            f"{(pf.model.zoom_in() if in_ else pf.model.zoom_out()) * 100}%", 1000
         )
 
-    def add_palette(
+    def show_cell_status(self, pf: WPlayfield, y: int, x: int):
+        mask, code, _ = pf.capture_row(y)
+        on = (mask >> x) & 1
+        start, end, _ = (pf.model.fg_runs if on else pf.model.bg_runs).run_at(y)
+        self._status_bar.showMessage(
+            f"X={x}, Y={y}{f'  Color={code:02X}' if on else ''}  Lines={start}-{end - 1}",
+            1000,
+        )
+
+    def add_palette(
         self, title: str, color_mapping: typing.Mapping[int, str]
     ) -> WPalette:
         sub = QMdiSubWindow()
@@ -824,10 +1578,71 @@ class Main(QMainWindow):
 
         return palette
 
+    def add_timeline(self, title: str) -> WTimeline:
+        sub = QMdiSubWindow()
+
+        sub.setWindowFlags(
+            Qt.WindowType.Window
+            | Qt.WindowType.WindowTitleHint
+            | Qt.WindowType.CustomizeWindowHint
+            | Qt.WindowType.WindowStaysOnTopHint
+        )
+
+        timeline = WTimeline(parent=sub)
+        timeline.show()
+
+        sub.setWidget(timeline)
+        sub.setWindowTitle(title)
+        self._mdi_area.addSubWindow(sub)
+        sub.hide()
+
+        return timeline
+
+    def add_preview(self, title: str) -> WPreview:
+        sub = QMdiSubWindow()
+
+        sub.setWindowFlags(
+            Qt.WindowType.Window
+            | Qt.WindowType.WindowTitleHint
+            | Qt.WindowType.CustomizeWindowHint
+            | Qt.WindowType.WindowStaysOnTopHint
+        )
+
+        preview = WPreview(parent=sub)
+        preview.show()
+
+        sub.setWidget(preview)
+        sub.setWindowTitle(title)
+        self._mdi_area.addSubWindow(sub)
+        sub.hide()
+
+        return preview
+
+    def update_preview(self):
+        pf = self.active_pf
+        if not pf or not self._preview.parent().isVisible():
+            return
+
+        buffer = tia.render(
+            tia.streams_from_rows(pf.capture_lines()),
+            color_system=pf.model.color_system,
+            timing=tia.Timing.for_mode(pf.model.mode),
+        )
+        self._preview.show_buffer(
+            buffer,
+            scale_x=PixelModel.default_width // tia.clocks_per_pixel,
+            scale_y=PixelModel.default_height,
+        )
+        self._preview.parent().adjustSize()
+
     @staticmethod
     def update_playfield_window_title(pf: WPlayfield):
         sub = pf.parent().parent()
         title = f"{pf.model.name} - {pf.model.mode.name} - {pf.model.color_system.name} - {pf.model.scanline_count}"
+        if pf.model.line_height > 1:
+            title += f" x{pf.model.line_height}"
+        if pf.model.animation:
+            title += f" - Frame {pf.model.animation.frame.value + 1}/{len(pf.model.animation)}"
         if pf.model.filename:
             title += f" ({pf.model.filename})"
         sub.setWindowTitle(title)
@@ -876,7 +1691,10 @@ class Main(QMainWindow):
 
         def close_event(event: QCloseEvent):
             if self.ask_save_dialog(pf=pf):
+                self._autosave.discard(pf=pf)
                 del self._playfields[pf_id]
+                if pf in self._live_views:
+                    self._live_views.remove(pf)
                 self.active_pf = typing.cast(WPlayfield, None)
                 if len(self._playfields) != 0:
                     self.active_pf = next(iter(self._playfields.values()))
@@ -905,190 +1723,49 @@ class Main(QMainWindow):
             scroll_area_wheel_event, scroll_area.wheelEvent
         )
 
-        pf.on_scanline_mouse_press_event = combine(
-            pf.on_scanline_mouse_press_event,
-            partial(self.on_playfield_mouse_press_event, pf),
-        )
+        def on_line_change(_):
+            if pf is self.active_pf:
+                self._ui_throttle.schedule(self._preview, self.update_preview)
 
-        pf.on_scanline_mouse_move_event = combine(
-            pf.on_scanline_mouse_move_event,
-            partial(self.on_playfield_mouse_move_event, pf),
-        )
+        pf.on_line_change = on_line_change
 
-        pf.on_scanline_wheel_event = combine(
-            pf.on_scanline_wheel_event,
-            partial(self.on_playfield_wheel_event, pf),
+        pf.on_cell_mouse_press_event = partial(
+            self.dispatch_mouse_event, self._mouse_press_handler, pf
+        )
+        pf.on_cell_mouse_move_event = partial(
+            self.dispatch_mouse_event, self._mouse_move_handler, pf
+        )
+        pf.on_cell_mouse_release_event = partial(
+            self.dispatch_mouse_event, self._mouse_release_handler, pf
+        )
+        pf.on_cell_wheel_event = partial(
+            self.dispatch_mouse_event, self._wheel_handler, pf
         )
-
-        def brush(event: QtGui.QMouseEvent):
-            if (
-                self._toolbox_tool != ToolboxTool.Brush
-                or event.buttons() not in (Qt.LeftButton, Qt.RightButton)
-                or event.modifiers() != Qt.NoModifier
-            ):
-                return
-
-            zoom = pf.model.zoom.value
-            x = int(event.x() / (zoom * PixelModel.default_width))
-            y = int(event.y() / (zoom * PixelModel.default_height))
-
-            if (
-                x < 0
-                or y < 0
-                or x > ScanlineModel.pixel_count - 1
-                or y > pf.model.scanline_count - 1
-            ):
-                return
-
-            tool = (
-                ToolboxTool.Pen
-                if event.buttons() == Qt.LeftButton
-                else ToolboxTool.Eraser
-            )
-            event.buttons = lambda: Qt.NoButton
-            event.modifiers = lambda: Qt.ShiftModifier
-
-            line = pf[y]
-            pixel = line[x]
-
-            self._mouse_move_handler(
-                tool=tool,
-                pf=pf,
-                line=line,
-                y=y,
-                x=x,
-                pixel=pixel,
-                event=event,
-                neighbor=pf.model.neighbor(x),
-            )
-
-        def select(event: QtGui.QMouseEvent):
-            if (
-                self._toolbox_tool != ToolboxTool.Selection
-                or event.buttons() != Qt.LeftButton
-                or event.modifiers() != Qt.NoModifier
-            ):
-                return
-
-            zoom = pf.model.zoom.value
-            x = int(event.x() / (zoom * PixelModel.default_width))
-            y = int(event.y() / (zoom * PixelModel.default_height))
-
-            if (
-                x < 0
-                or y < 0
-                or x > ScanlineModel.pixel_count - 1
-                or y > pf.model.scanline_count - 1
-            ):
-                return
-
-            line = pf[y]
-            pixel = line[x]
-
-            self._mouse_move_handler(
-                tool=ToolboxTool.Selection,
-                pf=pf,
-                line=line,
-                y=y,
-                x=x,
-                pixel=pixel,
-                event=event,
-                neighbor=pf.model.neighbor(x),
-            )
-
-        def drag(event: QtGui.QMouseEvent):
-            if (
-                self._toolbox_tool != ToolboxTool.Selection
-                or event.buttons() != Qt.MiddleButton
-                or event.modifiers() != Qt.NoModifier
-            ):
-                return
-
-            zoom = pf.model.zoom.value
-            x = int(event.x() / (zoom * PixelModel.default_width))
-            y = int(event.y() / (zoom * PixelModel.default_height))
-
-            if pf.model.prev_drag_x is not None:
-                if x > pf.model.prev_drag_x:
-                    run_x(1, self.rotate_right, pf)
-                elif x < pf.model.prev_drag_x:
-                    run_x(1, self.rotate_left, pf)
-
-            pf.model.prev_drag_x = x
-
-            if pf.model.prev_drag_y is not None:
-                if y > pf.model.prev_drag_y:
-                    run_x(4, self.rotate_down, pf)
-                elif y < pf.model.prev_drag_y:
-                    run_x(4, self.rotate_up, pf)
-
-            pf.model.prev_drag_y = y
-
-        pf.mouseMoveEvent = combine(pf.mouseMoveEvent, brush, select, drag)
 
         self.active_pf = pf
 
         return pf
 
-    def on_playfield_mouse_press_event(
+    def dispatch_mouse_event(
         self,
+        handler: MouseEventHandler,
         pf: WPlayfield,
-        line: WScanline,
         y: int,
         x: int,
-        pixel: WPixel,
-        event: QtGui.QMouseEvent,
+        event: typing.Union[QtGui.QMouseEvent, QtGui.QWheelEvent],
     ):
-        self._mouse_press_handler(
-            tool=self._toolbox_tool,
-            pf=pf,
-            line=line,
-            y=y,
-            x=x,
-            pixel=pixel,
-            event=event,
-            neighbor=pf.model.neighbor(x),
+        funcs = handler.resolve(
+            self._toolbox_tool,
+            int(event.buttons()) if isinstance(event, QtGui.QMouseEvent) else 0,
+            int(event.modifiers()),
         )
 
-    def on_playfield_mouse_move_event(
-        self,
-        pf: WPlayfield,
-        line: WScanline,
-        y: int,
-        x: int,
-        pixel: WPixel,
-        event: QtGui.QMouseEvent,
-    ):
-        self._mouse_move_handler(
-            tool=self._toolbox_tool,
-            pf=pf,
-            line=line,
-            y=y,
-            x=x,
-            pixel=pixel,
-            event=event,
-            neighbor=pf.model.neighbor(x),
-        )
+        if not funcs:
+            return
 
-    def on_playfield_wheel_event(
-        self,
-        pf: WPlayfield,
-        line: WScanline,
-        y: int,
-        x: int,
-        pixel: WPixel,
-        event: QtGui.QWheelEvent,
-    ):
-        self._wheel_handler(
-            tool=self._toolbox_tool,
-            pf=pf,
-            line=line,
-            y=y,
-            x=x,
-            pixel=pixel,
-            event=event,
-            neighbor=pf.model.neighbor(x),
-        )
+        line = pf[y]
+        for f in funcs:
+            f(pf, line, y, x, event)
 
     def execute(self, pf: WPlayfield, command: Command):
         pf.model.execute(command=command)
@@ -1105,27 +1782,23 @@ class Main(QMainWindow):
         painter.end()
 
     @staticmethod
-    def _position_symbol(
-        y: int, x: int, sym: Symbol, pf: WPlayfield
+    def _position_rows(
+        y: int, x: int, rows: typing.Iterable[int], pf: WPlayfield
     ) -> typing.Set[int]:
         lines_to_update = set()
-        for i, j in sym.pixels:
-            b = (y + j) % pf.model.scanline_count
-            a = (x + i) % pf[b].model.pixel_count
-            pf[b].model.layer_1[a] = True
-            pf[b].model.selection[a] = True
-
-            neighbor = pf.model.neighbor(a)
-            if neighbor:
-                pf[b].model.layer_1[neighbor] = True
-                pf[b].model.selection[neighbor] = True
+        for j, mask in enumerate(rows):
+            if not mask:
+                continue
 
+            b = (y + j) % pf.model.scanline_count
+            pf.model.selection.stamp(b, wrap_mask(mask << x))
             lines_to_update.add(b)
 
+        pf.sync_selection(lines_to_update)
         return lines_to_update
 
     def draw_symbol(self, y: int, x: int, sym: Symbol, pf: WPlayfield):
-        lines_to_update = self._position_symbol(y=y, x=x, sym=sym, pf=pf)
+        lines_to_update = self._position_rows(y=y, x=x, rows=sym.rows, pf=pf)
         for j in lines_to_update:
             pf[j].model.bg_palette_code.silent_set(pf.model.bg_palette_code.value)
             pf[j].model.palette_code.value = pf.model.palette_code.value
@@ -1134,45 +1807,95 @@ class Main(QMainWindow):
         self,
         y: int,
         x: int,
-        font: typing.Mapping[str, Symbol],
+        font: Font,
         pf: WPlayfield,
         text: str,
         spacing: int = 1,
     ):
-        lines_to_update = set()
-        i = x
-        for c in text:
-            sym = font.get(c, font.get(c.lower(), None))
-            if not sym:
-                continue
-            lines_to_update.update(self._position_symbol(y=y, x=i, sym=sym, pf=pf))
-            i += sym.width + spacing
+        _, rows = font.render(text=text, spacing=spacing)
+        lines_to_update = self._position_rows(y=y, x=x, rows=rows, pf=pf)
 
         for j in lines_to_update:
             pf[j].model.bg_palette_code.silent_set(pf.model.bg_palette_code.value)
             pf[j].model.palette_code.value = pf.model.palette_code.value
 
+    @staticmethod
+    def copy_to_clipboard(pf: WPlayfield):
+        region = clipboard.region_from_selection(pf)
+        if region:
+            QApplication.clipboard().setMimeData(
+                clipboard.region_mime_data(region, pf.model.color_mapping)
+            )
+
+    def paste_from_clipboard(self, pf: WPlayfield):
+        region = clipboard.region_from_mime_data(QApplication.clipboard().mimeData())
+        if region is None:
+            return
+
+        self.clear_selection(pf=pf)
+
+        # pasted pixels float at their original position until committed
+        lines_to_update = set()
+        for j, (mask, code, _) in enumerate(region.rows):
+            if not mask:
+                continue
+
+            y = (region.top + j) % pf.model.scanline_count
+            mask = wrap_mask(mask << region.left)
+            pf.model.selection.stamp(y, mask, code)
+            lines_to_update.add(y)
+
+        pf.sync_selection(lines_to_update)
+
     @staticmethod
     def copy_selection(pf: WPlayfield):
-        for line in pf.scanlines:
-            line.model.copy_selection()
+        selection = pf.model.selection
+        rows = list(selection.selected)
+
+        for y in rows:
+            selected, floating = selection.get(y)
+            line = pf[y]
+            pixels = to_mask(line.model.pixels)
+
+            # floating pixels are dropped, the rest of the selection is lifted
+            line.model.pixels = from_mask(pixels | (selected & floating))
+            selection.set(
+                y,
+                selected,
+                floating | (selected & ~floating & pixels),
+                selection.codes.get(y, line.model.palette_code.value),
+            )
+
+        pf.sync_selection(rows)
 
     @staticmethod
     def cut_selection(pf: WPlayfield):
+        selection = pf.model.selection
+        rows = list(selection.selected)
         updates = []
-        for y, line in enumerate(pf.scanlines):
-            mods = line.model.cut_selection()
-            line.model.palette_code.value = line.model.palette_code.value
-
-            if len(mods) > 0:
-                updates.extend(
-                    [
-                        UpdatePixels.Update(
-                            x=x, y=y, status=True, code=pf.model.palette_code.value
-                        )
-                        for x in mods
-                    ]
+
+        for y in rows:
+            selected, floating = selection.get(y)
+            line = pf[y]
+            pixels = to_mask(line.model.pixels)
+            cut = selected & pixels
+
+            line.model.pixels = from_mask(pixels & ~cut)
+            selection.set(
+                y,
+                selected,
+                floating | cut,
+                selection.codes.get(y, line.model.palette_code.value),
+            )
+
+            updates.extend(
+                UpdatePixels.Update(
+                    x=x, y=y, status=True, code=line.model.palette_code.value
                 )
+                for x in mask_bits(cut)
+            )
+
+        pf.sync_selection(rows)
 
         if len(updates) > 0:
             pf.model.undo_commands.push(UpdatePixels(pf=pf, updates=updates))
@@ -1180,20 +1903,26 @@ class Main(QMainWindow):
 
     @staticmethod
     def delete_selection(pf: WPlayfield):
+        selection = pf.model.selection
+        rows = list(selection.selected)
         updates = []
-        for y, line in enumerate(pf.scanlines):
-            mods = line.model.delete_selection()
-            line.model.palette_code.value = line.model.palette_code.value
-
-            if len(mods) > 0:
-                updates.extend(
-                    [
-                        UpdatePixels.Update(
-                            x=x, y=y, status=True, code=pf.model.palette_code.value
-                        )
-                        for x in mods
-                    ]
+
+        for y in rows:
+            selected, floating = selection.get(y)
+            line = pf[y]
+            pixels = to_mask(line.model.pixels)
+
+            line.model.pixels = from_mask(pixels & ~selected)
+            selection.set(y, 0, floating & ~selected)
+
+            updates.extend(
+                UpdatePixels.Update(
+                    x=x, y=y, status=True, code=line.model.palette_code.value
                 )
+                for x in mask_bits(selected & pixels)
+            )
+
+        pf.sync_selection(rows)
 
         if len(updates) > 0:
             pf.model.undo_commands.push(UpdatePixels(pf=pf, updates=updates))
@@ -1203,82 +1932,64 @@ class Main(QMainWindow):
     def clear_selection(pf: WPlayfield):
         pf.model.prev_drag_x = None
         pf.model.prev_drag_y = None
-        updates = []
-        for y, line in enumerate(pf.scanlines):
-            mods = line.model.clear_selection()
-            line.model.palette_code.value = line.model.palette_code.value
-
-            if len(mods) > 0:
-                updates.extend(
-                    [
-                        UpdatePixels.Update(
-                            x=x, y=y, status=False, code=pf.model.bg_palette_code.value
-                        )
-                        for x in mods
-                    ]
-                )
 
-        if len(updates) > 0:
-            pf.model.undo_commands.push(UpdatePixels(pf=pf, updates=updates))
+        selection = pf.model.selection
+        rows = list(selection.selected)
+        stamped_rows = {}
+
+        for y in rows:
+            selected, floating = selection.get(y)
+            stamped = selected & floating
+
+            if stamped:
+                # committed pixels give their line the color they carry
+                mask, code, bg_code = pf.capture_row(y)
+                row = (mask | stamped, selection.codes.get(y, code), bg_code)
+                if row != (mask, code, bg_code):
+                    stamped_rows[y] = row
+
+            selection.set(y, 0, floating & ~selected)
+
+        if len(stamped_rows) > 0:
+            pf.model.execute(SetRows(pf=pf, rows=stamped_rows))
             pf.model.need_save = True
 
+        pf.sync_selection(rows)
+
     @staticmethod
     def rotate_right(pf: WPlayfield):
-        for line in pf.scanlines:
-            line.model.rotate_right()
-            line.model.palette_code.value = line.model.palette_code.value
+        pf.model.selection.shift_columns(1)
+        pf.sync_selection(pf.model.selection.rows())
 
     @staticmethod
     def rotate_left(pf: WPlayfield):
-        for line in pf.scanlines:
-            line.model.rotate_left()
-            line.model.palette_code.value = line.model.palette_code.value
+        pf.model.selection.shift_columns(-1)
+        pf.sync_selection(pf.model.selection.rows())
 
     @staticmethod
-    def rotate_up(pf: WPlayfield):
-        if pf.model.scanline_count < 2:
+    def _shift_selection_rows(pf: WPlayfield, dy: int):
+        selection = pf.model.selection
+        count = pf.model.scanline_count
+        if count < 2 or selection.empty():
             return
 
-        line_0_selection = pf[0].model.selection
-        line_0_layer_1 = pf[0].model.layer_1
+        before = selection.rows()
+
+        # floating pixels keep the color they were lifted with
+        for y in selection.floating:
+            selection.codes.setdefault(y, pf[y].model.palette_code.value)
 
-        for j in range(1, pf.model.scanline_count):
-            y = (j - 1) % pf.model.scanline_count
-            color = pf[j if True in pf[j].model.layer_1 else y].model.palette_code.value
-            pf[y].model.selection = pf[j].model.selection
-            pf[y].model.layer_1 = pf[j].model.layer_1
-            pf[y].model.palette_code.value = color
+        selection.shift_rows(dy, count)
 
-        color = pf[
-            0 if True in pf[0].model.layer_1 else pf.model.scanline_count - 1
-        ].model.palette_code.value
-        pf[pf.model.scanline_count - 1].model.selection = line_0_selection
-        pf[pf.model.scanline_count - 1].model.layer_1 = line_0_layer_1
-        pf[pf.model.scanline_count - 1].model.palette_code.value = color
+        pf.sync_selection(set(before) | set(selection.rows()))
 
     @staticmethod
-    def rotate_down(pf: WPlayfield):
-        if pf.model.scanline_count < 2:
-            return
+    def rotate_up(pf: WPlayfield):
+        Main._shift_selection_rows(pf=pf, dy=-1)
 
-        line_last_selection = pf[pf.model.scanline_count - 1].model.selection
-        line_last_layer_1 = pf[pf.model.scanline_count - 1].model.layer_1
-
-        for j in range(pf.model.scanline_count - 2, -1, -1):
-            y = (j + 1) % pf.model.scanline_count
-            color = pf[j if True in pf[j].model.layer_1 else y].model.palette_code.value
-            pf[y].model.selection = pf[j].model.selection
-            pf[y].model.layer_1 = pf[j].model.layer_1
-            pf[y].model.palette_code.value = color
-
-        color = pf[
-            pf.model.scanline_count - 1
-            if True in pf[pf.model.scanline_count - 1].model.layer_1
-            else 0
-        ].model.palette_code.value
-        pf[0].model.selection = line_last_selection
-        pf[0].model.layer_1 = line_last_layer_1
-        pf[0].model.palette_code.value = color
+    @staticmethod
+    def rotate_down(pf: WPlayfield):
+        Main._shift_selection_rows(pf=pf, dy=1)
 
     def register_mouse_actions(self):
         @self._mouse_press_handler.register(
@@ -1291,18 +2002,20 @@ class Main(QMainWindow):
             buttons=Qt.MouseButton.LeftButton,
             keyboard_modifiers=Qt.NoModifier,
         )
-        def select(*, line: WScanline, x: int, neighbor: typing.Optional[int], **_):
-            line.model.selection[x] = True
-            if neighbor:
-                line.model.selection[neighbor] = True
-            line.model.palette_code.value = line.model.palette_code.value
+        def select(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
+            pf.model.selection.select(y, 1 << x)
+            pf.sync_selection([y])
 
         @self._mouse_press_handler.register(
             tools=ToolboxTool.Selection,
             buttons=Qt.MouseButton.LeftButton,
             keyboard_modifiers=Qt.ShiftModifier,
         )
-        def fill_select(*, pf: WPlayfield, y: int, x: int, **_):
+        def fill_select(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
             visited = [
                 [False for _ in range(ScanlineModel.pixel_count)]
                 for _ in range(pf.model.scanline_count)
@@ -1334,33 +2047,57 @@ class Main(QMainWindow):
                 if not line.model.pixels[i]:
                     continue
 
-                line.model.selection[i] = True
-                neighbor = pf.model.neighbor(i)
-                if neighbor:
-                    line.model.selection[neighbor] = True
+                pf.model.selection.select(j, 1 << i)
 
-                lines_to_update.add(line)
+                lines_to_update.add(j)
 
                 s.append((j, i - 1))
                 s.append((j, i + 1))
                 s.append((j - 1, i))
                 s.append((j + 1, i))
 
-            for line_ in lines_to_update:
-                line_.model.palette_code.value = line_.model.palette_code.value
+            pf.sync_selection(lines_to_update)
 
         @self._mouse_press_handler.register(
             tools=ToolboxTool.Selection, buttons=Qt.MouseButton.RightButton
         )
-        def clear_selection(*, pf: WPlayfield, **_):
+        def clear_selection(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
             self.clear_selection(pf=pf)
 
+        @self._mouse_move_handler.register(
+            tools=ToolboxTool.Selection,
+            buttons=Qt.MouseButton.MiddleButton,
+            keyboard_modifiers=Qt.NoModifier,
+        )
+        def drag(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
+            if pf.model.prev_drag_x is not None:
+                if x > pf.model.prev_drag_x:
+                    run_x(1, self.rotate_right, pf)
+                elif x < pf.model.prev_drag_x:
+                    run_x(1, self.rotate_left, pf)
+
+            pf.model.prev_drag_x = x
+
+            if pf.model.prev_drag_y is not None:
+                if y > pf.model.prev_drag_y:
+                    run_x(4, self.rotate_down, pf)
+                elif y < pf.model.prev_drag_y:
+                    run_x(4, self.rotate_up, pf)
+
+            pf.model.prev_drag_y = y
+
         @self._wheel_handler.register(
             tools=ToolboxTool.Selection,
             buttons=Qt.MouseButton.NoButton,
             keyboard_modifiers=Qt.NoModifier,
         )
-        def move_selection_up_down(*, pf: WPlayfield, event: QtGui.QWheelEvent, **_):
+        def move_selection_up_down(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QWheelEvent
+        ):
             if event.angleDelta().y() > 0:
                 self.rotate_up(pf=pf)
             elif event.angleDelta().y() < 0:
@@ -1371,7 +2108,9 @@ class Main(QMainWindow):
             buttons=Qt.MouseButton.NoButton,
             keyboard_modifiers=Qt.ShiftModifier,
         )
-        def move_selection_left_right(*, pf: WPlayfield, event: QtGui.QWheelEvent, **_):
+        def move_selection_left_right(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QWheelEvent
+        ):
             if event.angleDelta().y() > 0:
                 self.rotate_left(pf=pf)
             elif event.angleDelta().y() < 0:
@@ -1379,7 +2118,9 @@ class Main(QMainWindow):
 
         @self._mouse_press_handler.register(buttons=Qt.MouseButton.LeftButton)
         @self._mouse_press_handler.register(buttons=Qt.MouseButton.RightButton)
-        def set_focus(*, pf: WPlayfield, **_):
+        def set_focus(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
             self.active_pf = pf
 
         @self._mouse_press_handler.register(
@@ -1392,13 +2133,13 @@ class Main(QMainWindow):
             buttons=Qt.MouseButton.NoButton,
             keyboard_modifiers=Qt.ShiftModifier,
         )
+        @self._mouse_move_handler.register(
+            tools=ToolboxTool.Brush,
+            buttons=Qt.MouseButton.LeftButton,
+            keyboard_modifiers=Qt.NoModifier,
+        )
         def draw(
-            *,
-            pf: WPlayfield,
-            y: int,
-            x: int,
-            neighbor: typing.Optional[int],
-            **_,
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
         ):
             updates = [
                 UpdatePixels.Update(
@@ -1406,13 +2147,6 @@ class Main(QMainWindow):
                 )
             ]
 
-            if neighbor is not None:
-                updates.append(
-                    UpdatePixels.Update(
-                        x=neighbor, y=y, status=True, code=pf.model.palette_code.value
-                    )
-                )
-
             self.execute(pf=pf, command=UpdatePixels(pf=pf, updates=updates))
             pf.model.need_save = True
 
@@ -1429,13 +2163,13 @@ class Main(QMainWindow):
             buttons=Qt.MouseButton.NoButton,
             keyboard_modifiers=Qt.ShiftModifier,
         )
+        @self._mouse_move_handler.register(
+            tools=ToolboxTool.Brush,
+            buttons=Qt.MouseButton.RightButton,
+            keyboard_modifiers=Qt.NoModifier,
+        )
         def erase(
-            *,
-            pf: WPlayfield,
-            y: int,
-            x: int,
-            neighbor: typing.Optional[int],
-            **_,
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
         ):
             updates = [
                 UpdatePixels.Update(
@@ -1443,16 +2177,6 @@ class Main(QMainWindow):
                 )
             ]
 
-            if neighbor is not None:
-                updates.append(
-                    UpdatePixels.Update(
-                        x=neighbor,
-                        y=y,
-                        status=False,
-                        code=pf.model.bg_palette_code.value,
-                    )
-                )
-
             self.execute(pf=pf, command=UpdatePixels(pf=pf, updates=updates))
             pf.model.need_save = True
 
@@ -1464,40 +2188,40 @@ class Main(QMainWindow):
             buttons=Qt.MouseButton.RightButton,
             keyboard_modifiers=Qt.ControlModifier,
         )
-        def fill_background(*, pf: WPlayfield, line: WScanline, y: int, x: int, **_):
+        def fill_background(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
             if not line.model.pixels[x]:
-                commands = CommandsGroup()
-
-                for j in range(y - 1, -1, -1):
-                    if (
-                        pf[j].model.bg_palette_code.value
-                        != line.model.bg_palette_code.value
-                    ):
-                        break
-                    commands.append(
-                        UpdateLineBackgroundPaletteCode(
-                            model=pf[j].model, code=pf.model.bg_palette_code.value
-                        )
-                    )
-
-                for j in range(y + 1, pf.model.scanline_count):
-                    if (
-                        pf[j].model.bg_palette_code.value
-                        != line.model.bg_palette_code.value
-                    ):
-                        break
-                    commands.append(
-                        UpdateLineBackgroundPaletteCode(
-                            model=pf[j].model, code=pf.model.bg_palette_code.value
-                        )
-                    )
+                start, end, _ = pf.model.bg_runs.run_at(y)
+                self.execute(
+                    pf=pf,
+                    command=SetBackgroundRange(
+                        pf=pf, start=start, end=end, code=pf.model.bg_palette_code.value
+                    ),
+                )
 
-                commands.append(
-                    UpdateLineBackgroundPaletteCode(
-                        model=line.model, code=pf.model.bg_palette_code.value
-                    )
+        @self._mouse_press_handler.register(
+            tools=ToolboxTool.Bucket,
+            buttons=Qt.MouseButton.LeftButton,
+            keyboard_modifiers=Qt.ShiftModifier,
+        )
+        def fill_region(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
+            # the lines sharing the clicked background are filled solid
+            if not line.model.pixels[x]:
+                start, end, _ = pf.model.bg_runs.run_at(y)
+                self.execute(
+                    pf=pf,
+                    command=FillRegion(
+                        pf=pf,
+                        start=start,
+                        end=end,
+                        mask=(1 << ScanlineModel.pixel_count) - 1,
+                        code=pf.model.palette_code.value,
+                    ),
                 )
-                self.execute(pf=pf, command=commands)
+                pf.model.need_save = True
 
         @self._mouse_press_handler.register(
             tools=ToolboxTool.Bucket, buttons=Qt.MouseButton.LeftButton
@@ -1507,7 +2231,9 @@ class Main(QMainWindow):
             buttons=Qt.MouseButton.LeftButton,
             keyboard_modifiers=Qt.ControlModifier,
         )
-        def fill_foreground(*, pf: WPlayfield, line: WScanline, y: int, x: int, **_):
+        def fill_foreground(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
             def calc_lines_to_update(
                 j: int,
                 i: int,
@@ -1582,7 +2308,7 @@ class Main(QMainWindow):
                 for j_ in to_update_lines:
                     commands.append(
                         UpdateLinePaletteCode(
-                            model=pf[j_].model, code=pf.model.palette_code.value
+                            pf=pf, y=j_, code=pf.model.palette_code.value
                         )
                     )
                 self.execute(pf=pf, command=commands)
@@ -1590,17 +2316,20 @@ class Main(QMainWindow):
         @self._mouse_press_handler.register(
             tools=ToolboxTool.Line,
             buttons=Qt.MouseButton.LeftButton,
-            keyboard_modifiers=Qt.NoModifier,
+            keyboard_modifiers=Qt.ShiftModifier,
         )
         @self._mouse_press_handler.register(
             tools=ToolboxTool.Pen,
             buttons=Qt.MouseButton.MiddleButton,
             keyboard_modifiers=Qt.NoModifier,
         )
-        def draw_horizontal_line(*, pf: WPlayfield, line: WScanline, y: int, **_):
+        def draw_horizontal_line(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
             updates = []
 
-            for i in range(line.model.pixel_count):
+            # the derived half of the line follows the stored one
+            for i in range(line.model.cell_count):
                 updates.append(
                     UpdatePixels.Update(
                         x=i, y=y, status=True, code=pf.model.palette_code.value
@@ -1621,7 +2350,7 @@ class Main(QMainWindow):
             keyboard_modifiers=Qt.ControlModifier,
         )
         def draw_vertical_line(
-            *, pf: WPlayfield, x: int, neighbor: typing.Optional[int], **_
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
         ):
             updates = []
 
@@ -1631,19 +2360,93 @@ class Main(QMainWindow):
                         x=x, y=j, status=True, code=pf.model.palette_code.value
                     )
                 )
-                if neighbor is not None:
-                    updates.append(
-                        UpdatePixels.Update(
-                            x=neighbor,
-                            y=j,
-                            status=True,
-                            code=pf.model.palette_code.value,
-                        )
-                    )
 
             self.execute(pf=pf, command=UpdatePixels(pf=pf, updates=updates))
             pf.model.need_save = True
 
+        shape_tools = (ToolboxTool.Line, ToolboxTool.Rectangle, ToolboxTool.Ellipse)
+
+        @self._mouse_press_handler.register(
+            tools=shape_tools,
+            buttons=Qt.MouseButton.LeftButton,
+            keyboard_modifiers=Qt.NoModifier,
+        )
+        @self._mouse_press_handler.register(
+            tools=shape_tools,
+            buttons=Qt.MouseButton.RightButton,
+            keyboard_modifiers=Qt.NoModifier,
+        )
+        @self._mouse_press_handler.register(
+            tools=(ToolboxTool.Rectangle, ToolboxTool.Ellipse),
+            buttons=Qt.MouseButton.LeftButton,
+            keyboard_modifiers=Qt.ShiftModifier,
+        )
+        @self._mouse_press_handler.register(
+            tools=(ToolboxTool.Rectangle, ToolboxTool.Ellipse),
+            buttons=Qt.MouseButton.RightButton,
+            keyboard_modifiers=Qt.ShiftModifier,
+        )
+        def start_shape(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
+            # the left button draws, the right one erases, shift fills
+            pf.model.shape = ShapeModel(
+                y=y,
+                x=x,
+                tool=self._toolbox_tool,
+                filled=bool(event.modifiers() & Qt.ShiftModifier),
+                status=bool(event.buttons() & Qt.MouseButton.LeftButton),
+            )
+            preview_shape(pf, line, y, x, event)
+
+        @self._mouse_move_handler.register(
+            tools=shape_tools, buttons=Qt.MouseButton.LeftButton
+        )
+        @self._mouse_move_handler.register(
+            tools=shape_tools, buttons=Qt.MouseButton.RightButton
+        )
+        def preview_shape(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
+            shape = pf.model.shape
+            if shape:
+                pf.show_overlay(
+                    shape.drag_to(y, x),
+                    code=(
+                        pf.model.palette_code.value
+                        if shape.status
+                        else pf.model.bg_palette_code.value
+                    ),
+                )
+
+        @self._mouse_release_handler.register(
+            tools=shape_tools, buttons=Qt.MouseButton.NoButton
+        )
+        def commit_shape(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
+            shape = pf.model.shape
+            if not shape:
+                return
+
+            pf.model.shape = None
+            pf.clear_overlay()
+
+            self.execute(
+                pf=pf,
+                command=UpdateRowMasks(
+                    pf=pf,
+                    masks=shape.drag_to(y, x),
+                    status=shape.status,
+                    code=(
+                        pf.model.palette_code.value
+                        if shape.status
+                        else pf.model.bg_palette_code.value
+                    ),
+                ),
+            )
+            pf.model.need_save = True
+
         @self._mouse_press_handler.register(
             tools=ToolboxTool.ColorPicker, buttons=Qt.MouseButton.LeftButton
         )
@@ -1652,7 +2455,9 @@ class Main(QMainWindow):
             buttons=Qt.MouseButton.LeftButton,
             keyboard_modifiers=Qt.AltModifier,
         )
-        def pick_forground_color(*, pf: WPlayfield, line: WScanline, x: int, **_):
+        def pick_forground_color(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
             if line.model.pixels[x]:
                 self._palette.model.code.value = line.model.palette_code.value
                 pf.model.palette_code.value = line.model.palette_code.value
@@ -1665,24 +2470,30 @@ class Main(QMainWindow):
             buttons=Qt.MouseButton.RightButton,
             keyboard_modifiers=Qt.AltModifier,
         )
-        def pick_background_color(*, pf: WPlayfield, line: WScanline, **_):
+        def pick_background_color(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
             self._bg_palette.model.code.value = line.model.bg_palette_code.value
             pf.model.bg_palette_code.value = line.model.bg_palette_code.value
 
         @self._wheel_handler.register(
             buttons=Qt.MouseButton.NoButton, keyboard_modifiers=Qt.ControlModifier
         )
-        def zoom_in_out(*, pf: WPlayfield, event: QtGui.QWheelEvent, **_):
+        def zoom_in_out(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QWheelEvent
+        ):
             if event.angleDelta().y() > 0:
                 self.zoom_in_out(in_=True, pf=pf)
             elif event.angleDelta().y() < 0:
                 self.zoom_in_out(in_=False, pf=pf)
 
         @self._mouse_move_handler.register(buttons=Qt.MouseButton.NoButton)
-        def update_status_bar(*, line: WScanline, y: int, x: int, **_):
-            self._status_bar.showMessage(
-                f"X={x}, Y={y}{f'  Color={line.model.palette_code.value:02X}' if line.model.pixels[x] else ''}",
-                1000,
+        def update_status_bar(
+            pf: WPlayfield, line: WScanline, y: int, x: int, event: QtGui.QMouseEvent
+        ):
+            # hover messages are coalesced to one per display refresh
+            self._ui_throttle.schedule(
+                self._status_bar, self.show_cell_status, pf=pf, y=y, x=x
             )
 
 
@@ -1705,8 +2516,10 @@ def main():
 
     for f in os.listdir(fonts_dir):
         full_path = os.path.join(fonts_dir, f)
-        if os.path.isfile(full_path) and f.endswith(font_ext):
-            fonts[f] = symbol.load_font(full_path)
+        if os.path.isfile(full_path) and f.endswith(
+            (symbol.font_ext, symbol.compiled_font_ext)
+        ):
+            fonts[f] = symbol.load_any_font(full_path)
 
     if splash_screen_length > 0:
         time.sleep(splash_screen_length)
@@ -1720,6 +2533,8 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
     try:
         main()
     except Exception as e:
@@ -23,6 +23,8 @@ class ToolboxTool(enum.Enum):
     Bucket = enum.auto()
     Eraser = enum.auto()
     Line = enum.auto()
+    Rectangle = enum.auto()
+    Ellipse = enum.auto()
     ColorPicker = enum.auto()
     Selection = enum.auto()
 
@@ -35,8 +37,23 @@ class Command(abc.ABC):
 
 
 from .pixel import PixelModel
-from .scanline import ScanlineModel
-from .playfield import PlayfieldModel
+from .scanline import (
+    ScanlineModel,
+    to_mask,
+    from_mask,
+    wrap_mask,
+    mask_bits,
+    mask_runs,
+    rotate_mask,
+    registers,
+    from_registers,
+)
+from .animation import AnimationModel, Row
+from .snapshot import Snapshot
+from .runs import RunIndex
+from .selection import SelectionModel
+from .shape import ShapeModel, line_masks, rectangle_masks, ellipse_masks
+from .playfield import PlayfieldModel, expand_rows
 from .palette import PaletteModel
 
 
@@ -45,15 +62,16 @@ def init_model(model_cls, **model_kwargs):
         @wraps(f)
         def wrapper(self, *args, **kwargs):
             model_fields = set(map(lambda fld: fld.name, fields(model_cls)))
+            model_kwargs_ = dict(model_kwargs)
             widget_kwargs = {}
 
             for k, v in kwargs.items():
                 if k in model_fields:
-                    model_kwargs[k] = v
+                    model_kwargs_[k] = v
                 else:
                     widget_kwargs[k] = v
 
-            self.model = model_cls(**model_kwargs)
+            self.model = model_cls(**model_kwargs_)
             f(self, *args, **widget_kwargs)
 
         return wrapper
@@ -0,0 +1,60 @@
+import typing
+from dataclasses import dataclass, field
+
+from tools import ObservableProperty
+
+# pixels mask, COLUPF, COLUBK
+Row = typing.Tuple[int, int, int]
+
+
+@dataclass
+class AnimationModel:
+    rows: typing.List[Row] = field(default_factory=lambda: [])
+    frames: typing.List[typing.List[int]] = field(default_factory=lambda: [])
+    frame: ObservableProperty[int] = field(
+        default_factory=lambda: ObservableProperty(0)
+    )
+    _index: typing.Dict[Row, int] = field(default_factory=lambda: {}, repr=False)
+
+    def __post_init__(self):
+        self._index = {row: k for k, row in enumerate(self.rows)}
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def intern(self, row: Row) -> int:
+        k = self._index.get(row)
+        if k is None:
+            k = len(self.rows)
+            self.rows.append(row)
+            self._index[row] = k
+
+        return k
+
+    def frame_rows(self, k: int) -> typing.List[Row]:
+        return [self.rows[i] for i in self.frames[k]]
+
+    def set_frame_rows(self, k: int, rows: typing.Iterable[Row]):
+        self.frames[k] = [self.intern(row) for row in rows]
+
+    def insert_frame(self, k: int, rows: typing.Iterable[Row]):
+        self.frames.insert(k, [self.intern(row) for row in rows])
+
+    def duplicate_frame(self, k: int):
+        # frames only hold pool indices, so the copy shares every row
+        self.frames.insert(k + 1, list(self.frames[k]))
+
+    def delete_frame(self, k: int):
+        del self.frames[k]
+
+    def replace_rows(self, rows: typing.List[Row]):
+        """Swap the shared rows in place, frames keep pointing at the same indices."""
+        self.rows = list(rows)
+        self._index = {row: k for k, row in enumerate(self.rows)}
+
+    def compact(self):
+        used = sorted({i for frame in self.frames for i in frame})
+        remap = {old: new for new, old in enumerate(used)}
+        self.rows = [self.rows[i] for i in used]
+        self._index = {row: k for k, row in enumerate(self.rows)}
+        self.frames = [[remap[i] for i in frame] for frame in self.frames]
@@ -10,6 +10,7 @@ class PixelModel:
     default_height: typing.ClassVar[int] = 2
 
     zoom: ObservableProperty[int]
+    line_height: int = 1
 
     color: ObservableProperty[str] = field(
         default_factory=lambda: ObservableProperty("000000")
@@ -25,4 +26,4 @@ class PixelModel:
 
     @property
     def height(self):
-        return self.default_height * self.zoom.value
+        return self.default_height * self.zoom.value * self.line_height
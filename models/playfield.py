@@ -3,7 +3,24 @@ from dataclasses import dataclass, field
 
 import palettes
 from tools import ObservableProperty, CappedStack, ObservableMatrix
-from . import PlayfieldMode, ColorSystem, ScanlineModel, PixelModel, Command
+from . import (
+    PlayfieldMode,
+    ColorSystem,
+    ScanlineModel,
+    PixelModel,
+    Command,
+    AnimationModel,
+    Snapshot,
+    Row,
+    RunIndex,
+    SelectionModel,
+    ShapeModel,
+)
+
+
+def expand_rows(rows: typing.Iterable[Row], line_height: int) -> typing.List[Row]:
+    """Every scanline of the rows, each row repeated for its group."""
+    return [row for row in rows for _ in range(line_height)]
 
 
 @dataclass
@@ -12,16 +29,32 @@ class PlayfieldModel:
     min_zoom: typing.ClassVar[int] = 1
     max_zoom: typing.ClassVar[int] = 40
     max_undo_redo: typing.ClassVar[int] = 100
+    line_heights: typing.ClassVar[typing.Tuple[int, ...]] = (1, 2, 4, 8)
 
     name: str
     mode: PlayfieldMode
     color_system: ColorSystem
     scanline_count: int
     zoom: ObservableProperty[int]
+    # scanlines each stored row is displayed for
+    line_height: int = 1
     filename: str = None
     need_save: bool = False
     prev_drag_x: int = None
     prev_drag_y: int = None
+    # the shape being dragged out, committed on release
+    shape: typing.Optional[ShapeModel] = None
+    animation: typing.Optional[AnimationModel] = None
+    rows: typing.Optional[typing.List[Row]] = None
+    snapshot: typing.Optional[Snapshot] = None
+    saved_snapshot: typing.Optional[Snapshot] = None
+
+    dirty_lines: typing.Set[int] = field(default_factory=lambda: set())
+
+    selection: SelectionModel = field(default_factory=lambda: SelectionModel())
+
+    fg_runs: RunIndex = field(default_factory=lambda: RunIndex())
+    bg_runs: RunIndex = field(default_factory=lambda: RunIndex())
 
     bg_palette_code: ObservableProperty[int] = field(
         default_factory=lambda: ObservableProperty(0x00)
@@ -39,6 +72,20 @@ class PlayfieldModel:
         default_factory=lambda: CappedStack(maximum=PlayfieldModel.max_undo_redo)
     )
 
+    def __post_init__(self):
+        self.index_rows(
+            self.rows if self.rows is not None else [(0, 0, 0)] * self.scanline_count
+        )
+
+    def index_rows(self, rows: typing.Iterable[Row]):
+        rows = list(rows)
+        self.fg_runs.reset(code for _, code, __ in rows)
+        self.bg_runs.reset(bg_code for _, __, bg_code in rows)
+
+    def index_row(self, y: int, code: int, bg_code: int):
+        self.fg_runs.set(y, code)
+        self.bg_runs.set(y, bg_code)
+
     def undo(self):
         if not self.undo_commands.empty():
             command = self.undo_commands.pop()
@@ -63,15 +110,14 @@ class PlayfieldModel:
             if invert:
                 self.undo_commands.push(invert)
 
-    def neighbor(self, x: int) -> typing.Optional[int]:
+    def neighbor_mask(self, mask: int) -> int:
         if self.mode == PlayfieldMode.Asymmetric:
-            return None
+            return 0x00
 
-        return (
-            ScanlineModel.pixel_count - x - 1
-            if self.mode == PlayfieldMode.Mirror
-            else (x + 20 if x < 20 else x - 20)
-        )
+        if self.mode == PlayfieldMode.Mirror:
+            return int(f"{mask:040b}"[::-1], 2)
+
+        return ((mask & 0xFFFFF) << 20) | (mask >> 20)
 
     def zoom_in(self) -> int:
         if self.zoom.value < self.max_zoom:
@@ -93,6 +139,10 @@ class PlayfieldModel:
     def width(self):
         return ScanlineModel.pixel_count * PixelModel.default_width * self.zoom.value
 
+    @property
+    def line_count(self) -> int:
+        return self.scanline_count * self.line_height
+
     @property
     def height(self):
-        return self.scanline_count * PixelModel.default_height * self.zoom.value
+        return self.line_count * PixelModel.default_height * self.zoom.value
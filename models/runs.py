@@ -0,0 +1,83 @@
+import typing
+from bisect import bisect_right
+
+
+class RunIndex:
+    """Runs of equal values over consecutive scanlines, located by bisection."""
+
+    def __init__(self, values: typing.Iterable[int] = ()):
+        self.starts: typing.List[int] = []
+        self.values: typing.List[int] = []
+        self.length = 0
+        self.reset(values)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[int, int, int]]:
+        ends = self.starts[1:] + [self.length]
+        return zip(self.starts, ends, self.values)
+
+    def __getitem__(self, j: int) -> int:
+        return self.values[self._run(j)]
+
+    def reset(self, values: typing.Iterable[int]):
+        self.starts = []
+        self.values = []
+        self.length = 0
+
+        for j, value in enumerate(values):
+            if not self.values or self.values[-1] != value:
+                self.starts.append(j)
+                self.values.append(value)
+            self.length = j + 1
+
+    def run_at(self, j: int) -> typing.Tuple[int, int, int]:
+        k = self._run(j)
+        end = self.starts[k + 1] if k + 1 < len(self.starts) else self.length
+        return self.starts[k], end, self.values[k]
+
+    def set(self, j: int, value: int):
+        if self[j] != value:
+            self.set_range(j, j + 1, value)
+
+    def set_range(self, start: int, end: int, value: int):
+        if start >= end:
+            return
+
+        first = self._run(start)
+        last = self._run(end - 1)
+
+        starts = [start]
+        values = [value]
+
+        if self.starts[first] < start:
+            starts.insert(0, self.starts[first])
+            values.insert(0, self.values[first])
+
+        next_start = self.starts[last + 1] if last + 1 < len(self.starts) else None
+        if end < (self.length if next_start is None else next_start):
+            starts.append(end)
+            values.append(self.values[last])
+
+        # merge with the runs around the replaced span
+        lo = max(first - 1, 0)
+        hi = last + 2
+        starts = self.starts[lo:first] + starts + self.starts[last + 1 : hi]
+        values = self.values[lo:first] + values + self.values[last + 1 : hi]
+
+        merged_starts = []
+        merged_values = []
+        for s, v in zip(starts, values):
+            if not merged_values or merged_values[-1] != v:
+                merged_starts.append(s)
+                merged_values.append(v)
+
+        self.starts[lo:hi] = merged_starts
+        self.values[lo:hi] = merged_values
+
+    def _run(self, j: int) -> int:
+        if j < 0 or j >= self.length:
+            raise IndexError(j)
+
+        return bisect_right(self.starts, j) - 1
@@ -2,8 +2,118 @@ import typing
 from dataclasses import dataclass, field
 
 from tools import ObservableProperty
+from . import PlayfieldMode
 
 default_pixel_count = 40
+half_pixel_count = default_pixel_count // 2
+full_mask = (1 << default_pixel_count) - 1
+
+
+def to_mask(values: typing.Iterable[bool]) -> int:
+    mask = 0
+    for i, value in enumerate(values):
+        if value:
+            mask |= 1 << i
+
+    return mask
+
+
+def from_mask(mask: int) -> typing.List[bool]:
+    return [mask & (1 << i) != 0 for i in range(default_pixel_count)]
+
+
+_reversed_bytes = [int(f"{b:08b}"[::-1], 2) for b in range(0x100)]
+
+
+def registers(mask: int) -> typing.Tuple[int, int, int, int, int, int]:
+    """PF0, PF1, PF2 for the left half followed by the right half of a row mask."""
+    return (
+        (mask & 0x0F) << 4,
+        _reversed_bytes[(mask >> 4) & 0xFF],
+        (mask >> 12) & 0xFF,
+        ((mask >> 20) & 0x0F) << 4,
+        _reversed_bytes[(mask >> 24) & 0xFF],
+        (mask >> 32) & 0xFF,
+    )
+
+
+def from_registers(
+    pf0: int, pf1: int, pf2: int, pf0_right: int, pf1_right: int, pf2_right: int
+) -> int:
+    """Row mask of register values, the inverse of registers."""
+
+    def half(a: int, b: int, c: int) -> int:
+        return ((a >> 4) & 0x0F) | (_reversed_bytes[b & 0xFF] << 4) | ((c & 0xFF) << 12)
+
+    return half(pf0, pf1, pf2) | (half(pf0_right, pf1_right, pf2_right) << 20)
+
+
+def wrap_mask(mask: int) -> int:
+    wrapped = 0
+    while mask:
+        wrapped |= mask & full_mask
+        mask >>= default_pixel_count
+
+    return wrapped
+
+
+def rotate_mask(mask: int, n: int) -> int:
+    """Rotates towards higher pixel indices, wrapping around the row."""
+    n %= default_pixel_count
+    return ((mask << n) | (mask >> (default_pixel_count - n))) & full_mask
+
+
+def mask_runs(mask: int) -> typing.Generator[typing.Tuple[int, int], None, None]:
+    """(start, end) pairs of every run of set bits, end exclusive."""
+    i = 0
+    while mask:
+        low = (mask & -mask).bit_length() - 1
+        mask >>= low
+        i += low
+        length = (~mask & (mask + 1)).bit_length() - 1
+        yield i, i + length
+        mask >>= length
+        i += length
+
+
+def mask_bits(mask: int) -> typing.Generator[int, None, None]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class DerivedPixels:
+    """Full width view over the left half of a Symmetric or Mirror row.
+
+    The right half is not stored, reading it reads the left pixel the TIA repeats or
+    reflects there and writing it writes that pixel.
+    """
+
+    __slots__ = ("cells", "mirror")
+
+    def __init__(self, cells: typing.List[bool], mirror: bool):
+        self.cells = cells
+        self.mirror = mirror
+
+    def cell(self, x: int) -> int:
+        if x < half_pixel_count:
+            return x
+
+        return default_pixel_count - x - 1 if self.mirror else x - half_pixel_count
+
+    def __len__(self) -> int:
+        return default_pixel_count
+
+    def __getitem__(self, x: int) -> bool:
+        return self.cells[self.cell(x)]
+
+    def __setitem__(self, x: int, value: bool):
+        self.cells[self.cell(x)] = value
+
+    def __iter__(self) -> typing.Iterator[bool]:
+        yield from self.cells
+        yield from reversed(self.cells) if self.mirror else self.cells
 
 
 @dataclass
@@ -29,58 +139,51 @@ class ScanlineModel:
         default_factory=lambda: [False for _ in range(default_pixel_count)]
     )
 
-    pixels: typing.List[bool] = field(
-        default_factory=lambda: [False for _ in range(default_pixel_count)]
+    # shown instead of the line's color while floating pixels carry their own
+    layer_1_palette_code: typing.Optional[int] = None
+
+    mode: PlayfieldMode = PlayfieldMode.Asymmetric
+    line_height: int = 1
+
+    # the stored pixels, only the left half unless the row is Asymmetric
+    cells: typing.List[bool] = None
+
+    _derived: typing.Optional[DerivedPixels] = field(
+        default=None, init=False, repr=False
     )
 
-    def clear_selection(self) -> typing.Set[int]:
-        mods = set()
-        for i in range(default_pixel_count):
-            if self.selection[i]:
-                self.selection[i] = False
-                if self.layer_1[i]:
-                    self.layer_1[i] = False
-                    self.pixels[i] = True
-                    mods.add(i)
-
-        return mods
-
-    def copy_selection(self):
-        for i in range(default_pixel_count):
-            if self.selection[i]:
-                if self.layer_1[i]:
-                    self.pixels[i] = True
-                elif self.pixels[i]:
-                    self.layer_1[i] = True
-
-    def cut_selection(self) -> typing.Set[int]:
-        mods = set()
-        for i in range(default_pixel_count):
-            if self.selection[i] and self.pixels[i]:
-                self.layer_1[i] = self.pixels[i]
-                self.pixels[i] = False
-                mods.add(i)
-
-        return mods
-
-    def delete_selection(self) -> typing.Set[int]:
-        mods = set()
-        for i in range(default_pixel_count):
-            if self.selection[i]:
-                self.layer_1[i] = False
-                self.pixels[i] = False
-                mods.add(i)
-            self.selection[i] = False
-
-        return mods
-
-    def rotate_right(self):
-        self.selection = self.selection[-1:] + self.selection[:-1]
-        self.layer_1 = self.layer_1[-1:] + self.layer_1[:-1]
-
-    def rotate_left(self):
-        self.selection = self.selection[1:] + self.selection[:1]
-        self.layer_1 = self.layer_1[1:] + self.layer_1[:1]
+    def __post_init__(self):
+        if self.cells is None:
+            self.cells = [False for _ in range(self.cell_count)]
+
+        if self.mode != PlayfieldMode.Asymmetric:
+            self._derived = DerivedPixels(
+                self.cells, mirror=self.mode == PlayfieldMode.Mirror
+            )
+
+    @property
+    def cell_count(self) -> int:
+        return (
+            default_pixel_count
+            if self.mode == PlayfieldMode.Asymmetric
+            else half_pixel_count
+        )
+
+    @property
+    def pixels(self) -> typing.MutableSequence[bool]:
+        return self._derived if self._derived else self.cells
+
+    @pixels.setter
+    def pixels(self, values: typing.Sequence[bool]):
+        if not self._derived:
+            self.cells[:] = values
+            return
+
+        # a changed pixel changes the stored one it derives from, whichever half
+        # it was changed in
+        for x, (value, current) in enumerate(zip(values, list(self._derived))):
+            if value != current:
+                self._derived[x] = value
 
     def update(self, color: int = None, bg_color: int = None):
         if color is not None and bg_color is not None:
@@ -95,6 +198,12 @@ class ScanlineModel:
     def color(self) -> int:
         return self.color_mapping[self.palette_code.value]
 
+    @property
+    def layer_1_color(self) -> int:
+        if self.layer_1_palette_code is None:
+            return self.color
+        return self.color_mapping[self.layer_1_palette_code]
+
     @property
     def bg_color(self) -> int:
         return self.color_mapping[self.bg_palette_code.value]
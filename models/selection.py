@@ -0,0 +1,75 @@
+import typing
+from dataclasses import dataclass, field
+
+from .scanline import rotate_mask
+
+
+@dataclass
+class SelectionModel:
+    """Selected and floating pixel masks, kept only for the rows involved."""
+
+    selected: typing.Dict[int, int] = field(default_factory=lambda: {})
+    floating: typing.Dict[int, int] = field(default_factory=lambda: {})
+    # the color each row's floating pixels carry until they are committed
+    codes: typing.Dict[int, int] = field(default_factory=lambda: {})
+
+    def empty(self) -> bool:
+        return not self.selected and not self.floating
+
+    def rows(self) -> typing.List[int]:
+        return sorted(self.selected.keys() | self.floating.keys())
+
+    def get(self, y: int) -> typing.Tuple[int, int]:
+        return self.selected.get(y, 0), self.floating.get(y, 0)
+
+    def set(
+        self, y: int, selected: int, floating: int, code: typing.Optional[int] = None
+    ):
+        for masks, mask in ((self.selected, selected), (self.floating, floating)):
+            if mask:
+                masks[y] = mask
+            else:
+                masks.pop(y, None)
+
+        if not floating:
+            self.codes.pop(y, None)
+        elif code is not None:
+            self.codes[y] = code
+
+    def select(self, y: int, mask: int):
+        selected, floating = self.get(y)
+        self.set(y, selected | mask, floating)
+
+    def stamp(self, y: int, mask: int, code: typing.Optional[int] = None):
+        selected, floating = self.get(y)
+        self.set(y, selected | mask, floating | mask, code)
+
+    @property
+    def bounds(self) -> typing.Optional[typing.Tuple[int, int, int, int]]:
+        """(top, left, bottom, right), inclusive."""
+        rows = self.rows()
+        if not rows:
+            return None
+
+        combined = 0
+        for y in rows:
+            selected, floating = self.get(y)
+            combined |= selected | floating
+
+        left = (combined & -combined).bit_length() - 1
+        right = combined.bit_length() - 1
+        return rows[0], left, rows[-1], right
+
+    def shift_rows(self, dy: int, count: int):
+        self.selected = {(y + dy) % count: m for y, m in self.selected.items()}
+        self.floating = {(y + dy) % count: m for y, m in self.floating.items()}
+        self.codes = {(y + dy) % count: c for y, c in self.codes.items()}
+
+    def shift_columns(self, dx: int):
+        self.selected = {y: rotate_mask(m, dx) for y, m in self.selected.items()}
+        self.floating = {y: rotate_mask(m, dx) for y, m in self.floating.items()}
+
+    def clear(self):
+        self.selected = {}
+        self.floating = {}
+        self.codes = {}
@@ -0,0 +1,92 @@
+import math
+import typing
+from dataclasses import dataclass, field
+
+from . import ToolboxTool
+
+
+def line_masks(y0: int, x0: int, y1: int, x1: int) -> typing.Dict[int, int]:
+    """Bresenham line between the cells, as row masks."""
+    masks = {}
+    dx, dy = abs(x1 - x0), -abs(y1 - y0)
+    sx, sy = (1 if x1 > x0 else -1), (1 if y1 > y0 else -1)
+    error = dx + dy
+    x, y = x0, y0
+
+    while True:
+        masks[y] = masks.get(y, 0) | (1 << x)
+        if x == x1 and y == y1:
+            return masks
+
+        e2 = 2 * error
+        if e2 >= dy:
+            error += dy
+            x += sx
+        if e2 <= dx:
+            error += dx
+            y += sy
+
+
+def _span(left: int, right: int) -> int:
+    return ((1 << (right - left + 1)) - 1) << left if right >= left else 0
+
+
+def _outline(masks: typing.Mapping[int, int]) -> typing.Dict[int, int]:
+    """The cells of a filled shape with an empty cell next to them."""
+    return {
+        y: mask
+        & ~(masks.get(y - 1, 0) & masks.get(y + 1, 0) & (mask << 1) & (mask >> 1))
+        for y, mask in masks.items()
+    }
+
+
+def rectangle_masks(
+    y0: int, x0: int, y1: int, x1: int, filled: bool = False
+) -> typing.Dict[int, int]:
+    top, bottom = sorted((y0, y1))
+    row = _span(*sorted((x0, x1)))
+    masks = {y: row for y in range(top, bottom + 1)}
+    return masks if filled else _outline(masks)
+
+
+def ellipse_masks(
+    y0: int, x0: int, y1: int, x1: int, filled: bool = False
+) -> typing.Dict[int, int]:
+    """Ellipse inscribed in the box the cells span."""
+    top, bottom = sorted((y0, y1))
+    left, right = sorted((x0, x1))
+    cy, cx = (top + bottom) / 2, (left + right) / 2
+    # measured to the cell edges, a one cell wide box is still an ellipse
+    ry, rx = (bottom - top + 1) / 2, (right - left + 1) / 2
+
+    masks = {}
+    for y in range(top, bottom + 1):
+        half = rx * math.sqrt(max(0.0, 1 - ((y - cy) / ry) ** 2))
+        masks[y] = _span(
+            max(left, math.ceil(cx - half)), min(right, math.floor(cx + half))
+        )
+
+    return masks if filled else _outline(masks)
+
+
+@dataclass
+class ShapeModel:
+    # the cell the drag started on
+    y: int
+    x: int
+    tool: ToolboxTool
+    filled: bool = False
+    # whether the shape draws or erases
+    status: bool = True
+    masks: typing.Dict[int, int] = field(default_factory=lambda: {})
+
+    def drag_to(self, y: int, x: int) -> typing.Dict[int, int]:
+        if self.tool == ToolboxTool.Rectangle:
+            masks = rectangle_masks(self.y, self.x, y, x, filled=self.filled)
+        elif self.tool == ToolboxTool.Ellipse:
+            masks = ellipse_masks(self.y, self.x, y, x, filled=self.filled)
+        else:
+            masks = line_masks(self.y, self.x, y, x)
+
+        self.masks = {j: mask for j, mask in masks.items() if mask}
+        return self.masks
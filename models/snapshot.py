@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import typing
+from dataclasses import dataclass
+
+from .animation import Row
+
+chunk_size = 32
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable playfield rows, stored in fixed size chunks shared between snapshots."""
+
+    chunks: typing.Tuple[typing.Tuple[Row, ...], ...]
+    length: int
+
+    @classmethod
+    def from_rows(cls, rows: typing.Sequence[Row]) -> Snapshot:
+        rows = tuple(rows)
+        return cls(
+            chunks=tuple(
+                rows[i : i + chunk_size] for i in range(0, len(rows), chunk_size)
+            ),
+            length=len(rows),
+        )
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, j: int) -> Row:
+        return self.chunks[j // chunk_size][j % chunk_size]
+
+    def __iter__(self) -> typing.Iterator[Row]:
+        for chunk in self.chunks:
+            yield from chunk
+
+    def replace(self, changes: typing.Mapping[int, Row]) -> Snapshot:
+        if not changes:
+            return self
+
+        chunks = list(self.chunks)
+        touched = {}
+
+        for j, row in changes.items():
+            k = j // chunk_size
+            chunk = touched.get(k)
+            if chunk is None:
+                chunk = touched[k] = list(chunks[k])
+            chunk[j % chunk_size] = row
+
+        for k, chunk in touched.items():
+            chunks[k] = tuple(chunk)
+
+        return Snapshot(chunks=tuple(chunks), length=self.length)
+
+    def diff(self, other: Snapshot) -> typing.List[int]:
+        if self.length != other.length:
+            return list(range(max(self.length, other.length)))
+
+        lines = []
+
+        for k, (a, b) in enumerate(zip(self.chunks, other.chunks)):
+            if a is b:
+                continue
+
+            for i, (row_a, row_b) in enumerate(zip(a, b)):
+                if row_a != row_b:
+                    lines.append(k * chunk_size + i)
+
+        return lines
@@ -0,0 +1,157 @@
+import re
+import typing
+from dataclasses import dataclass, field
+
+from models import PlayfieldMode, Row, registers
+
+page_size = 0x100
+default_origin = 0xF000
+
+
+class Table(typing.NamedTuple):
+    label: str
+    data: typing.List[int]
+
+
+@dataclass
+class Bin:
+    address: int
+    capacity: int
+    tables: typing.List[typing.Tuple[int, Table]] = field(default_factory=lambda: [])
+    used: int = 0
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.used
+
+    def add(self, table: Table) -> int:
+        address = self.address + self.used
+        self.tables.append((address, table))
+        self.used += len(table.data)
+        return address
+
+
+def label_prefix(name: str, taken: typing.Set[str]) -> str:
+    prefix = re.sub(r"\W", "", name) or "Playfield"
+    if prefix[0].isdigit():
+        prefix = "_" + prefix
+
+    unique = prefix
+    k = 2
+    while unique in taken:
+        unique = f"{prefix}{k}"
+        k += 1
+
+    taken.add(unique)
+    return unique
+
+
+def register_tables(
+    rows: typing.Sequence[Row], mode: PlayfieldMode, prefix: str = "Data"
+) -> typing.List[Table]:
+    """The registers export tables, PF tables interleave both halves when asymmetric.
+
+    Interleaved tables that would not fit in a page are split into PFn and PFnR.
+    """
+    asymmetric = mode == PlayfieldMode.Asymmetric
+    split = asymmetric and 2 * len(rows) > page_size
+    values = [registers(mask) for mask, _, _ in rows]
+
+    tables = []
+    for k in range(3):
+        if split:
+            tables.append(Table(f"{prefix}PF{k}", [v[k] for v in values]))
+            tables.append(Table(f"{prefix}PF{k}R", [v[k + 3] for v in values]))
+        elif asymmetric:
+            tables.append(
+                Table(f"{prefix}PF{k}", [b for v in values for b in (v[k], v[k + 3])])
+            )
+        else:
+            tables.append(Table(f"{prefix}PF{k}", [v[k] for v in values]))
+
+    tables.append(Table(f"{prefix}COLUPF", [code for _, code, _ in rows]))
+    tables.append(Table(f"{prefix}COLUBK", [bg_code for _, _, bg_code in rows]))
+
+    return tables
+
+
+def pack_tables(
+    tables: typing.Iterable[Table], origin: int = default_origin
+) -> typing.List[Bin]:
+    """Best fit decreasing placement of tables into pages so that no table crosses one.
+
+    Tables longer than a page can't avoid crossing, they start on a page of their own
+    and their last page stays open for smaller tables.
+    """
+    if origin % page_size:
+        raise ValueError(f"Origin ${origin:04X} is not page aligned")
+
+    bins: typing.List[Bin] = []
+    address = origin
+
+    def open_bin(size: int) -> Bin:
+        nonlocal address
+        capacity = -(-max(size, 1) // page_size) * page_size
+        b = Bin(address=address, capacity=capacity)
+        bins.append(b)
+        address += capacity
+        return b
+
+    for table in sorted(tables, key=lambda t: len(t.data), reverse=True):
+        size = len(table.data)
+
+        if size > page_size:
+            open_bin(size).add(table)
+            continue
+
+        fitting = [b for b in bins if b.free >= size]
+        b = min(fitting, key=lambda b: b.free) if fitting else open_bin(size)
+        b.add(table)
+
+    return bins
+
+
+def crossing(address: int, size: int) -> bool:
+    return size > 0 and address // page_size != (address + size - 1) // page_size
+
+
+def placement_report(bins: typing.Sequence[Bin]) -> typing.List[str]:
+    lines = []
+
+    for b in bins:
+        labels = ", ".join(f"{t.label} ({len(t.data)})" for _, t in b.tables)
+        lines.append(
+            f"${b.address:04X}-${b.address + b.capacity - 1:04X}: {labels}, "
+            f"{b.free} bytes free"
+        )
+
+    spanning = [
+        t.label
+        for b in bins
+        for address, t in b.tables
+        if crossing(address, len(t.data))
+    ]
+    used = sum(b.used for b in bins)
+    total = sum(b.capacity for b in bins)
+
+    lines.append(f"{used} bytes in {total // page_size} pages, {total - used} wasted")
+    if spanning:
+        lines.append(f"longer than a page: {', '.join(spanning)}")
+
+    return lines
+
+
+def packed_asm(
+    bins: typing.Sequence[Bin],
+    format_bytes: typing.Callable[[typing.List[int]], typing.List[str]],
+) -> typing.List[str]:
+    data = [f"\t; {line}" for line in placement_report(bins)]
+
+    for k, b in enumerate(bins):
+        data.append(f"\n\tORG ${b.address:04X}" if k == 0 else "\n\tALIGN 256")
+
+        for _, table in b.tables:
+            data.append(f"{table.label}:")
+            data.extend(format_bytes(table.data))
+
+    return data
@@ -1,72 +1,189 @@
 import json
 import typing
 
-from models import ScanlineModel, PlayfieldMode, ColorSystem
+from models import (
+    ScanlineModel,
+    PlayfieldMode,
+    ColorSystem,
+    AnimationModel,
+    Row,
+    from_mask,
+)
 from widgets import WPlayfield
 
 
-def serialize_playfield(pf: WPlayfield, version: str) -> typing.Mapping:
-    scanlines = []
-
-    for j in range(pf.model.scanline_count):
-        line = pf[j]
-        line_data = [
-            0x00,
-            0x00,
-            0x00,
-            0x00,
-            0x00,
-            line.model.palette_code.value,
-            line.model.bg_palette_code.value,
-        ]
-
-        for i in range(ScanlineModel.pixel_count):
-            if line.model.pixels[i]:
-                line_data[int(i / 8)] = line_data[int(i / 8)] | (0x80 >> int(i % 8))
-
-        scanlines.append(line_data)
+def pack_scanline(
+    pixels: typing.Sequence[bool], palette_code: int, bg_palette_code: int
+) -> typing.List[int]:
+    line_data = [
+        0x00,
+        0x00,
+        0x00,
+        0x00,
+        0x00,
+        palette_code,
+        bg_palette_code,
+    ]
+
+    for i in range(ScanlineModel.pixel_count):
+        if pixels[i]:
+            line_data[int(i / 8)] = line_data[int(i / 8)] | (0x80 >> int(i % 8))
+
+    return line_data
+
+
+def unpack_scanline(line_data: typing.Sequence[int]) -> Row:
+    mask = 0
+    for i in range(ScanlineModel.pixel_count):
+        if line_data[int(i / 8)] & (0x80 >> int(i % 8)):
+            mask |= 1 << i
+
+    return mask, line_data[5], line_data[6]
+
+
+def serialize_animation(animation: AnimationModel) -> typing.Mapping:
+    animation.compact()
 
     return {
+        "frame": animation.frame.value,
+        "frames": animation.frames,
+        "rows": [
+            pack_scanline(
+                pixels=from_mask(mask), palette_code=code, bg_palette_code=bg_code
+            )
+            for mask, code, bg_code in animation.rows
+        ],
+    }
+
+
+def serialize_scanlines(
+    name: str,
+    mode: PlayfieldMode,
+    color_system: ColorSystem,
+    scanlines: typing.List[typing.List[int]],
+    version: str,
+    line_height: int = 1,
+) -> typing.Mapping:
+    data = {
         "version": version,
-        "name": pf.model.name,
-        "mode": pf.model.mode.name,
-        "color_system": pf.model.color_system.name,
+        "name": name,
+        "mode": mode.name,
+        "color_system": color_system.name,
         "scanlines": scanlines,
     }
 
+    # one stored scanline per group of line_height displayed ones
+    if line_height > 1:
+        data["line_height"] = line_height
+
+    return data
+
+
+def serialize_playfield(pf: WPlayfield, version: str) -> typing.Mapping:
+    rows = pf.capture_rows()
+    scanlines = [
+        pack_scanline(
+            pixels=from_mask(mask), palette_code=code, bg_palette_code=bg_code
+        )
+        for mask, code, bg_code in rows
+    ]
+
+    data = serialize_scanlines(
+        name=pf.model.name,
+        mode=pf.model.mode,
+        color_system=pf.model.color_system,
+        scanlines=scanlines,
+        version=version,
+        line_height=pf.model.line_height,
+    )
+
+    animation = pf.model.animation
+    if animation:
+        animation.set_frame_rows(animation.frame.value, rows)
+        data.update(serialize_animation(animation))
+
+    return data
 
-def deserialize_playfield(data: typing.Mapping, *args, **kwargs) -> WPlayfield:
-    scanlines_data = data["scanlines"]
 
+def decode_playfield(data: typing.Mapping) -> typing.Mapping:
+    """Plain, picklable playfield data that can be decoded away from the GUI thread."""
+    return {
+        "name": data["name"],
+        "mode": data["mode"],
+        "color_system": data["color_system"],
+        "line_height": data.get("line_height", 1),
+        "rows": [unpack_scanline(line_data) for line_data in data["scanlines"]],
+        "animation": (
+            {
+                "frame": data.get("frame", 0),
+                "frames": data["frames"],
+                "rows": [unpack_scanline(line_data) for line_data in data["rows"]],
+            }
+            if "frames" in data
+            else None
+        ),
+    }
+
+
+def build_playfield(decoded: typing.Mapping, *args, **kwargs) -> WPlayfield:
     pf = WPlayfield(
-        name=data["name"],
-        mode=PlayfieldMode[data["mode"]],
-        color_system=ColorSystem[data["color_system"]],
-        scanline_count=len(scanlines_data),
+        name=decoded["name"],
+        mode=PlayfieldMode[decoded["mode"]],
+        color_system=ColorSystem[decoded["color_system"]],
+        scanline_count=len(decoded["rows"]),
+        line_height=decoded.get("line_height", 1),
+        rows=list(decoded["rows"]),
         *args,
         **kwargs,
     )
 
-    for j in range(pf.model.scanline_count):
-        line = pf[j]
-        line_data = scanlines_data[j]
+    if decoded["animation"]:
+        animation = AnimationModel(
+            rows=list(decoded["animation"]["rows"]),
+            frames=[list(frame) for frame in decoded["animation"]["frames"]],
+        )
+        animation.frame.value = decoded["animation"]["frame"]
+        pf.model.animation = animation
 
-        for i in range(ScanlineModel.pixel_count):
-            line.model.pixels[i] = line_data[int(i / 8)] & (0x80 >> int(i % 8)) != 0
+    return pf
 
-        line.model.palette_code.value = line_data[5]
-        line.model.bg_palette_code.value = line_data[6]
 
-    return pf
+def deserialize_playfield(data: typing.Mapping, *args, **kwargs) -> WPlayfield:
+    return build_playfield(decode_playfield(data), *args, **kwargs)
 
 
-def save_playfield(pf: WPlayfield, to: str, version: str):
-    data = serialize_playfield(pf=pf, version=version)
+def save_data(data: typing.Mapping, to: str):
     with open(to, "w") as f:
         json.dump(obj=data, fp=f, sort_keys=True, indent=4)
 
 
-def load_playfield(from_: str, *args, **kwargs) -> WPlayfield:
+def save_decoded(decoded: typing.Mapping, to: str, version: str):
+    save_data(
+        data=serialize_scanlines(
+            name=decoded["name"],
+            mode=PlayfieldMode[decoded["mode"]],
+            color_system=ColorSystem[decoded["color_system"]],
+            scanlines=[
+                pack_scanline(
+                    pixels=from_mask(mask), palette_code=code, bg_palette_code=bg_code
+                )
+                for mask, code, bg_code in decoded["rows"]
+            ],
+            version=version,
+            line_height=decoded.get("line_height", 1),
+        ),
+        to=to,
+    )
+
+
+def save_playfield(pf: WPlayfield, to: str, version: str):
+    save_data(data=serialize_playfield(pf=pf, version=version), to=to)
+
+
+def read_playfield(from_: str) -> typing.Mapping:
     with open(from_) as file:
-        data = json.load(file)
-        return deserialize_playfield(data, *args, **kwargs)
+        return decode_playfield(json.load(file))
+
+
+def load_playfield(from_: str, *args, **kwargs) -> WPlayfield:
+    return build_playfield(read_playfield(from_), *args, **kwargs)
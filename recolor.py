@@ -0,0 +1,154 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import typing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import numpy as np
+
+from importer import palette_array, rgb_to_lab
+from models import ColorSystem, Row
+from persistency import save_data
+
+project_ext = ".pppp"
+
+# COLUPF and COLUBK in a packed scanline
+_code_columns = [5, 6]
+
+
+@lru_cache(maxsize=None)
+def lut(from_: ColorSystem, to: ColorSystem) -> np.ndarray:
+    """Perceptually nearest code in `to` for every code of `from_`, indexed by code >> 1."""
+    _, from_colors = palette_array(from_)
+    to_codes, to_colors = palette_array(to)
+
+    # SECAM repeats its colors, a nearest match could pick a different code
+    if from_ == to:
+        to_codes.setflags(write=False)
+        return to_codes
+
+    a = rgb_to_lab(from_colors)
+    b = rgb_to_lab(to_colors)
+    distances = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+
+    table = to_codes[distances.argmin(axis=1)]
+    table.setflags(write=False)
+    return table
+
+
+def convert_codes(codes: np.ndarray, from_: ColorSystem, to: ColorSystem) -> np.ndarray:
+    # the TIA ignores the lowest bit of a color
+    return lut(from_, to)[(np.asarray(codes, dtype=np.uint8) >> 1) & 0x7F]
+
+
+def convert_rows(
+    rows: typing.Sequence[Row], from_: ColorSystem, to: ColorSystem
+) -> typing.List[Row]:
+    if not rows:
+        return []
+
+    codes = convert_codes([row[1:] for row in rows], from_, to).tolist()
+    return [
+        (mask, code, bg_code) for (mask, _, __), (code, bg_code) in zip(rows, codes)
+    ]
+
+
+def convert_data(data: typing.Mapping, to: ColorSystem) -> typing.Mapping:
+    """A copy of serialized project data with every line recolored for the system."""
+    from_ = ColorSystem[data["color_system"]]
+    converted = copy.deepcopy(dict(data))
+    converted["color_system"] = to.name
+
+    for key in ("scanlines", "rows"):
+        if converted.get(key):
+            lines = np.array(converted[key], dtype=np.uint8)
+            lines[:, _code_columns] = convert_codes(lines[:, _code_columns], from_, to)
+            converted[key] = lines.tolist()
+
+    return converted
+
+
+def convert_file(from_: str, to: str, color_system: ColorSystem) -> str:
+    with open(from_) as file:
+        data = json.load(file)
+
+    save_data(data=convert_data(data, color_system), to=to)
+    return to
+
+
+def project_files(
+    paths: typing.Iterable[str],
+) -> typing.List[typing.Tuple[str, str]]:
+    """(path, relative path) of the projects given, directories searched recursively."""
+    files = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                (os.path.join(root, f), os.path.relpath(os.path.join(root, f), path))
+                for root, _, names in sorted(os.walk(path))
+                for f in sorted(names)
+                if f.lower().endswith(project_ext)
+            )
+        else:
+            files.append((path, os.path.basename(path)))
+
+    return files
+
+
+def convert_files(
+    sources: typing.Iterable[typing.Tuple[str, str]],
+    color_system: ColorSystem,
+    workers: typing.Optional[int] = None,
+) -> typing.Generator[typing.Tuple[str, typing.Optional[Exception]], None, None]:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(convert_file, from_, to, color_system): from_
+            for from_, to in sources
+        }
+
+        for future in as_completed(futures):
+            yield futures[future], future.exception()
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Convert PPPP projects to another color system"
+    )
+    parser.add_argument("paths", nargs="+", help="Projects or folders of projects")
+    parser.add_argument(
+        "--color-system", choices=[c.name for c in ColorSystem], required=True
+    )
+    parser.add_argument(
+        "-o", "--output", help="Save the converted projects here instead of in place"
+    )
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    sources = []
+    for source, relative in project_files(args.paths):
+        to = source
+        if args.output:
+            to = os.path.join(args.output, relative)
+            os.makedirs(os.path.dirname(to), exist_ok=True)
+        sources.append((source, to))
+
+    failed = 0
+
+    for source, error in convert_files(
+        sources, color_system=ColorSystem[args.color_system], workers=args.workers
+    ):
+        if error:
+            failed += 1
+            sys.stderr.write(f"{source}: {error}\n")
+        else:
+            print(source)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+import argparse
+import os
+import sys
+import typing
+
+import numpy as np
+
+from asmimport import Block, decode_rows
+from cycles import registers_layout
+from models import ColorSystem, PlayfieldMode, Row
+
+# row interleaved layouts worth looking for, besides separate per-register tables
+scan_layouts = ("PF0_PF1_PF2", "PF0_PF1_PF2_PF0_PF1_PF2")
+
+# adjacent rows of real graphics mostly share their pixels, code and random data
+# agree on about half
+min_coherence = 0.75
+# share of the rows that must draw something
+min_fill = 0.25
+
+# zero bytes in a row that are taken for alignment padding rather than table data
+min_padding = 16
+
+_popcount = np.array([bin(v).count("1") for v in range(256)], dtype=np.uint8)
+
+
+class Candidate(typing.NamedTuple):
+    offset: int
+    size: int
+    layout: str
+    # (rows, registers) bytes in PF0, PF1, PF2 [, PF0R, PF1R, PF2R] order
+    registers: np.ndarray
+    coherence: float
+    fill: float
+
+    @property
+    def score(self) -> float:
+        return self.size * (self.coherence - 0.5) * 2 * self.fill
+
+    def rows(self) -> typing.List[Row]:
+        block = Block(label="", comments=[], lines=self.registers.tolist())
+        layout = scan_layouts[self.registers.shape[1] // 3 - 1]
+        return decode_rows(block, layout, {})[0]
+
+
+def open_rom(filename: str) -> np.ndarray:
+    if os.path.getsize(filename) == 0:
+        raise ValueError(f"{filename} is empty")
+
+    return np.memmap(filename, dtype=np.uint8, mode="r")
+
+
+def _runs(ok: np.ndarray, min_length: int) -> typing.List[typing.Tuple[int, int]]:
+    """(start, end) of every run of True at least min_length long."""
+    edges = np.diff(np.concatenate(([0], ok.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = ends - starts >= min_length
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+
+def _coherence(registers: np.ndarray) -> typing.Optional[float]:
+    """Share of the bits adjacent drawn rows agree on, blank rows are bands between
+    the art rather than part of it."""
+    bits = np.unpackbits(registers, axis=1)
+    drawn = bits.any(axis=1)
+    pairs = drawn[1:] & drawn[:-1]
+    if not pairs.any():
+        return None
+
+    return float((bits[1:] == bits[:-1])[pairs].mean())
+
+
+def _measure(registers: np.ndarray) -> typing.Tuple[float, float, int]:
+    """Vertical coherence, filled share and distinct rows of a register table."""
+    bits = np.unpackbits(registers, axis=1)
+    coherence = _coherence(registers) or 0.0
+    fill = float(bits.any(axis=1).mean())
+    distinct = len(np.unique(registers, axis=0))
+    return coherence, fill, distinct
+
+
+def _seams(pf0: np.ndarray, pf1: np.ndarray, pf2: np.ndarray) -> np.ndarray:
+    """Drawn rows whose pixels agree across the PF0|PF1 and PF1|PF2 seams."""
+    return (
+        ((pf0 >> 7) == (pf1 >> 7)) & ((pf1 & 1) == (pf2 & 1)) & ((pf0 | pf1 | pf2) != 0)
+    )
+
+
+def _candidate(
+    offset: int, size: int, layout: str, registers: np.ndarray
+) -> typing.Optional[Candidate]:
+    coherence, fill, distinct = _measure(registers)
+    if coherence < min_coherence or fill < min_fill or distinct < 3:
+        return None
+
+    return Candidate(
+        offset=offset,
+        size=size,
+        layout=layout,
+        registers=registers,
+        coherence=coherence,
+        fill=fill,
+    )
+
+
+def _interleaved(
+    data: np.ndarray, min_rows: int, max_rows: int
+) -> typing.Iterator[Candidate]:
+    for layout in scan_layouts:
+        stride = layout.count("_") + 1
+        pf0 = [k for k, r in enumerate(layout.split("_")) if r == "PF0"]
+        # a record holding PF0 twice also passes half a record late, such a run
+        # is cut short on both ends, by the half records before and after it
+        half = pf0[1] if len(pf0) > 1 else 0
+
+        for phase in range(stride):
+            count = (len(data) - phase) // stride
+            records = np.asarray(data[phase : phase + count * stride]).reshape(
+                count, stride
+            )
+            ok = ((records[:, pf0] & 0x0F) == 0).all(axis=1)
+
+            for start, end in _runs(ok, min_rows):
+                before, after = phase + start * stride - half, phase + end * stride
+                if (
+                    half
+                    and before >= 0
+                    and after < len(data)
+                    and (data[before] & 0x0F) == 0
+                    and (data[after] & 0x0F) == 0
+                ):
+                    continue
+
+                for first in range(start, end, max_rows):
+                    last = min(end, first + max_rows)
+                    if last - first < min_rows:
+                        continue
+                    found = _candidate(
+                        offset=phase + first * stride,
+                        size=(last - first) * stride,
+                        layout=layout,
+                        registers=records[first:last],
+                    )
+                    if found:
+                        yield found
+
+
+def _tables(
+    data: np.ndarray, min_rows: int, max_rows: int
+) -> typing.Iterator[Candidate]:
+    """PF0, PF1 and PF2 tables of the same length stored back to back."""
+    data = np.asarray(data)
+    ok = (data & 0x0F) == 0
+
+    # changed pixels between neighbouring bytes, tables start and end where the
+    # graphics jump and the image edges always count as one
+    jumps = np.concatenate(([8], _popcount[data[:-1] ^ data[1:]], [8])).astype(np.int32)
+    # a table may also start anywhere after alignment padding
+    zeros = np.convolve(data == 0, np.ones(min_padding, dtype=np.int32))
+    starts = jumps.copy()
+    starts[min_padding:][zeros[min_padding - 1 : len(data)] == min_padding] = 8
+
+    # running sums of the pixels neighbouring drawn bytes agree on, to tell the
+    # coherence of any table the way _coherence does
+    pairs = (data[:-1] != 0) & (data[1:] != 0)
+    agree = np.where(pairs, 8 - _popcount[data[:-1] ^ data[1:]].astype(np.int32), 0)
+    pair_sums = np.concatenate(([0], np.cumsum(pairs)))
+    agree_sums = np.concatenate(([0], np.cumsum(agree)))
+
+    for start, end in _runs(ok, min_rows):
+        # PF1 starts where PF0 values stop, or a little before when its first
+        # bytes happen to pass as PF0 too
+        splits = []
+        for pf1 in range(max(start + min_rows, end - 16), end + 1):
+            rows = np.arange(min_rows, min(max_rows, pf1 - start) + 1)
+            rows = rows[pf1 + 2 * rows <= len(data)]
+            if not len(rows):
+                continue
+
+            cuts = (
+                starts[pf1 - rows]
+                + jumps[pf1]
+                + jumps[pf1 + rows]
+                + jumps[pf1 + 2 * rows]
+            )
+            # every split of this PF1 start at once, one row of the tables per column
+            i = np.arange(rows[-1])
+            pf0 = pf1 + i[None, :] - rows[:, None]
+            seams = (
+                _seams(
+                    *(
+                        data[np.minimum(pf0 + k * rows[:, None], len(data) - 1)]
+                        for k in range(3)
+                    )
+                )
+                & (i[None, :] < rows[:, None])
+            ).sum(axis=1)
+
+            # the art has to line up across most of the rows it fills, and each
+            # table has to hold together on its own, unused ones are blank
+            keep = seams >= min_fill * rows
+            for table in pf1 + np.outer((-1, 0, 1), rows):
+                last = table + rows - 1
+                count = pair_sums[last] - pair_sums[table]
+                keep &= agree_sums[last] - agree_sums[table] >= (
+                    min_coherence * 8 * count
+                )
+
+            splits.extend(
+                zip(
+                    seams[keep].tolist(),
+                    cuts[keep].tolist(),
+                    [pf1] * int(keep.sum()),
+                    rows[keep].tolist(),
+                )
+            )
+
+        # banded art cuts as sharply inside its tables as at their ends, the rows
+        # of the right split line up across the tables instead, then come the
+        # sharpest cuts and the longest split of those, repeating art splits
+        # evenly too
+        if splits:
+            *_, pf1, rows = min(splits, key=lambda s: (-s[0], -s[1], s[2], -s[3]))
+            found = _candidate(
+                offset=pf1 - rows,
+                size=3 * rows,
+                layout=registers_layout,
+                registers=np.stack(
+                    [data[pf1 + k * rows : pf1 + (k + 1) * rows] for k in (-1, 0, 1)],
+                    axis=1,
+                ),
+            )
+            if found:
+                yield found
+
+
+def scan(
+    data: np.ndarray, min_rows: int = 8, max_rows: int = 256
+) -> typing.List[Candidate]:
+    """Plausible playfield tables in the image, best first, none overlapping."""
+    candidates = sorted(
+        list(_interleaved(data, min_rows, max_rows))
+        + list(_tables(data, min_rows, max_rows)),
+        key=lambda c: c.score,
+        reverse=True,
+    )
+
+    taken = np.zeros(len(data), dtype=bool)
+    hits = []
+    for c in candidates:
+        if not taken[c.offset : c.offset + c.size].any():
+            taken[c.offset : c.offset + c.size] = True
+            hits.append(c)
+
+    return hits
+
+
+def scan_file(filename: str, **kwargs) -> typing.List[Candidate]:
+    return scan(open_rom(filename), **kwargs)
+
+
+def decode_candidate(
+    candidate: Candidate,
+    name: str,
+    color_system: ColorSystem = ColorSystem.NTSC,
+) -> typing.Mapping:
+    """The hit as persistency.decode_playfield data."""
+    return {
+        "name": f"{name}-{candidate.offset:04X}",
+        "mode": (
+            PlayfieldMode.Asymmetric
+            if candidate.registers.shape[1] == 6
+            else PlayfieldMode.Symmetric
+        ).name,
+        "color_system": color_system.name,
+        "rows": candidate.rows(),
+        "animation": None,
+    }
+
+
+def report(candidates: typing.List[Candidate]) -> typing.List[str]:
+    return [
+        f"${c.offset:04X}  {len(c.registers):>3} rows  {c.layout:<24} "
+        f"score {c.score:6.1f}  coherence {c.coherence:.2f}  fill {c.fill:.2f}"
+        for c in candidates
+    ]
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    from main import version
+    from persistency import save_decoded
+
+    parser = argparse.ArgumentParser(
+        description="Locate playfield tables inside 2600 ROM images"
+    )
+    parser.add_argument("roms", nargs="+")
+    parser.add_argument("-o", "--output", help="Save the hits as projects here")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--min-rows", type=int, default=8)
+    parser.add_argument(
+        "--color-system",
+        choices=[c.name for c in ColorSystem],
+        default=ColorSystem.NTSC.name,
+    )
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for rom in args.roms:
+        try:
+            hits = scan_file(rom, min_rows=args.min_rows)[: args.top]
+        except (OSError, ValueError) as e:
+            failed += 1
+            sys.stderr.write(f"{e}\n")
+            continue
+
+        print(rom)
+        print("\n".join(f"\t{line}" for line in report(hits)))
+
+        if args.output:
+            os.makedirs(args.output, exist_ok=True)
+            name = os.path.splitext(os.path.basename(rom))[0]
+            for hit in hits:
+                decoded = decode_candidate(
+                    hit, name, color_system=ColorSystem[args.color_system]
+                )
+                save_decoded(
+                    decoded,
+                    to=os.path.join(args.output, f"{decoded['name']}.pppp"),
+                    version=version,
+                )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
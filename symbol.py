@@ -1,18 +1,47 @@
 from __future__ import annotations
 
 import json
+import mmap
+import os
+import struct
 import typing
 from dataclasses import dataclass, field
 
+font_ext = ".font"
+compiled_font_ext = ".pfont"
+cache_ext = ".cache"
+
+compiled_magic = b"PPPF"
+compiled_version = 1
+
+# magic, version, glyph count, source mtime
+_header = struct.Struct("<4sBxHd")
+# code point, width, height, rows offset
+_index_entry = struct.Struct("<IBBI")
+
+
+def _row_size(width: int) -> int:
+    return max(1, (width + 7) // 8)
+
 
 @dataclass
 class Symbol:
     width: int
     height: int
     pixels: typing.List[typing.Tuple[int, int]] = field(default_factory=lambda: [])
+    rows: typing.List[int] = field(default_factory=lambda: [])
+
+    def __post_init__(self):
+        if not self.rows:
+            self.rows = [0x00 for _ in range(self.height)]
 
     def add(self, y: int, x: int) -> Symbol:
         self.pixels.append((x, y))
+
+        while len(self.rows) <= y:
+            self.rows.append(0x00)
+
+        self.rows[y] |= 1 << x
         return self
 
     @classmethod
@@ -25,11 +54,60 @@ class Symbol:
 
         return sym
 
+    @classmethod
+    def from_rows(cls, width: int, height: int, rows: typing.List[int]) -> Symbol:
+        sym = cls(width=width, height=height, rows=list(rows))
+
+        for y, mask in enumerate(rows):
+            for x in range(mask.bit_length()):
+                if mask & (1 << x):
+                    sym.pixels.append((x, y))
+
+        return sym
+
+
+class Font(dict):
+    """Glyphs by character, plus a cache of strings already rendered to row masks."""
 
-def deserialize_font(
-    data: typing.Mapping, *args, **kwargs
-) -> typing.Mapping[str, Symbol]:
-    font = {}
+    def __init__(self, name: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = name
+        self._rendered = {}
+
+    def glyph(self, c: str) -> typing.Optional[Symbol]:
+        return self.get(c, self.get(c.lower(), None))
+
+    def render(
+        self, text: str, spacing: int = 1
+    ) -> typing.Tuple[int, typing.Tuple[int, ...]]:
+        key = (text, spacing)
+        rendered = self._rendered.get(key)
+
+        if rendered is None:
+            width = 0
+            rows = []
+
+            for c in text:
+                sym = self.glyph(c)
+                if not sym:
+                    continue
+
+                while len(rows) < len(sym.rows):
+                    rows.append(0x00)
+
+                for y, mask in enumerate(sym.rows):
+                    rows[y] |= mask << width
+
+                width += sym.width + spacing
+
+            rendered = (width, tuple(rows))
+            self._rendered[key] = rendered
+
+        return rendered
+
+
+def deserialize_font(data: typing.Mapping, *args, name: str = "", **kwargs) -> Font:
+    font = Font(name=name)
 
     for char, pixel_data in data.items():
         font[char] = Symbol.deserialize(pixel_data, *args, **kwargs)
@@ -37,7 +115,110 @@ def deserialize_font(
     return font
 
 
-def load_font(filename: str, *args, **kwargs) -> typing.Mapping[str, Symbol]:
+def serialize_compiled_font(font: Font, mtime: float = 0.0) -> bytes:
+    glyphs = sorted(font.items())
+    index = bytearray()
+    data = bytearray()
+    offset = _header.size + _index_entry.size * len(glyphs)
+
+    for char, sym in glyphs:
+        index.extend(
+            _index_entry.pack(ord(char), sym.width, len(sym.rows), offset + len(data))
+        )
+        row_size = _row_size(sym.width)
+        for mask in sym.rows:
+            data.extend(mask.to_bytes(row_size, "little"))
+
+    return _header.pack(compiled_magic, compiled_version, len(glyphs), mtime) + bytes(
+        index + data
+    )
+
+
+def deserialize_compiled_font(
+    buffer: typing.Union[bytes, mmap.mmap], name: str = ""
+) -> Font:
+    magic, version_, count, _ = _header.unpack_from(buffer, 0)
+    if magic != compiled_magic or version_ != compiled_version:
+        raise ValueError(f"{name} is not a compiled font")
+
+    font = Font(name=name)
+    view = memoryview(buffer)
+
+    try:
+        for k in range(count):
+            code, width, height, offset = _index_entry.unpack_from(
+                buffer, _header.size + k * _index_entry.size
+            )
+            row_size = _row_size(width)
+            rows = [
+                int.from_bytes(view[i : i + row_size], "little")
+                for i in range(offset, offset + row_size * height, row_size)
+            ]
+            font[chr(code)] = Symbol.from_rows(width=width, height=height, rows=rows)
+    finally:
+        view.release()
+
+    return font
+
+
+def compiled_font_mtime(buffer: typing.Union[bytes, mmap.mmap]) -> float:
+    return _header.unpack_from(buffer, 0)[3]
+
+
+def load_compiled_font(filename: str, mtime: typing.Optional[float] = None) -> Font:
+    with open(filename, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if mtime is not None and compiled_font_mtime(buffer) != mtime:
+                raise ValueError(f"{filename} is out of date")
+
+            return deserialize_compiled_font(buffer, name=os.path.basename(filename))
+
+
+def save_compiled_font(font: Font, to: str, mtime: float = 0.0):
+    with open(to, "wb") as file:
+        file.write(serialize_compiled_font(font, mtime=mtime))
+
+
+def _load_font_cache(filename: str, mtime: float, name: str) -> typing.Optional[Font]:
+    try:
+        font = load_compiled_font(filename, mtime=mtime)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    font.name = name
+    return font
+
+
+def _save_font_cache(filename: str, font: Font, mtime: float):
+    try:
+        save_compiled_font(font, to=filename, mtime=mtime)
+    except OSError:
+        pass
+
+
+def load_font(
+    filename: str, *args, cache_dir: typing.Optional[str] = None, **kwargs
+) -> Font:
+    name = os.path.basename(filename)
+    mtime = os.path.getmtime(filename)
+    cache_file = os.path.join(
+        cache_dir if cache_dir else os.path.dirname(filename), name + cache_ext
+    )
+
+    font = _load_font_cache(cache_file, mtime=mtime, name=name)
+    if font is not None:
+        return font
+
     with open(filename) as file:
         data = json.load(file)
-        return deserialize_font(data, *args, **kwargs)
+        font = deserialize_font(data, *args, name=name, **kwargs)
+
+    _save_font_cache(cache_file, font=font, mtime=mtime)
+    return font
+
+
+def load_any_font(filename: str, *args, **kwargs) -> Font:
+    if filename.endswith(compiled_font_ext):
+        return load_compiled_font(filename)
+
+    return load_font(filename, *args, **kwargs)
@@ -0,0 +1,242 @@
+import typing
+from functools import lru_cache
+
+import numpy as np
+
+import palettes
+from models import ColorSystem, PlayfieldMode, Row, registers
+
+color_clocks = 228
+hblank = 68
+visible_width = 160
+clocks_per_cycle = 3
+clocks_per_pixel = 4
+
+# (register, bit) feeding each of the 20 playfield pixels of a half line
+_half_slots = (
+    [(0, 4 + i) for i in range(4)]
+    + [(1, 7 - i) for i in range(8)]
+    + [(2, i) for i in range(8)]
+)
+
+
+class Streams(typing.NamedTuple):
+    """Per scanline register values, in the order the exporters emit them."""
+
+    pf0: np.ndarray
+    pf1: np.ndarray
+    pf2: np.ndarray
+    pf0_right: np.ndarray
+    pf1_right: np.ndarray
+    pf2_right: np.ndarray
+    colupf: np.ndarray
+    colubk: np.ndarray
+    colup0: typing.Optional[np.ndarray] = None
+    colup1: typing.Optional[np.ndarray] = None
+
+
+class Timing(typing.NamedTuple):
+    """CPU cycles, counted from the start of the line, at which each store completes.
+
+    A store at cycle c reaches the beam at color clock 3c, so it changes every
+    playfield pixel that starts at or after visible x = 3c - 68. ``right`` set to
+    None means the kernel never rewrites PF0-PF2 mid line.
+    """
+
+    left: typing.Tuple[int, int, int] = (3, 8, 13)
+    right: typing.Optional[typing.Tuple[int, int, int]] = (32, 44, 55)
+    reflect: bool = False
+    score: bool = False
+
+    @classmethod
+    def for_mode(cls, mode: PlayfieldMode) -> "Timing":
+        if mode == PlayfieldMode.Asymmetric:
+            return cls()
+
+        return cls(right=None, reflect=mode == PlayfieldMode.Mirror)
+
+
+def streams_from_rows(rows: typing.Sequence[Row]) -> Streams:
+    values = np.array(
+        [registers(mask) + (code, bg_code) for mask, code, bg_code in rows],
+        dtype=np.uint8,
+    ).reshape(-1, 8)
+
+    return Streams(*(values[:, k] for k in range(8)))
+
+
+@lru_cache(maxsize=None)
+def palette_lut(color_system: ColorSystem) -> np.ndarray:
+    lut = np.zeros((0x100, 3), dtype=np.uint8)
+    mapping = palettes.table[color_system]
+
+    for code in range(0x100):
+        # the lowest bit is ignored by the TIA
+        color = mapping.get(code & 0xFE, "000000")
+        lut[code] = [int(color[k : k + 2], 16) for k in (0, 2, 4)]
+
+    return lut
+
+
+def _write_x(cycle: typing.Optional[int]) -> float:
+    return np.inf if cycle is None else cycle * clocks_per_cycle - hblank
+
+
+@lru_cache(maxsize=None)
+def _sampling(
+    timing: Timing,
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Register, bit and value source (0 previous line, 1 left, 2 right) per pixel."""
+    right_slots = list(reversed(_half_slots)) if timing.reflect else _half_slots
+    slots = _half_slots + right_slots
+
+    register = np.zeros(40, dtype=np.intp)
+    bit = np.zeros(40, dtype=np.uint8)
+    source = np.zeros(40, dtype=np.intp)
+
+    for p, (r, b) in enumerate(slots):
+        x = p * clocks_per_pixel
+        register[p] = r
+        bit[p] = b
+
+        if timing.right is not None and x >= _write_x(timing.right[r]):
+            source[p] = 2
+        elif x >= _write_x(timing.left[r]):
+            source[p] = 1
+        else:
+            # stores that land late leave last line's value on screen
+            source[p] = 0
+
+    return register, bit, source
+
+
+def render(
+    streams: Streams,
+    color_system: ColorSystem = ColorSystem.NTSC,
+    timing: Timing = Timing(),
+) -> np.ndarray:
+    """(scanlines, 160, 3) RGB buffer of what the TIA draws for the streams."""
+    left = np.stack([streams.pf0, streams.pf1, streams.pf2], axis=1)
+    right = (
+        np.stack([streams.pf0_right, streams.pf1_right, streams.pf2_right], axis=1)
+        if timing.right is not None
+        else left
+    )
+
+    # registers keep the last value written on the previous line
+    previous = np.roll(right, 1, axis=0)
+    previous[0] = left[0]
+
+    values = np.stack([previous, left, right])
+    register, bit, source = _sampling(timing)
+
+    on = (values[source, :, register].T >> bit) & 1 != 0
+
+    count = len(streams.colupf)
+    if timing.score:
+        colup0 = streams.colup0 if streams.colup0 is not None else streams.colupf
+        colup1 = streams.colup1 if streams.colup1 is not None else streams.colupf
+        foreground = np.empty((count, 40), dtype=np.uint8)
+        foreground[:, :20] = colup0[:, None]
+        foreground[:, 20:] = colup1[:, None]
+    else:
+        foreground = np.broadcast_to(streams.colupf[:, None], (count, 40))
+
+    codes = np.where(on, foreground, streams.colubk[:, None])
+    return palette_lut(color_system)[np.repeat(codes, clocks_per_pixel, axis=1)]
+
+
+# write registers the playfield model reacts to
+VSYNC = 0x00
+VBLANK = 0x01
+WSYNC = 0x02
+COLUPF = 0x08
+COLUBK = 0x09
+CTRLPF = 0x0A
+PF0 = 0x0D
+PF1 = 0x0E
+PF2 = 0x0F
+
+
+def _pixel_slots(reflect: bool) -> typing.Tuple[np.ndarray, np.ndarray]:
+    right_slots = list(reversed(_half_slots)) if reflect else _half_slots
+    slots = np.repeat(np.array(_half_slots + right_slots), clocks_per_pixel, axis=0)
+    return slots[:, 0].astype(np.intp), slots[:, 1].astype(np.uint8)
+
+
+class TIA:
+    """Playfield and background of the TIA, drawn into a code framebuffer.
+
+    Writes arrive with the color clock they land on; the beam is caught up with
+    the old register values first, playfield writes take effect on the next
+    playfield pixel.
+    """
+
+    max_lines = 320
+
+    def __init__(self):
+        self.registers = bytearray(0x40)
+        self.frame = np.zeros((self.max_lines, visible_width), dtype=np.uint8)
+        self.visible = np.zeros(self.max_lines, dtype=bool)
+        self.frames_started = 0
+        self.frames_ended = 0
+        self.wsync = False
+        self._origin = 0
+        self._rendered = 0
+        self._slots = (_pixel_slots(False), _pixel_slots(True))
+
+    def write(self, register: int, value: int, clock: int):
+        if register in (PF0, PF1, PF2):
+            line, x = divmod(clock, color_clocks)
+            if x > hblank:
+                x = hblank + -(-(x - hblank) // clocks_per_pixel) * clocks_per_pixel
+            self.catch_up(line * color_clocks + x)
+        else:
+            self.catch_up(clock)
+
+        if register == WSYNC:
+            self.wsync = True
+        elif register == VSYNC:
+            if value & 0x02 and not self.registers[VSYNC] & 0x02:
+                self.frames_ended += 1
+            elif not value & 0x02 and self.registers[VSYNC] & 0x02:
+                self._begin_frame(clock)
+
+        self.registers[register] = value
+
+    def _begin_frame(self, clock: int):
+        self._origin = clock // color_clocks
+        self.frame[:] = 0
+        self.visible[:] = False
+        self.frames_started += 1
+
+    def captured(self) -> np.ndarray:
+        """The lines of the last frame drawn with VBLANK off."""
+        return self.frame[self.visible].copy()
+
+    def catch_up(self, clock: int):
+        while self._rendered < clock:
+            line, x = divmod(self._rendered, color_clocks)
+            end = min(clock, (line + 1) * color_clocks)
+
+            if x < hblank:
+                self._rendered = min(end, line * color_clocks + hblank)
+                continue
+
+            row = line - self._origin
+            if not self.registers[VBLANK] & 0x02 and 0 <= row < self.max_lines:
+                self._draw(row, x - hblank, end - line * color_clocks - hblank)
+                self.visible[row] = True
+
+            self._rendered = end
+
+    def _draw(self, row: int, start: int, end: int):
+        register, bit = self._slots[self.registers[CTRLPF] & 0x01]
+        values = np.array(
+            (self.registers[PF0], self.registers[PF1], self.registers[PF2]),
+            dtype=np.uint8,
+        )
+        on = (values[register[start:end]] >> bit[start:end]) & 1 != 0
+        self.frame[row, start:end] = np.where(
+            on, self.registers[COLUPF], self.registers[COLUBK]
+        )
@@ -4,8 +4,10 @@ import abc
 import os
 import sys
 import typing
-from functools import wraps
+from functools import wraps, partial
 
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QGuiApplication
 from PyQt5.QtWidgets import QMessageBox
 from pymitter import EventEmitter
 
@@ -105,10 +107,43 @@ class CappedStack(typing.Generic[T]):
     def empty(self) -> bool:
         return len(self._stack) == 0
 
+    def clear(self):
+        self._stack = []
+
     def full(self) -> bool:
         return len(self._stack) == self._maximum
 
 
+class FrameThrottle(QObject):
+    """Runs the latest call scheduled under each key, at most once per display refresh."""
+
+    default_refresh_rate = 60
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self._pending = {}
+
+        screen = QGuiApplication.primaryScreen()
+        rate = screen.refreshRate() if screen else 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(int(1000 / (rate or self.default_refresh_rate)))
+        self._timer.timeout.connect(self.flush)
+
+    def schedule(self, key: typing.Hashable, f, *args, **kwargs):
+        self._pending[key] = partial(f, *args, **kwargs)
+
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+
+        for f in pending.values():
+            f()
+
+
 def combine(f0, f1, *more):
     def wrapper(*args, **kwargs):
         f0(*args, **kwargs)
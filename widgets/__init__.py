@@ -1,4 +1,7 @@
 from .palette import WPalette
 from .pixel import WPixel
 from .scanline import WScanline
+from .overlay import WOverlay
 from .playfield import WPlayfield
+from .timeline import WTimeline
+from .preview import WPreview
@@ -0,0 +1,50 @@
+import typing
+
+from PyQt5 import QtGui
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget
+
+from models import mask_runs
+
+
+class WOverlay(QWidget):
+    """Row masks painted over a playfield's lines, mouse events pass through."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self._masks: typing.Mapping[int, int] = {}
+        self._color = QtGui.QColor()
+        self._cell = (1, 1)
+        self.hide()
+
+    def show_masks(
+        self, masks: typing.Mapping[int, int], color: str, width: int, height: int
+    ):
+        self._masks = masks
+        self._color = QtGui.QColor(f"#{color}")
+        self._cell = (width, height)
+
+        # line widgets created since the last preview are stacked above
+        self.setGeometry(self.parentWidget().rect())
+        self.raise_()
+        self.show()
+        self.update()
+
+    def clear(self):
+        self._masks = {}
+        self.hide()
+
+    def paintEvent(self, e: QtGui.QPaintEvent):
+        painter = QtGui.QPainter(self)
+        width, height = self._cell
+
+        for y, mask in self._masks.items():
+            for start, end in mask_runs(mask):
+                painter.fillRect(
+                    start * width,
+                    y * height,
+                    (end - start) * width,
+                    height,
+                    self._color,
+                )
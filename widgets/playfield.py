@@ -1,15 +1,26 @@
 import typing
 from functools import partial
 
-from PyQt5 import QtGui
+from PyQt5 import QtGui, QtCore
 from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
 )
 
-from models import init_model, PlayfieldModel
-from tools import combine
-from . import WScanline, WPixel
+from models import (
+    init_model,
+    ColorSystem,
+    PlayfieldModel,
+    Row,
+    PixelModel,
+    ScanlineModel,
+    Snapshot,
+    expand_rows,
+    to_mask,
+    from_mask,
+    mask_runs,
+)
+from . import WScanline, WOverlay
 
 
 class WPlayfield(QWidget):
@@ -26,38 +37,99 @@ class WPlayfield(QWidget):
             self.model.height,
         )
 
+        self.setLayout(layout)
+        self.setMouseTracking(True)
+        self._hover = None
+        self._overlay = WOverlay(parent=self)
+
+        if self.model.rows is None:
+            self.materialize()
+
+        @self.model.zoom.observe
+        def zoom(_, __):
+            self.setFixedSize(
+                self.model.width,
+                self.model.height,
+            )
+
+    @property
+    def materialized(self) -> bool:
+        return self.layout().count() > 0
+
+    def materialize(self):
+        if self.materialized:
+            return
+
+        layout = self.layout()
+
         for j in range(self.model.scanline_count):
             line = WScanline(
                 zoom=self.model.zoom,
                 color_mapping=self.model.color_mapping,
+                mode=self.model.mode,
+                line_height=self.model.line_height,
                 parent=self,
             )
 
-            line.on_pixel_mouse_press_event = combine(
-                line.on_pixel_mouse_press_event,
-                partial(self._on_scanline_mouse_press_event, line, j),
-            )
-            line.on_pixel_mouse_move_event = combine(
-                line.on_pixel_mouse_move_event,
-                partial(self._on_scanline_mouse_move_event, line, j),
-            )
-            line.on_pixel_wheel_event = combine(
-                line.on_pixel_wheel_event,
-                partial(self._on_scanline_wheel_event, line, j),
-            )
+            line.model.palette_code.observe(partial(self._on_line_change, j))
+            line.model.bg_palette_code.observe(partial(self._on_line_change, j))
 
             layout.addWidget(line)
             line.show()
 
-        self.setLayout(layout)
+        rows = self.model.rows
+        self.model.rows = None
 
-        @self.model.zoom.observe
-        def zoom(_, __):
-            self.setFixedSize(
-                self.model.width,
-                self.model.height,
+        if rows is not None:
+            self.show_rows(rows)
+
+        self.sync_selection(self.model.selection.rows())
+
+    def evict(self):
+        if not self.materialized:
+            return
+
+        rows = self.capture_rows()
+        self.take_snapshot()
+
+        layout = self.layout()
+        while layout.count() > 0:
+            line = layout.takeAt(0).widget()
+            line.setParent(None)
+            line.deleteLater()
+
+        self.model.rows = rows
+
+        self.update()
+
+    def paintEvent(self, e: QtGui.QPaintEvent):
+        if self.materialized or self.model.rows is None:
+            return super().paintEvent(e)
+
+        # without line widgets the compact rows are painted directly
+        painter = QtGui.QPainter(self)
+        width = PixelModel.default_width * self.model.zoom.value
+        height = (
+            PixelModel.default_height * self.model.zoom.value * self.model.line_height
+        )
+        mapping = self.model.color_mapping
+
+        first = max(0, e.rect().top() // height)
+        last = min(len(self.model.rows), e.rect().bottom() // height + 1)
+
+        for j in range(first, last):
+            mask, code, bg_code = self.model.rows[j]
+            top = j * height
+            painter.fillRect(
+                0, top, self.width(), height, QtGui.QColor(f"#{mapping[bg_code]}")
             )
 
+            color = QtGui.QColor(f"#{mapping[code]}")
+            for start, end in mask_runs(mask):
+                painter.fillRect(
+                    start * width, top, (end - start) * width, height, color
+                )
+
     def __getitem__(self, y: int) -> WScanline:
         return typing.cast(WScanline, self.layout().itemAt(y).widget())
 
@@ -66,34 +138,205 @@ class WPlayfield(QWidget):
         for j in range(self.model.scanline_count):
             yield self[j]
 
-    def on_scanline_mouse_press_event(
-        self, line: WScanline, y: int, x: int, pixel: WPixel, event: QtGui.QMouseEvent
-    ):
-        pass
+    def capture_row(self, y: int) -> Row:
+        if not self.materialized:
+            return self.model.rows[y]
 
-    def on_scanline_mouse_move_event(
-        self, line: WScanline, y: int, x: int, pixel: WPixel, event: QtGui.QMouseEvent
-    ):
-        pass
+        line = self[y]
+        return (
+            to_mask(line.model.pixels),
+            line.model.palette_code.value,
+            line.model.bg_palette_code.value,
+        )
+
+    def capture_rows(self) -> typing.List[Row]:
+        if not self.materialized:
+            return list(self.model.rows)
+
+        return [self.capture_row(j) for j in range(self.model.scanline_count)]
+
+    def capture_lines(self) -> typing.List[Row]:
+        """One row per displayed scanline, groups expanded."""
+        return expand_rows(self.capture_rows(), self.model.line_height)
+
+    def take_snapshot(self) -> Snapshot:
+        if self.model.snapshot is None:
+            self.model.snapshot = Snapshot.from_rows(self.capture_rows())
+        else:
+            changes = {}
+            for j in self.model.dirty_lines:
+                row = self.capture_row(j)
+                if row != self.model.snapshot[j]:
+                    changes[j] = row
+
+            self.model.snapshot = self.model.snapshot.replace(changes)
 
-    def on_scanline_wheel_event(
-        self, line: WScanline, y: int, x: int, pixel: WPixel, event: QtGui.QWheelEvent
-    ):
+        self.model.dirty_lines.clear()
+        return self.model.snapshot
+
+    def restore_snapshot(self, snapshot: Snapshot):
+        if not self.materialized:
+            self.model.rows = list(snapshot)
+            self.model.index_rows(self.model.rows)
+            self.model.dirty_lines.clear()
+            self.model.snapshot = snapshot
+            self.update()
+            return
+
+        self.set_rows({j: snapshot[j] for j in self.take_snapshot().diff(snapshot)})
+        self.model.dirty_lines.clear()
+        self.model.snapshot = snapshot
+
+    def modified(self) -> bool:
+        return self.model.saved_snapshot is None or bool(
+            self.take_snapshot().diff(self.model.saved_snapshot)
+        )
+
+    def mark_saved(self):
+        self.model.saved_snapshot = self.take_snapshot()
+
+    def show_rows(self, rows: typing.Iterable[Row]):
+        if not self.materialized:
+            self.model.rows = list(rows)
+            self.model.index_rows(self.model.rows)
+            self.model.dirty_lines.update(range(self.model.scanline_count))
+            self.update()
+            return
+
+        for line, (mask, code, bg_code) in zip(self.scanlines, rows):
+            line.model.pixels = from_mask(mask)
+            line.model.update(color=code, bg_color=bg_code)
+
+    def set_color_system(self, color_system: ColorSystem):
+        self.model.color_system = color_system
+
+        if not self.materialized:
+            self.update()
+            return
+
+        for line in self.scanlines:
+            line.model.color_mapping = self.model.color_mapping
+
+    def set_rows(self, rows: typing.Mapping[int, Row]):
+        if not self.materialized:
+            for j, row in rows.items():
+                self.model.rows[j] = row
+                self.model.index_row(j, row[1], row[2])
+            self.model.dirty_lines.update(rows)
+            self.update()
+            return
+
+        for j, (mask, code, bg_code) in rows.items():
+            line = self[j]
+            line.model.pixels = from_mask(mask)
+            line.model.update(color=code, bg_color=bg_code)
+
+    def sync_selection(self, lines: typing.Iterable[int]):
+        for j in lines:
+            selected, floating = self.model.selection.get(j)
+            line = self[j]
+            # selecting a pixel selects the ones derived from it too
+            line.model.selection = from_mask(
+                selected | self.model.neighbor_mask(selected)
+            )
+            line.model.layer_1 = from_mask(
+                floating | self.model.neighbor_mask(floating)
+            )
+            line.model.layer_1_palette_code = self.model.selection.codes.get(j)
+            line.model.palette_code.value = line.model.palette_code.value
+
+    def on_line_change(self, y: int):
         pass
 
-    def _on_scanline_mouse_press_event(
-        self, line: WScanline, y: int, x: int, pixel: WPixel, event: QtGui.QMouseEvent
-    ):
-        self.on_scanline_mouse_press_event(
-            line=line, y=y, x=x, pixel=pixel, event=event
+    def _on_line_change(self, y: int, _, __):
+        self.model.dirty_lines.add(y)
+
+        line = self[y]
+        self.model.index_row(
+            y, line.model.palette_code.value, line.model.bg_palette_code.value
+        )
+
+        self.on_line_change(y)
+
+    def cell_at(
+        self, pos: QtCore.QPoint, clamp: bool = False
+    ) -> typing.Optional[typing.Tuple[int, int]]:
+        zoom = self.model.zoom.value
+        x = pos.x() // (zoom * PixelModel.default_width)
+        y = pos.y() // (zoom * PixelModel.default_height * self.model.line_height)
+
+        if clamp:
+            x = min(max(x, 0), ScanlineModel.pixel_count - 1)
+            y = min(max(y, 0), self.model.scanline_count - 1)
+
+        if 0 <= x < ScanlineModel.pixel_count and 0 <= y < self.model.scanline_count:
+            return y, x
+
+        return None
+
+    def show_overlay(self, masks: typing.Mapping[int, int], code: int):
+        """Previews the masks in the color without touching the lines."""
+        zoom = self.model.zoom.value
+        self._overlay.show_masks(
+            {y: mask | self.model.neighbor_mask(mask) for y, mask in masks.items()},
+            color=self.model.color_mapping[code],
+            width=PixelModel.default_width * zoom,
+            height=PixelModel.default_height * zoom * self.model.line_height,
         )
 
-    def _on_scanline_mouse_move_event(
-        self, line: WScanline, y: int, x: int, pixel: WPixel, event: QtGui.QMouseEvent
-    ):
-        self.on_scanline_mouse_move_event(line=line, y=y, x=x, pixel=pixel, event=event)
+    def clear_overlay(self):
+        self._overlay.clear()
+
+    def mousePressEvent(self, event: QtGui.QMouseEvent):
+        cell = self.cell_at(event.pos())
+        self._hover = (cell, int(event.buttons()), int(event.modifiers()))
+
+        if cell is not None and self.materialized:
+            self.on_cell_mouse_press_event(*cell, event)
+
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event: QtGui.QMouseEvent):
+        cell = self.cell_at(event.pos())
+        hover = (cell, int(event.buttons()), int(event.modifiers()))
+
+        # moves inside the same cell with the same buttons and modifiers change nothing
+        if hover != self._hover:
+            self._hover = hover
+            if cell is not None and self.materialized:
+                self.on_cell_mouse_move_event(*cell, event)
+
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event: QtGui.QMouseEvent):
+        # a drag may end outside, it ends on the nearest cell then
+        cell = self.cell_at(event.pos(), clamp=True)
+
+        if cell is not None and self.materialized:
+            self.on_cell_mouse_release_event(*cell, event)
+
+        super().mouseReleaseEvent(event)
 
-    def _on_scanline_wheel_event(
-        self, line: WScanline, y: int, x: int, pixel: WPixel, event: QtGui.QWheelEvent
-    ):
-        self.on_scanline_wheel_event(line=line, y=y, x=x, pixel=pixel, event=event)
+    def wheelEvent(self, event: QtGui.QWheelEvent):
+        cell = self.cell_at(event.pos())
+
+        if cell is not None and self.materialized:
+            self.on_cell_wheel_event(*cell, event)
+
+        super().wheelEvent(event)
+
+    def leaveEvent(self, event: QtCore.QEvent):
+        self._hover = None
+        super().leaveEvent(event)
+
+    def on_cell_mouse_press_event(self, y: int, x: int, event: QtGui.QMouseEvent):
+        pass
+
+    def on_cell_mouse_move_event(self, y: int, x: int, event: QtGui.QMouseEvent):
+        pass
+
+    def on_cell_mouse_release_event(self, y: int, x: int, event: QtGui.QMouseEvent):
+        pass
+
+    def on_cell_wheel_event(self, y: int, x: int, event: QtGui.QWheelEvent):
+        pass
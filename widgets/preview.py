@@ -0,0 +1,21 @@
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QLabel
+
+
+class WPreview(QLabel):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setAlignment(Qt.AlignCenter)
+        self.setMinimumSize(160, 100)
+
+    def show_buffer(self, rgb: np.ndarray, scale_x: int = 1, scale_y: int = 1):
+        height, width, _ = rgb.shape
+        data = np.ascontiguousarray(rgb)
+
+        image = QImage(data.data, width, height, width * 3, QImage.Format_RGB888)
+        self.setPixmap(
+            QPixmap.fromImage(image).scaled(width * scale_x, height * scale_y)
+        )
+        self.adjustSize()
@@ -1,11 +1,8 @@
 import typing
-from functools import partial
 
-from PyQt5 import QtGui
 from PyQt5.QtWidgets import QWidget, QHBoxLayout
 
 from models import ScanlineModel, init_model
-from tools import combine
 from . import WPixel
 
 
@@ -18,22 +15,13 @@ class WScanline(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
 
-        for i in range(self.model.pixel_count):
-            pixel = WPixel(zoom=self.model.zoom, parent=self)
-
-            pixel.mousePressEvent = combine(
-                pixel.mousePressEvent,
-                partial(self._on_pixel_mouse_press_event, i, pixel),
-            )
+        # hover moves only travel up through widgets that track the mouse
+        self.setMouseTracking(True)
 
-            pixel.mouseMoveEvent = combine(
-                pixel.mouseMoveEvent, partial(self._on_pixel_mouse_move_event, i, pixel)
+        for _ in range(self.model.pixel_count):
+            pixel = WPixel(
+                zoom=self.model.zoom, line_height=self.model.line_height, parent=self
             )
-
-            pixel.wheelEvent = combine(
-                pixel.wheelEvent, partial(self._on_pixel_wheel_event, i, pixel)
-            )
-
             layout.addWidget(pixel)
             pixel.show()
 
@@ -46,7 +34,7 @@ class WScanline(QWidget):
                 pixel_.model.selected.value = self.model.selection[i_]
 
                 if self.model.pixels[i_] or self.model.layer_1[i_]:
-                    pixel_.model.color.value = self.model.color
+                    pixel_.model.color.value = self.model.layer_1_color
                 else:
                     pixel_.model.color.value = self.model.bg_color
 
@@ -57,29 +45,3 @@ class WScanline(QWidget):
     def pixels(self) -> typing.Generator[WPixel, None, None]:
         for i in range(self.model.pixel_count):
             yield self[i]
-
-    def on_pixel_mouse_press_event(
-        self, x: int, pixel: WPixel, event: QtGui.QMouseEvent
-    ):
-        pass
-
-    def on_pixel_mouse_move_event(
-        self, x: int, pixel: WPixel, event: QtGui.QMouseEvent
-    ):
-        pass
-
-    def on_pixel_wheel_event(self, x: int, pixel: WPixel, event: QtGui.QWheelEvent):
-        pass
-
-    def _on_pixel_mouse_press_event(
-        self, x: int, pixel: WPixel, event: QtGui.QMouseEvent
-    ):
-        self.on_pixel_mouse_press_event(x=x, pixel=pixel, event=event)
-
-    def _on_pixel_mouse_move_event(
-        self, x: int, pixel: WPixel, event: QtGui.QMouseEvent
-    ):
-        self.on_pixel_mouse_move_event(x=x, pixel=pixel, event=event)
-
-    def _on_pixel_wheel_event(self, x: int, pixel: WPixel, event: QtGui.QWheelEvent):
-        self.on_pixel_wheel_event(x=x, pixel=pixel, event=event)
@@ -0,0 +1,37 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QSlider, QLabel
+
+
+class WTimeline(QWidget):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        layout = QHBoxLayout()
+
+        self._slider = QSlider(Qt.Horizontal, parent=self)
+        self._slider.setMinimumWidth(240)
+        self._slider.setTickPosition(QSlider.TicksBelow)
+        self._slider.setPageStep(1)
+
+        self._label = QLabel(parent=self)
+        self._label.setMinimumWidth(80)
+
+        layout.addWidget(self._slider)
+        layout.addWidget(self._label)
+        self.setLayout(layout)
+
+        self._slider.valueChanged.connect(
+            lambda value: self.on_frame_selected(frame=value)
+        )
+
+        self.set_frames(frame=0, count=1)
+
+    def set_frames(self, frame: int, count: int):
+        self._slider.blockSignals(True)
+        self._slider.setRange(0, max(0, count - 1))
+        self._slider.setValue(frame)
+        self._slider.blockSignals(False)
+        self._label.setText(f"Frame {frame + 1} / {count}")
+
+    def on_frame_selected(self, frame: int):
+        pass